@@ -0,0 +1,176 @@
+####################################################################################################
+#
+# batch.py
+#
+# Runs lists of Examples in parallel worker processes.
+#
+# Each example is run in a process of its own, forked from the current one, with at most a
+# given number running at a time, by a TaskPool. An example that runs past its timeout is killed,
+# and one whose process dies is reported as crashed, without affecting the others. Results are
+# returned in the order the examples were given, whatever order they finish in.
+#
+####################################################################################################
+
+import multiprocessing
+import StringIO
+import timeit
+import time
+import sys
+
+
+DONE, ERROR, TIMEOUT, CRASH = 'done', 'error', 'timeout', 'crash'
+
+
+def run_task(f, args, conn):
+    """
+    Runs f(*args) in a worker process, capturing what it prints, and sends
+    (status, value, output) through the connection conn.
+    """
+    out = StringIO.StringIO()
+    sys.stdout = out
+    try:
+        v = f(*args)
+        conn.send((DONE, v, out.getvalue()))
+    except Exception as e:
+        conn.send((ERROR, repr(e), out.getvalue()))
+    finally:
+        conn.close()
+
+
+class TaskPool(object):
+    """
+    Runs tasks f(*args), each in a separate process, with at most processes running at once (by
+    default, one per cpu). Tasks submitted beyond that wait their turn, in order of submission.
+    A task still running timeout seconds after it started is killed. Each task may have its own
+    timeout, which overrides the pool's.
+    The result of a task is a dictionary with keys:
+     -- status: DONE, ERROR (f raised an exception), TIMEOUT or CRASH (the process died).
+     -- value: the value returned by f, the repr of the exception if status is ERROR, else None.
+     -- output: what the task printed.
+     -- time: the wall-clock time the task took.
+    """
+
+    def __init__(self, processes=None, timeout=None):
+        self.processes = multiprocessing.cpu_count() if processes is None else max(processes, 1)
+        self.timeout = timeout
+        self.count = 0
+        self.waiting = []   # list of (task number, f, args, timeout), in order of submission
+        self.running = {}   # maps a task number to (process, connection, start time, timeout)
+
+    def submit(self, f, args, timeout=None):
+        """
+        Adds the task f(*args) to the pool, and returns its number.
+        """
+        self.waiting.append((self.count, f, args, self.timeout if timeout is None else timeout))
+        self.count += 1
+        self.start_waiting()
+        return self.count - 1
+
+    def busy(self):
+        return len(self.waiting) > 0 or len(self.running) > 0
+
+    def start_waiting(self):
+        while len(self.waiting) > 0 and len(self.running) < self.processes:
+            k, f, args, timeout = self.waiting.pop(0)
+            recv_conn, send_conn = multiprocessing.Pipe(False)
+            p = multiprocessing.Process(target=run_task, args=(f, args, send_conn))
+            p.daemon = True
+            p.start()
+            send_conn.close()
+            self.running[k] = (p, recv_conn, timeit.default_timer(), timeout)
+
+    def finish(self, k, status, value, output):
+        p, conn, start, timeout = self.running.pop(k)
+        p.join()
+        conn.close()
+        return k, {'status': status, 'value': value, 'output': output,
+                   'time': round(timeit.default_timer() - start, 4)}
+
+    def poll(self):
+        """
+        Collects the tasks that have finished, kills those that have run out of time, and starts
+        waiting tasks in their place.
+        Returns a list of pairs (k, result) for the tasks that ended, in order of k.
+        """
+        ended = []
+        for k in sorted(self.running.keys()):
+            p, conn, start, timeout = self.running[k]
+            if conn.poll() or not p.is_alive():
+                try:
+                    msg = conn.recv() if conn.poll() else None
+                except EOFError:    # the process exited without sending a result
+                    msg = None
+                if msg is None:
+                    p.join()
+                    ended.append(self.finish(k, CRASH, None, 'Process exited with code {0!s}.\n'
+                                             .format(p.exitcode)))
+                else:
+                    ended.append(self.finish(k, *msg))
+            elif timeout is not None and timeit.default_timer() - start > timeout:
+                p.terminate()
+                ended.append(self.finish(k, TIMEOUT, None,
+                                         'Timed out after {0!s} seconds.\n'.format(timeout)))
+        self.start_waiting()
+        return ended
+
+    def terminate(self):
+        """
+        Kills all running tasks and drops the waiting ones.
+        """
+        self.waiting = []
+        for k in self.running.keys():
+            self.running[k][0].terminate()
+            self.finish(k, TIMEOUT, None, '')
+
+
+def run_tasks(tasks, processes=None, timeout=None, poll_interval=.005):
+    """
+    tasks is a list of pairs (f, args). Runs each f(*args) in a TaskPool with the given number of
+    processes and timeout, and returns the list of their results, in order.
+    """
+    pool = TaskPool(processes, timeout)
+    for f, args in tasks:
+        pool.submit(f, args)
+    results = [None] * len(tasks)
+    while pool.busy():
+        for k, r in pool.poll():
+            results[k] = r
+        time.sleep(poll_interval)
+    return results
+
+
+def test_example(e, solver_type=None):
+    """
+    Runs e.test(), with solver_type if it is not None.
+    """
+    if solver_type is not None:
+        e.set_solver_type(solver_type)
+    return e.test()
+
+
+def test_examples(examples, labels, processes=None, timeout=None):
+    """
+    labels is a list of pairs (i, s). Runs test() on examples[i] with solver type s for each
+    pair, or with the example's own solver type if s is None, in a pool of processes.
+    Prints each example's output in order, followed by a summary of failures.
+    Returns the list of results of run_tasks, each with the example index and solver type added.
+    """
+    results = run_tasks([(test_example, (examples[i], s)) for (i, s) in labels],
+                        processes, timeout)
+    for (i, s), r in zip(labels, results):
+        r['example'], r['solver'] = i, s
+        print '*** Example {0!s} ***'.format(i)
+        if s is not None:
+            print '[{0}]'.format(s)
+        sys.stdout.write(r['output'])
+        if r['status'] == ERROR:
+            print 'Error: {0}'.format(r['value'])
+            print
+        elif r['status'] in (TIMEOUT, CRASH):
+            print
+    failed = [r for r in results if r['status'] != DONE or not r['value']]
+    print 'Solved {0!s} of {1!s}.'.format(len(results) - len(failed), len(results))
+    for r in failed:
+        if r['status'] != DONE:
+            print 'Example {0!s}: {1}'.format(r['example'], r['status'])
+    return results
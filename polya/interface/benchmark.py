@@ -0,0 +1,337 @@
+####################################################################################################
+#
+# benchmark.py
+#
+# Timing runs over lists of Examples, with machine-readable output.
+#
+# benchmark runs each example a number of times with each solver type, and records the outcome,
+# the minimum and median running times, and the statistics of the last run. The results can be
+# written as JSON or CSV, and compared against a stored JSON baseline to flag slowdowns and
+# changed outcomes. The time taken to import polya in a fresh interpreter is measured too, and
+# recorded as a result with example 'import'.
+#
+# From the command line, as in sample_problems.py:
+#   python sample_problems.py benchmark [-repeat N] [-json FILE] [-csv FILE] [-baseline FILE]
+#                                       [-threshold T] [-solvers fm,poly,simplex,portfolio]
+#                                       [examples...]
+# The solver type 'portfolio' races the solver types of solve_util.default_portfolio().
+#
+# benchmark_projections times the pairwise projections of poly_mult_module.get_mul_comparisons,
+# which share one split of the generators and drop redundant rows, against a cdd call on the
+# full generator rows for each pair, as get_mul_comparisons used to make. It needs cdd:
+#   python sample_problems.py benchmark_projections [-repeat N] [-seed S]
+#
+####################################################################################################
+
+import polya.modules.polyhedron.lrs as lrs
+import polya.modules.polyhedron.lrs_polyhedron_util as lrs_util
+import polya.modules.polyhedron.poly_mult_module as poly_mult_module
+import polya.interface.solve_util as solve_util
+import subprocess
+import itertools
+import fractions
+import random
+import timeit
+import json
+import csv
+import sys
+
+
+csv_fields = ['example', 'solver', 'outcome', 'status', 'min', 'median', 'runs']
+
+
+def solver_available(s):
+    """
+    Returns True if the solver type s can be run in this installation.
+    """
+    if s == 'poly':
+        return bool(lrs.get_lrs_path() and lrs.get_redund_path() and lrs_util.get_cdd())
+    return True
+
+
+def median(l):
+    l = sorted(l)
+    n = len(l)
+    return l[n // 2] if n % 2 == 1 else (l[n // 2 - 1] + l[n // 2]) / 2.0
+
+
+def benchmark_example(e, solver_type, repeat=3):
+    """
+    Runs the Example e repeat times with solver_type, and returns a dictionary of results.
+    solver_type 'portfolio' races the default portfolio of solve_util.
+    """
+    old_solver, old_portfolio = e.solver, e.portfolio
+    if solver_type == 'portfolio':
+        e.set_portfolio(solve_util.default_portfolio())
+    else:
+        e.set_solver_type(solver_type)
+    times = []
+    try:
+        for k in range(repeat):
+            S = e.make_solver()
+            t = timeit.default_timer()
+            outcome = e.run(S)
+            times.append(timeit.default_timer() - t)
+    finally:
+        e.set_solver_type(old_solver)
+        e.set_portfolio(old_portfolio)
+    return {'solver': solver_type,
+            'outcome': outcome,
+            'status': S.status,
+            'min': round(min(times), 4),
+            'median': round(median(times), 4),
+            'runs': repeat,
+            'statistics': S.statistics}
+
+
+def benchmark_import(repeat=3):
+    """
+    Imports polya repeat times, each in a new interpreter, and returns a dictionary of results in
+    the form of benchmark_example. The start-up time of the interpreter itself is included.
+    """
+    times = []
+    for k in range(repeat):
+        t = timeit.default_timer()
+        subprocess.check_call([sys.executable, '-c', 'import polya'])
+        times.append(timeit.default_timer() - t)
+    return {'example': 'import',
+            'solver': 'none',
+            'outcome': True,
+            'status': 'imported',
+            'min': round(min(times), 4),
+            'median': round(median(times), 4),
+            'runs': repeat,
+            'statistics': {}}
+
+
+def benchmark(examples, solver_types=('fm', 'poly', 'simplex'), repeat=3, indices=None):
+    """
+    Benchmarks a list of Examples with each available solver type in solver_types.
+    Examples that are omitted from 'test_all' for a solver type are skipped, unless they are
+    requested explicitly by their indices.
+    Returns a list of dictionaries, one for each example and solver type.
+    """
+    explicit = indices is not None
+    if indices is None:
+        indices = range(len(examples))
+    results = []
+    for s in [s for s in solver_types if solver_available(s)]:
+        for i in indices:
+            e = examples[i]
+            if not explicit and (e.omit == True or (e.omit == 'fm' and s == 'fm')):
+                continue
+            r = benchmark_example(e, s, repeat)
+            r['example'] = i
+            results.append(r)
+    return results
+
+
+def to_json(results):
+    return json.dumps(results, indent=1, sort_keys=True)
+
+
+def write_csv(results, f):
+    """
+    Writes the results to the file object f as CSV, leaving out the module statistics.
+    """
+    w = csv.DictWriter(f, csv_fields, extrasaction='ignore')
+    w.writeheader()
+    for r in results:
+        w.writerow(r)
+
+
+def compare(results, baseline, threshold=0.25, min_time=0.02):
+    """
+    Compares results against the results in baseline.
+    A result is flagged if its outcome changed, or if its median time exceeds the baseline median
+    by more than the fraction threshold and by more than min_time seconds.
+    Returns a list of strings describing the flagged results.
+    """
+    base = dict(((r['example'], r['solver']), r) for r in baseline)
+    flagged = []
+    for r in results:
+        b = base.get((r['example'], r['solver']))
+        if b is None:
+            continue
+        name = 'Example {0!s} ({1})'.format(r['example'], r['solver'])
+        if r['outcome'] != b['outcome']:
+            flagged.append('{0}: outcome changed from {1!s} to {2!s}'.format(
+                name, b['outcome'], r['outcome']))
+        elif r['median'] > b['median'] * (1 + threshold) and r['median'] - b['median'] > min_time:
+            flagged.append('{0}: median time rose from {1!s}s to {2!s}s'.format(
+                name, b['median'], r['median']))
+    return flagged
+
+
+def run_benchmark(examples, args):
+    """
+    Runs benchmark from the command line. args are the arguments following 'benchmark'.
+    Prints a summary, and returns the list of flagged results if a baseline was given.
+    """
+    opts = {'-repeat': '3', '-json': None, '-csv': None, '-baseline': None, '-threshold': '0.25',
+            '-solvers': 'fm,poly,simplex'}
+    args = list(args)
+    for o in opts:
+        if o in args:
+            k = args.index(o)
+            opts[o] = args[k + 1]
+            del args[k:k + 2]
+    indices = [int(a) for a in args] if args else None
+
+    results = benchmark(examples, opts['-solvers'].split(','), int(opts['-repeat']), indices)
+    for r in results:
+        print 'Example {0!s} ({1}): {2!s}, min {3!s}s, median {4!s}s'.format(
+            r['example'], r['solver'], r['outcome'], r['min'], r['median'])
+    print 'Total median:', round(sum(r['median'] for r in results), 3), 'seconds'
+    r = benchmark_import(int(opts['-repeat']))
+    print 'Import: min {0!s}s, median {1!s}s'.format(r['min'], r['median'])
+    results.append(r)
+
+    if opts['-json']:
+        with open(opts['-json'], 'w') as f:
+            f.write(to_json(results))
+    if opts['-csv']:
+        with open(opts['-csv'], 'wb') as f:
+            write_csv(results, f)
+
+    flagged = []
+    if opts['-baseline']:
+        with open(opts['-baseline']) as f:
+            baseline = json.load(f)
+        flagged = compare(results, baseline, float(opts['-threshold']))
+        for s in flagged:
+            print 'REGRESSION:', s
+        if not flagged:
+            print 'No regressions against {0}.'.format(opts['-baseline'])
+    return flagged
+
+
+####################################################################################################
+#
+# Pairwise projections
+#
+####################################################################################################
+
+# the shapes (num_vars, num_primes, num_rays) of the generated projection problems
+projection_shapes = [(4, 0, 8), (6, 0, 16), (8, 0, 24), (6, 2, 16), (8, 3, 24), (10, 3, 40)]
+
+
+def random_generators(num_vars, num_primes, num_rays, rand):
+    """
+    Returns a pair (vertices, lin_set) in the form of the output of lrs_util.get_vertices for a
+    multiplicative problem: the origin, and num_rays rays with small integer entries, over the
+    constant column, num_vars term columns and num_primes prime columns. One ray in eight is
+    made a line. rand is a random.Random.
+    """
+    n = num_vars + num_primes + 1
+    vertices = [[1] + [0] * n]
+    while len(vertices) < num_rays + 1:
+        v = [0] + [rand.choice([0, 0, 1]) * rand.randint(-3, 3) for k in range(n)]
+        if any(v):
+            vertices.append(v)
+    lin_set = set(k for k in range(1, len(vertices)) if rand.random() < .125)
+    return vertices, lin_set
+
+
+def per_pair_projections(vertices, lin_set, num_vars):
+    """
+    Returns the inequalities of the projection onto each pair of term columns, computed as
+    get_mul_comparisons used to: with a cdd matrix built from the full generator rows for every
+    pair, and the lines added one at a time.
+    """
+    cdd = lrs_util.get_cdd()
+    projections = []
+    for (i, j) in itertools.combinations(range(num_vars), 2):
+        matrix = cdd.Matrix([[vertices[k][0], vertices[k][i+2], vertices[k][j+2]]
+                             + vertices[k][num_vars+2:]
+                             for k in range(len(vertices)) if k not in lin_set],
+                            number_type='fraction')
+        matrix.rep_type = cdd.RepType.GENERATOR
+        for k in lin_set:
+            matrix.extend([[vertices[k][0], vertices[k][i+2], vertices[k][j+2]]
+                           + vertices[k][num_vars+2:]], linear=True)
+        ineqs = cdd.Polyhedron(matrix).get_inequalities()
+        projections.append([(ineqs[k], k in ineqs.lin_set) for k in range(len(ineqs))])
+    return projections
+
+
+def shared_projections(vertices, lin_set, num_vars):
+    """
+    Returns the same projections as per_pair_projections, computed as get_mul_comparisons does.
+    """
+    split = [v[:num_vars+2] + [v[num_vars+2:]] for v in vertices]
+    rows = [split[k] for k in range(len(vertices)) if k not in lin_set]
+    lin_rows = [split[k] for k in sorted(lin_set)]
+    return [poly_mult_module.projection_inequalities(
+        *poly_mult_module.project_generators(rows, lin_rows, [0, i+2, j+2]))
+        for (i, j) in itertools.combinations(range(num_vars), 2)]
+
+
+def same_cone(p1, p2):
+    """
+    Returns True if the lists of inequalities p1 and p2, as returned by per_pair_projections, are
+    the same up to scaling, leaving out those with no term columns, which get_mul_comparisons
+    skips. An equality is taken as the two inequalities it stands for.
+    """
+    def normal(p):
+        rows = set()
+        for c, linear in p:
+            c = [fractions.Fraction(x) for x in c]
+            d = next((x for x in c[1:] if x != 0), None)
+            if d is None:
+                continue
+            rows.add(tuple(x / abs(d) for x in c))
+            if linear:
+                rows.add(tuple(-x / abs(d) for x in c))
+        return rows
+
+    return normal(p1) == normal(p2)
+
+
+def benchmark_projections(repeat=3, seed=0):
+    """
+    Times per_pair_projections and shared_projections on a generated problem of each shape in
+    projection_shapes, and checks that they give the same cones.
+    Returns a list of dictionaries, one for each shape.
+    """
+    rand = random.Random(seed)
+    results = []
+    for shape in projection_shapes:
+        vertices, lin_set = random_generators(shape[0], shape[1], shape[2], rand)
+        times = {}
+        for name, f in [('per_pair', per_pair_projections), ('shared', shared_projections)]:
+            times[name] = []
+            for k in range(repeat):
+                t = timeit.default_timer()
+                out = f(vertices, lin_set, shape[0])
+                times[name].append(timeit.default_timer() - t)
+            times[name + '_out'] = out
+        results.append({'shape': shape,
+                        'per_pair': round(median(times['per_pair']), 4),
+                        'shared': round(median(times['shared']), 4),
+                        'agree': all(same_cone(p1, p2) for p1, p2 in
+                                     zip(times['per_pair_out'], times['shared_out']))})
+    return results
+
+
+def run_projection_benchmark(args):
+    """
+    Runs benchmark_projections from the command line. args are the arguments following
+    'benchmark_projections'. Returns False if cdd is not installed or the projections disagree.
+    """
+    opts = {'-repeat': '3', '-seed': '0'}
+    args = list(args)
+    for o in opts:
+        if o in args:
+            k = args.index(o)
+            opts[o] = args[k + 1]
+            del args[k:k + 2]
+    if not lrs_util.get_cdd():
+        print 'cdd is not installed, so the per-pair projections cannot be computed.'
+        return False
+    results = benchmark_projections(int(opts['-repeat']), int(opts['-seed']))
+    for r in results:
+        print '{0!s} vars, {1!s} primes, {2!s} rays: per pair {3!s}s, shared {4!s}s{5}'.format(
+            r['shape'][0], r['shape'][1], r['shape'][2], r['per_pair'], r['shared'],
+            '' if r['agree'] else ', DIFFERENT CONES')
+    return all(r['agree'] for r in results)
@@ -13,7 +13,10 @@
 ####################################################################################################
 
 import polya.interface.solve_util as solve_util
+import polya.interface.benchmark as benchmark
+import polya.interface.batch as batch
 import timeit
+import sys
 import polya.main.messages as messages
 import polya.util.timer as timer
 import polya.main.formulas as formulas
@@ -34,7 +37,7 @@ class Example:
          -- omit: the example will not run if omit=True. Defaults to False.
          -- comment: prints comment when the example is run.
          -- split_depth, split_depth: as in Solver.
-         -- solver: 'fm' or 'poly' arithmetic
+         -- solver: 'fm', 'poly' or 'simplex' arithmetic
         """
         self.hyps = hyps if hyps else list()
         self.terms = terms if terms else list()
@@ -46,6 +49,8 @@ class Example:
         self.split_depth = split_depth
         self.split_breadth = split_breadth
         self.solver = solver
+        self.portfolio = None
+        self.select_modules = False
         self.clauses = []
 
     def show(self):
@@ -75,18 +80,46 @@ class Example:
     def set_solver_type(self, s):
         self.solver = s
 
+    def set_portfolio(self, configs):
+        """
+        Races the configurations configs, as in Solver, or runs the solver type alone if configs
+        is None. Examples with their own modules always run alone.
+        """
+        self.portfolio = configs if len(self.modules) == 0 else None
+
+    def set_module_selection(self, flag):
+        self.select_modules = flag
+
     def set_split(self, depth, breadth):
         self.split_depth, self.split_breadth = depth, breadth
 
-    def test(self):
+    def make_solver(self):
         """
-        Creates a Solver object with the stored values, and runs check().
+        Creates a Solver object with the stored values.
         """
-        self.show()
         S = solve_util.Solver(self.split_depth, self.split_breadth, self.hyps, self.terms,
-                              self.axioms, self.modules, self.solver)
+                              self.axioms, self.modules, self.solver, portfolio=self.portfolio,
+                              select_modules=self.select_modules)
         for c in self.clauses:
             S.add_clause(c)
+        return S
+
+    def run(self, S):
+        """
+        Runs prove() on the conclusion with the Solver S, or check() if there is none.
+        Returns True if the conclusion is valid, or the hypotheses are refuted.
+        """
+        if self.conc:
+            return S.prove(self.conc)
+        else:
+            return S.check()
+
+    def test(self):
+        """
+        Creates a Solver object with the stored values, and runs check().
+        """
+        self.show()
+        S = self.make_solver()
         t = timeit.default_timer()
         r = False
         if self.conc:
@@ -120,6 +153,28 @@ def run_examples(examples, args):
         for e in examples:
             e.set_solver_type('fm')
         args.remove('-fm')
+    if '-simplex' in args:
+        for e in examples:
+            e.set_solver_type('simplex')
+        args.remove('-simplex')
+    if '-portfolio' in args:
+        for e in examples:
+            e.set_portfolio(solve_util.default_portfolio())
+        args.remove('-portfolio')
+    if '-select' in args:
+        for e in examples:
+            e.set_module_selection(True)
+        args.remove('-select')
+    processes, timeout = None, None
+    if '-j' in args:
+        k = args.index('-j')
+        processes = int(args[k + 1])
+        del args[k:k + 2]
+    if '-timeout' in args:
+        k = args.index('-timeout')
+        timeout = float(args[k + 1])
+        del args[k:k + 2]
+    use_batch = processes is not None or timeout is not None
 
 
     # perform command
@@ -129,13 +184,35 @@ def run_examples(examples, args):
         print "Use 'python {0} 6 9 10' to run those examples.".format(script_name)
         print "Use 'python {0} test_all' to run them all.".format(script_name)
         print "Use switch -v to produce verbose output."
-        print "Use switch -fm to use Fourier Motzkin"
+        print "Use switch -fm to use Fourier Motzkin, or -simplex to use the simplex method."
+        print "Use switch -portfolio to race the solver types in parallel processes."
+        print "Use switch -select to run only the modules that can act on each example."
+        print "Use switch -j N to run the examples in N parallel processes,"
+        print "  and -timeout T to stop each one after T seconds."
+        print "Use 'python {0} benchmark' to time the examples with each solver type.".format(
+            script_name)
+        print "  Options: -repeat N, -json FILE, -csv FILE, -baseline FILE, -threshold T,"
+        print "  -solvers fm,poly,simplex,portfolio, followed by the examples to run"
+        print "  (default: all)."
+        print "  Exits with status 1 if a result is slower than the baseline or differs from it."
+        print "Use 'python {0} benchmark_projections' to time the pairwise projections".format(
+            script_name)
+        print "  of the polyhedron multiplicative module against a cdd call for each pair."
+        print "  Options: -repeat N, -seed S. Needs cdd."
     else:
         #show_configuration()
         if args[1] == 'list':
             for i in range(len(examples)):
                 print '*** Example {0!s} ***'.format(i)
                 examples[i].show()
+        elif args[1] == 'test_all' and use_batch:
+            t = timeit.default_timer()
+            batch.test_examples(examples, [(i, None) for i in range(len(examples))
+                                           if not (examples[i].omit == True or
+                                                   (examples[i].omit == 'fm' and
+                                                    examples[i].solver == 'fm'))],
+                                processes, timeout)
+            print 'Total:', round(timeit.default_timer()-t, 3), 'seconds'
         elif args[1] == 'test_all':
             t = timeit.default_timer()
             for i in range(len(examples)):
@@ -145,6 +222,14 @@ def run_examples(examples, args):
                     examples[i].test()
             print 'Total:', round(timeit.default_timer()-t, 3), 'seconds'
         # for a comparison of Fourier-Motzkin and polytope methods
+        elif args[1] == 'test_all_comp' and use_batch:
+            t = timeit.default_timer()
+            batch.test_examples(examples, [(i, s) for i in range(len(examples))
+                                           if examples[i].omit != True
+                                           for s in ['fm', 'poly']
+                                           if not (s == 'fm' and examples[i].omit == 'fm')],
+                                processes, timeout)
+            print 'Total:', round(timeit.default_timer()-t, 3), 'seconds'
         elif args[1] == 'test_all_comp':
             t = timeit.default_timer()
             for i in range(len(examples)):
@@ -160,6 +245,18 @@ def run_examples(examples, args):
                     print '[Poly]'
                     examples[i].test()
             print 'Total:', round(timeit.default_timer()-t, 3), 'seconds'
+        elif args[1] == 'benchmark':
+            if benchmark.run_benchmark(examples, args[2:]):
+                sys.exit(1)
+        elif args[1] == 'benchmark_projections':
+            if not benchmark.run_projection_benchmark(args[2:]):
+                sys.exit(1)
+        elif use_batch:
+            try:
+                batch.test_examples(examples, [(int(a), None) for a in args[1:]],
+                                    processes, timeout)
+            except ValueError:
+                print 'No example {0}.'.format(' '.join(args[1:]))
         else:
             for i in range(1, len(args)):
                 try:
@@ -168,5 +265,5 @@ def run_examples(examples, args):
                     print 'No example {0}.'.format(args[i])
         messages.set_verbosity(messages.debug)
 
-        if args[1] != 'list':
+        if args[1] not in ['list', 'benchmark', 'benchmark_projections']:
             timer.announce_times()
\ No newline at end of file
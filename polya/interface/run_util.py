@@ -13,9 +13,13 @@
 ####################################################################################################
 
 import polya.main.messages as messages
+import polya.main.blackboard as blackboard
 import polya.main.terms as terms
 import polya.modules.absolute_value_module as abs_module
 import polya.modules.exponential_module as exp_module
+import polya.util.budget as budget
+import polya.util.timer as timer
+import multiprocessing
 import copy
 
 
@@ -32,18 +36,43 @@ def copy_and_add(B, *comps):
     return new_B
 
 
-def saturate_modules(B, modules):
-    """Run the modules in succession on B until saturation
+def run_module(B, m, delta):
+    """
+    Runs the module m on B with the new information delta. If m raises an exception, the timings
+    it left running are stopped.
+    """
+    d = timer.depth()
+    try:
+        m.update_blackboard(B, delta)
+    finally:
+        timer.unwind(d)
+
+
+def saturate_modules(B, modules, incremental=True):
+    """Run the modules in succession on B until saturation.
+    Each module is passed the indices and pairs of indices that have changed since its last
+    run. If incremental is False, modules are passed None instead, and recompute from the full
+    blackboard.
+    Each round is charged to the current budget, which is checked before every module runs.
 
     Arguments:
     -- B: a blackboard
     -- modules: a list of modules
+    -- incremental: whether modules should only process new information
     """
     mid = B.identify()
-    while len(B.get_new_info(mid)) > 0:
-        for m in modules:
-            messages.announce(B.info_dump(), messages.DEBUG)
-            m.update_blackboard(B)
+    mids = [B.identify() for m in modules]
+    try:
+        while len(B.get_new_info(mid)) > 0:
+            budget.spend(budget.ROUNDS)
+            for m, m_id in zip(modules, mids):
+                budget.check()
+                messages.announce(B.info_dump(), messages.DEBUG)
+                delta = B.get_new_info(m_id)
+                run_module(B, m, delta if incremental else None)
+    finally:
+        for m_id in [mid] + mids:
+            B.release(m_id)
 
 
 def saturate_modules2(B, modules):
@@ -55,6 +84,7 @@ def saturate_modules2(B, modules):
     -- modules: a list of modules
     """
     mid = B.identify()
+    mids = dict((m, B.identify()) for m in modules)
     cntr = 0
     amodules, bmodules = [], []
     for m in modules:
@@ -62,17 +92,25 @@ def saturate_modules2(B, modules):
             bmodules.append(m)
         else:
             amodules.append(m)
-    while len(B.get_new_info(mid)) > 0 and cntr < 3:
-        for m in amodules:
-            messages.announce(B.info_dump(), messages.DEBUG)
-            m.update_blackboard(B)
-    for m in bmodules:
-        messages.announce(B.info_dump(), messages.DEBUG)
-        m.update_blackboard(B)
-    while len(B.get_new_info(mid)) > 0:
-        for m in amodules + bmodules:
+    try:
+        while len(B.get_new_info(mid)) > 0 and cntr < 3:
+            budget.spend(budget.ROUNDS)
+            for m in amodules:
+                budget.check()
+                messages.announce(B.info_dump(), messages.DEBUG)
+                run_module(B, m, B.get_new_info(mids[m]))
+        for m in bmodules:
             messages.announce(B.info_dump(), messages.DEBUG)
-            m.update_blackboard(B)
+            run_module(B, m, B.get_new_info(mids[m]))
+        while len(B.get_new_info(mid)) > 0:
+            budget.spend(budget.ROUNDS)
+            for m in amodules + bmodules:
+                budget.check()
+                messages.announce(B.info_dump(), messages.DEBUG)
+                run_module(B, m, B.get_new_info(mids[m]))
+    finally:
+        for m_id in [mid] + mids.values():
+            B.release(m_id)
 
 
 def knows_split(B, i, j, comp, c):
@@ -84,26 +122,241 @@ def knows_split(B, i, j, comp, c):
     #    or B.implies(i, terms.LT, c, j)
 
 
-def get_splits(B, modules):
+def get_split_weights(B, modules, changed=None):
     """
     Asks each module for a list of comparisons it would like to see.
-    Adds up this information and returns a list of tuples (i, j, c), ordered so that splitting
-    on t_i <> c*t_j is most desirable for those that come earlier.
+    Returns a dictionary mapping each tuple (i, j, comp, c) to the total weight of the modules'
+    interest in t_i comp c*t_j.
+    If changed is a set of indices, only the tuples with i or j in changed are returned.
     """
     splits = {}
     for m in modules:
-        l = m.get_split_weight(B)
+        l = m.get_split_weight(B) if changed is None else m.get_split_weight(B, changed)
         if l is not None:
             for (i, j, c, comp, w) in l:
-                splits[i, j, comp, c] = splits.get((i, j, comp, c), 0) + w
+                if changed is None or i in changed or j in changed:
+                    splits[i, j, comp, c] = splits.get((i, j, comp, c), 0) + w
+    return splits
+
 
-    slist = [q for q in sorted(splits.keys(), key=lambda p: (-splits[p], p[0]))
+def split_key(splits):
+    """
+    Returns the key by which the split candidates with weights splits are ordered, most desirable
+    first.
+    """
+    return lambda p: (-splits[p], p)
+
+
+def get_splits(B, modules):
+    """
+    Asks each module for a list of comparisons it would like to see.
+    Adds up this information and returns a list of tuples (i, j, c), ordered so that splitting
+    on t_i <> c*t_j is most desirable for those that come earlier.
+    """
+    splits = get_split_weights(B, modules)
+    slist = [q for q in sorted(splits.keys(), key=split_key(splits))
              if splits[q] > 0 and not knows_split(B, q[0], q[1], q[2], q[3])]
 
     return slist
 
 
-def split_modules(B, modules, depth, breadth, saturate=True):
+class SplitQueue(object):
+    """
+    Maintains the split candidates of get_splits for a blackboard across split levels.
+    When the blackboard has learned something new, the modules are only asked again for the
+    weights of candidates whose terms have changed, and these are moved to their new places in the
+    order; the weights of the others cannot have changed. Likewise, knows_split is only
+    re-evaluated for candidates whose terms or pair have changed since it was last checked. Since
+    a blackboard only gains information, candidates that are known once are dropped for good.
+    Everything is recomputed when new terms or clauses have been added, since these do not show up
+    as changes to indices.
+    A SplitQueue should be copied along with its blackboard.
+    """
+
+    def __init__(self, B):
+        self.id = B.identify()
+        self.num_terms = None    # the number of terms of B when the weights were computed
+        self.clause_version = None    # the version of the clauses of B at that time
+        self.weights = {}    # the weight of each candidate
+        self.order = None    # candidates with positive weight, most desirable first
+        self.unknown = set()    # candidates found not to be known, with no changes since
+
+    def update_weights(self, B, modules, changed):
+        """
+        Recomputes the weights of the candidates with an index in changed, and merges them into
+        the order of the others.
+        """
+        touched = lambda q: q[0] in changed or q[1] in changed
+        kept = [q for q in self.order if not touched(q)]
+        for q in [q for q in self.weights if touched(q)]:
+            del self.weights[q]
+        new = get_split_weights(B, modules, changed)
+        self.weights.update(new)
+        key = split_key(self.weights)
+        new = sorted([q for q in new if new[q] > 0], key=key)
+        self.order, k = [], 0
+        for q in kept:
+            while k < len(new) and key(new[k]) < key(q):
+                self.order.append(new[k])
+                k += 1
+            self.order.append(q)
+        self.order.extend(new[k:])
+
+    def get_splits(self, B, modules, breadth=0):
+        """
+        Returns the same list as get_splits(B, modules), truncated to length breadth if
+        breadth > 0.
+        """
+        delta = B.get_new_info(self.id)
+        changed = blackboard.new_info_indices(delta)
+        if self.order is None or B.num_terms != self.num_terms or \
+                B.clause_version != self.clause_version:
+            self.weights = get_split_weights(B, modules)
+            self.order = [q for q in sorted(self.weights.keys(), key=split_key(self.weights))
+                          if self.weights[q] > 0]
+            self.num_terms, self.clause_version = B.num_terms, B.clause_version
+            self.unknown = set()
+        elif len(changed) > 0:
+            # t0 = 1 never changes, so the candidates that compare with it are only touched
+            # through their other index.
+            self.update_weights(B, modules, changed - set([0]))
+        self.unknown = set(q for q in self.unknown if q[0] not in changed and q[1] not in changed)
+
+        slist, order = [], []
+        for q in self.order:
+            if breadth > 0 and len(slist) >= breadth:
+                order.append(q)
+            elif q in self.unknown or not knows_split(B, q[0], q[1], q[2], q[3]):
+                self.unknown.add(q)
+                slist.append(q)
+                order.append(q)
+        self.order = order
+        return slist
+
+    def release(self, B):
+        """
+        Stops tracking changes to B.
+        """
+        B.release(self.id)
+
+
+def assume_split(B, modules, can, depth):
+    """
+    Assumes the split candidate can = (i, j, comp, c), ie t_i comp c*t_j, in B, and runs the
+    modules on B without further splitting.
+    Returns True if a contradiction is found, False otherwise.
+    """
+    ti, tj = terms.IVar(can[0]), can[3]*terms.IVar(can[1])
+    try:
+        newcomp = terms.comp_eval[can[2]](ti, tj)
+        messages.announce("Case split: assuming {0} at depth {1}".format(newcomp, depth),
+                          messages.ASSERTION)
+        B.assert_comparison(newcomp)
+        return run_modules(B, modules, 0, 0)
+    except terms.Contradiction:
+        return True
+
+
+def learn_split(B, can, depth):
+    """
+    Asserts to B the negation of the split candidate can = (i, j, comp, c), after the
+    assumption t_i comp c*t_j has led to a contradiction.
+    """
+    messages.announce("Split led to contradiction at depth {0}. Learned:".format(depth),
+                      messages.ASSERTION)
+    B.assert_comparison(split_negation(can))
+
+
+def split_negation(can):
+    """
+    Returns the TermComparison that is the negation of the split candidate can = (i, j, comp, c).
+    """
+    ti, tj = terms.IVar(can[0]), can[3]*terms.IVar(can[1])
+    return terms.comp_eval[terms.comp_negate(can[2])](ti, tj)
+
+
+def run_with_statistics(f, *args):
+    """
+    Returns the pair (f(*args), stats), where stats is the timer.Statistics recorded during the
+    call. Used in worker processes, which would otherwise record into a copy of the statistics of
+    the parent process that is never seen again.
+    """
+    stats = timer.Statistics()
+    previous = timer.activate(stats)
+    try:
+        return f(*args), stats
+    finally:
+        timer.activate(previous)
+
+
+def _assume_split_worker(args):
+    """
+    Runs assume_split in a worker process. Returns a tuple (refuted, B, modules, stats), where B
+    and modules are the saturated copies if the branch was not refuted, and None otherwise, and
+    stats is the timer.Statistics of the run.
+    """
+    B, modules, can, depth = args
+    refuted, stats = run_with_statistics(assume_split, B, modules, can, depth)
+    if refuted:
+        return True, None, None, stats
+    return False, B, modules, stats
+
+
+def _split_deeper_worker(args):
+    """
+    Runs split_modules on a saturated branch in a worker process. Returns a pair (refuted, stats),
+    where refuted is True if the branch was refuted, and stats is the timer.Statistics of the run.
+    """
+    def refute(B, modules, depth, breadth, queue):
+        try:
+            split_modules(B, modules, depth, breadth, saturate=False, queue=queue)
+            return False
+        except terms.Contradiction:
+            return True
+
+    return run_with_statistics(refute, *args)
+
+
+def _indexed_worker(args):
+    """
+    Runs worker on task in a worker process, where args is (worker, k, task). Returns the pair
+    (k, result).
+    """
+    worker, k, task = args
+    return k, worker(task)
+
+
+def first_refutation(worker, tasks, processes):
+    """
+    Evaluates worker on each of tasks in a pool of worker processes. Each result of worker is a
+    tuple whose first entry is True if the task led to a contradiction, and whose last entry is
+    the timer.Statistics of the task.
+    Returns a pair (k, results), where k is the least index of a refuted task, or None if there is
+    none, and results is the list of results of the tasks before k.
+    Results are collected in the order the tasks finish. Once a task k is refuted and every task
+    before it has finished, the remaining tasks are cancelled, so that a quick refutation need not
+    wait for slower tasks after it. The outcome is the same as evaluating the tasks in order and
+    stopping at the first refutation. The statistics of every task that finished are added to the
+    current statistics.
+    """
+    pool = multiprocessing.Pool(min(processes, len(tasks)))
+    try:
+        args = [(worker, k, t) for k, t in enumerate(tasks)]
+        done, first = {}, None
+        for k, r in pool.imap_unordered(_indexed_worker, args):
+            done[k] = r
+            timer.current.merge(r[-1])
+            if r[0]:
+                first = k if first is None else min(first, k)
+            if first is not None and all(j in done for j in range(first)):
+                break
+        return first, [done[j] for j in range(len(tasks) if first is None else first)]
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def split_modules(B, modules, depth, breadth, saturate=True, processes=0, queue=None):
     """
     B is a blackboard.
     modules is a list of modules.
@@ -112,72 +365,240 @@ def split_modules(B, modules, depth, breadth, saturate=True):
     breadth restricts how many splits will be considered at each depth. ie, if depth=1, breadth=3,
      will try the three most promising splits separately. If depth=2, breadth=3, will try the three
      most promising splits determined after each of the three most promising preliminary splits.
+    processes is the number of worker processes used to explore the split candidates at the top
+     level concurrently. If processes <= 1, they are explored one after another. Either way, the
+     candidates are considered in the same order and the same facts are learned.
+    queue is the SplitQueue of B, if there is one already.
     """
     if saturate:
         saturate_modules(B, modules)
     if depth <= 0:
         return B
+    elif queue is None:
+        queue = SplitQueue(B)
+        try:
+            return split_modules(B, modules, depth, breadth, False, processes, queue)
+        finally:
+            queue.release(B)
     else:
+        candidates = queue.get_splits(B, modules, breadth)
+
+        if processes > 1 and len(candidates) > 1:
+            return parallel_split_modules(B, modules, depth, breadth, candidates, processes, queue)
+
         backup_bbds = {}
         backup_modules = {}
-        if breadth <= 0:
-            candidates = get_splits(B, modules)
-        else:
-            candidates = get_splits(B, modules)[:breadth]
+        backup_queues = {}
         for i in range(len(candidates)):
-            can = candidates[i]
-            ti, tj = terms.IVar(can[0]), can[3]*terms.IVar(can[1])
-            comp = can[2]
-
-            backup_bbds[i, comp] = copy.deepcopy(B)
-            backup_modules[i, comp] = copy.deepcopy(modules)
-            gtsplit = False
-            try:
-                newcomp = terms.comp_eval[comp](ti, tj)
-                messages.announce("Case split: assuming {0} at depth {1}".format(newcomp, depth),
-                                  messages.ASSERTION)
-                backup_bbds[i, comp].assert_comparison(newcomp)
-                gtsplit = run_modules(backup_bbds[i, comp], backup_modules[i, comp], 0, 0)
-            except terms.Contradiction:
-                gtsplit = True
-
-            if gtsplit:
+            budget.check()
+            backup_bbds[i] = copy.deepcopy(B)
+            backup_modules[i] = copy.deepcopy(modules)
+            backup_queues[i] = copy.deepcopy(queue)
+            if assume_split(backup_bbds[i], backup_modules[i], candidates[i], depth):
                 #print 'DETERMINED {0} <= {1}'.format(ti, tj)
-                messages.announce("Split led to contradiction at depth {0}. Learned:".format(depth),
-                                  messages.ASSERTION)
-                B.assert_comparison(terms.comp_eval[terms.comp_negate(comp)](ti, tj))
-                return split_modules(B, modules, depth, breadth)
+                learn_split(B, candidates[i], depth)
+                return split_modules(B, modules, depth, breadth, queue=queue)
 
         # at this point, none of the depth-1 splits have returned any useful information.
-        for (i, c) in backup_bbds.keys():
-            messages.announce("Working under depth {4} assumption: t{0} {1} {2} t{3}".format(
-                candidates[i][0], terms.comp_str[candidates[i][2]],
-                candidates[i][3], candidates[i][1], depth), messages.ASSERTION)
+        for i in range(len(candidates)):
+            budget.check()
+            announce_split_assumption("Working under", candidates[i], depth)
             try:
-                split_modules(backup_bbds[i, c], backup_modules[i, c], depth-1, breadth, saturate=False)
+                split_modules(backup_bbds[i], backup_modules[i], depth-1, breadth, saturate=False,
+                              queue=backup_queues[i])
             except terms.Contradiction:
-                messages.announce("Split led to contradiction at depth {0}. Learned:".format(depth),
-                                  messages.ASSERTION)
+                learn_split(B, candidates[i], depth)
+                return split_modules(B, modules, depth, breadth, queue=queue)
+            announce_split_assumption("Ending", candidates[i], depth)
 
-                can = candidates[i]
-                ti, tj = terms.IVar(can[0]), can[3]*terms.IVar(can[1])
-                comp = can[2]
-                B.assert_comparison(terms.comp_eval[terms.comp_negate(comp)](ti, tj))
-                return split_modules(B, modules, depth, breadth)
 
-            messages.announce("Ending depth {4} assumption: t{0} {1} {2} t{3}".format(
-                candidates[i][0], terms.comp_str[candidates[i][2]],
-                candidates[i][3], candidates[i][1], depth), messages.ASSERTION)
+def parallel_split_modules(B, modules, depth, breadth, candidates, processes, queue):
+    """
+    Performs the splits of split_modules on the list of candidates, evaluating the branches
+    concurrently in a pool of processes worker processes. As soon as a branch is refuted, the
+    remaining ones are cancelled, the negation of its assumption is asserted to B, and splitting
+    resumes from B. queue is the SplitQueue of B.
+    """
+    tasks = [(B, modules, can, depth) for can in candidates]
+    k, results = first_refutation(_assume_split_worker, tasks, processes)
+    if k is not None:
+        learn_split(B, candidates[k], depth)
+        return split_modules(B, modules, depth, breadth, processes=processes, queue=queue)
+
+    # at this point, none of the depth-1 splits have returned any useful information.
+    if depth > 1:
+        tasks = [(r[1], r[2], depth-1, breadth, queue) for r in results]
+        k, results = first_refutation(_split_deeper_worker, tasks, processes)
+        if k is not None:
+            learn_split(B, candidates[k], depth)
+            return split_modules(B, modules, depth, breadth, processes=processes, queue=queue)
 
 
-def run_modules(B, modules, depth, breadth):
+def announce_split_assumption(s, can, depth):
+    """
+    Reports the start or end of work under the split assumption can = (i, j, comp, c).
+    """
+    messages.announce("{5} depth {4} assumption: t{0} {1} {2} t{3}".format(
+        can[0], terms.comp_str[can[2]], can[3], can[1], depth, s), messages.ASSERTION)
+
+
+####################################################################################################
+#
+# Conflict-driven split search
+#
+####################################################################################################
+
+default_conflict_budget = 100
+
+
+class SplitFrame(object):
+    """
+    A node of the conflict-driven split search: the blackboard and modules after some sequence of
+    split assumptions, together with the SplitQueue of the blackboard and the split candidates
+    already tried there. The candidates are taken from the queue when they are needed, so that a
+    frame that learns new clauses does not try candidates that have become known.
+    """
+
+    def __init__(self, B, modules, breadth, queue):
+        self.B, self.modules, self.queue = B, modules, queue
+        self.breadth = breadth
+        self.tried = []
+
+    def next_candidate(self):
+        """
+        Returns the most desirable split candidate that has not been tried, or None if there are
+        none left or breadth candidates have been tried.
+        """
+        if self.breadth > 0 and len(self.tried) >= self.breadth:
+            return None
+        for can in self.queue.get_splits(self.B, self.modules):
+            if can not in self.tried:
+                self.tried.append(can)
+                return can
+        return None
+
+    def branch(self):
+        """
+        Returns copies of the blackboard, modules and queue of the frame, to assume a candidate in.
+        """
+        return copy.deepcopy((self.B, self.modules, self.queue))
+
+
+def refutes(B, modules, assumptions):
+    """
+    Returns True if assuming all of the split candidates in assumptions in a copy of B leads to a
+    contradiction, without further splitting. B and modules are not changed.
+    """
+    B, modules = copy.deepcopy(B), copy.deepcopy(modules)
+    try:
+        for can in assumptions:
+            ti, tj = terms.IVar(can[0]), can[3]*terms.IVar(can[1])
+            B.assert_comparison(terms.comp_eval[can[2]](ti, tj))
+    except terms.Contradiction:
+        return True
+    return run_modules(B, modules, 0, 0)
+
+
+def conflict_core(B, modules, assumptions):
+    """
+    assumptions is a list of split candidates that together lead to a contradiction with B.
+    Returns a sublist of assumptions that still does, obtained by dropping the assumptions that
+    are not needed one at a time. The last assumption is always kept.
+    """
+    core = list(assumptions)
+    for can in assumptions[:-1]:
+        rest = [c for c in core if c != can]
+        if refutes(B, modules, rest):
+            core = rest
+    return core
+
+
+def cdcl_split_modules(B, modules, depth, breadth, conflict_budget=default_conflict_budget):
+    """
+    A conflict-driven alternative to split_modules, with the same meaning of depth and breadth.
+    Split assumptions are made one at a time, keeping a trail of the current ones and a frame for
+    the blackboard after each prefix of the trail. When a sequence of assumptions leads to a
+    contradiction, the subset of them that is responsible is found with conflict_core, and the
+    negation of that subset is learned as a clause in B and in the frames that are kept. The
+    search then backjumps to the last assumption of the subset but one: the frames above it are
+    popped, and the frame there, in which the learned clause implies the negation of the last
+    assumption of the subset, carries on with the candidates it has not tried. The assumption
+    that was made in that frame is tried again, since what was learned may refute it now.
+    conflict_budget is the number of conflicts after which the search gives up, by raising
+    BudgetExhausted, since branches may be left unexplored. If it is None, the search runs until
+    every branch is exhausted.
+    Raises Contradiction if B is found to be inconsistent.
+    """
+    saturate_modules(B, modules)
+    if depth <= 0:
+        return B
+
+    queue = SplitQueue(B)
+    try:
+        conflicts = 0
+        trail, frames = [], [SplitFrame(B, modules, breadth, queue)]
+        while True:
+            budget.check()
+            can = frames[-1].next_candidate() if len(trail) < depth else None
+            if can is None:
+                if len(trail) == 0:
+                    return B
+                trail.pop()
+                frames.pop()
+                continue
+
+            newB, new_modules, new_queue = frames[-1].branch()
+            if not assume_split(newB, new_modules, can, len(trail) + 1):
+                trail.append(can)
+                frames.append(SplitFrame(newB, new_modules, breadth, new_queue))
+                continue
+
+            conflicts += 1
+            core = conflict_core(B, modules, trail + [can])
+            messages.announce("Split led to contradiction at depth {0}. Learned:".format(
+                len(trail) + 1), messages.ASSERTION)
+            clause = [split_negation(c) for c in core]
+            if conflict_budget is not None and conflicts >= conflict_budget:
+                B.assert_clause(*clause)
+                saturate_modules(B, modules)
+                raise budget.BudgetExhausted(budget.CONFLICTS, conflict_budget)
+
+            # backjump to the second to last assumption in the core.
+            positions = [k for k in range(len(trail)) if trail[k] in core[:-1]]
+            level = positions[-1] + 1 if len(positions) > 0 else 0
+            if level < len(trail):
+                frames[level].tried.remove(trail[level])
+            del trail[level:], frames[level + 1:]
+            B.assert_clause(*clause)
+            saturate_modules(B, modules)
+            for k in range(1, len(frames)):
+                try:
+                    frames[k].B.assert_clause(*clause)
+                    if k == len(frames) - 1:
+                        saturate_modules(frames[k].B, frames[k].modules)
+                except terms.Contradiction:
+                    # the assumption made in frame k - 1 is refuted, given the clause.
+                    del trail[k - 1:], frames[k:]
+                    break
+    finally:
+        queue.release(B)
+
+
+def run_modules(B, modules, depth, breadth, processes=0, search='dfs',
+                conflict_budget=default_conflict_budget):
     """
     Given a blackboard B, iteratively runs the modules in modules until either a contradiction is
-    found or no new information is learned.
+    found or no new information is learned. processes is as in split_modules.
+    search is 'dfs' to split with split_modules, or 'cdcl' to split with cdcl_split_modules, in
+    which case conflict_budget is passed on.
     Returns True if a contradiction is found, False otherwise.
+    Raises BudgetExhausted if the current Budget or the conflict budget is exhausted first.
     """
     try:
-        split_modules(B, modules, depth, breadth)
+        if search == 'cdcl':
+            cdcl_split_modules(B, modules, depth, breadth, conflict_budget)
+        else:
+            split_modules(B, modules, depth, breadth, processes=processes)
         return False
     except terms.Contradiction as e:
         messages.announce(e.msg+'\n', messages.ASSERTION)
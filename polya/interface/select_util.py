@@ -0,0 +1,128 @@
+####################################################################################################
+#
+# select_util.py
+#
+# Chooses the modules to run on a problem from the kinds of terms it contains.
+#
+# Most modules only act on terms of one kind: the exponential module on exp and log terms, the
+# minimum module on minm terms, and so on. get_features counts the terms of each kind in a
+# blackboard, and select_modules drops the modules that cannot act on any of them, so that a
+# linear problem is left to the additive module alone. Modules that create terms of other kinds,
+# or hand their facts to the axiom module, keep what they need:
+#  -- the exponential module and the axioms for nth roots produce products, so either keeps the
+#     multiplicative module,
+#  -- the exponential module produces nth roots, as in exp(2*x/3) = root_3(exp(x))**2, so it
+#     keeps the nth root module, and
+#  -- the builtins and nth root modules add axioms, so either keeps the axiom module.
+# Axioms can be instantiated to terms of any kind, so a problem with axioms keeps every module.
+# These are counted by num_axioms from the axiom modules themselves, which may have been given
+# axioms directly, and not only through the problem.
+#
+# A linear problem is decided by the additive module without case splits, so select_splits
+# turns them off for it. Otherwise the split settings are left alone.
+#
+####################################################################################################
+
+import polya.main.terms as terms
+import polya.modules.polyhedron.poly_mult_module as poly_mult_module
+import polya.modules.fourier_motzkin.fm_mult_module as fm_mult_module
+import polya.modules.simplex.simplex_mult_module as simplex_mult_module
+import polya.modules.congruence_closure_module as cc_module
+import polya.modules.axiom_module as axiom_module
+import polya.modules.absolute_value_module as abs_module
+import polya.modules.nth_root_module as nth_root_module
+import polya.modules.exponential_module as exp_module
+import polya.modules.minimum_module as min_module
+import polya.modules.builtins_module as builtins_module
+import polya.modules.interval_module as interval_module
+
+
+# the functions with axioms in the builtins module, besides exp, log and abs
+builtin_funcs = ['sin', 'cos', 'tan', 'floor']
+
+feature_names = ['products', 'exp', 'abs', 'min', 'roots', 'builtins', 'functions', 'axioms']
+
+
+def num_axioms(modules):
+    """
+    Returns the number of axioms held by the axiom modules in modules.
+    """
+    return sum(len(m.axioms) for m in modules if isinstance(m, axiom_module.AxiomModule))
+
+
+def get_features(B, num_axioms):
+    """
+    Returns a dictionary counting the terms of B of each kind in feature_names: products and
+    powers, applications of exp and log, abs, minm, nth roots, the functions in builtin_funcs,
+    and other functions. 'axioms' is num_axioms, the number of axioms available to the problem,
+    and 'linear' is True if all these counts are 0.
+    """
+    features = dict((f, 0) for f in feature_names)
+    for i in range(B.num_terms):
+        d = B.term_defs[i]
+        if isinstance(d, terms.MulTerm):
+            features['products'] += 1
+        elif isinstance(d, terms.FuncTerm):
+            if isinstance(d.func, terms.NthRoot):
+                features['roots'] += 1
+            elif d.func_name in ('exp', 'log'):
+                features['exp'] += 1
+            elif d.func_name == 'abs':
+                features['abs'] += 1
+            elif d.func_name == 'minm':
+                features['min'] += 1
+            elif d.func_name in builtin_funcs:
+                features['builtins'] += 1
+            else:
+                features['functions'] += 1
+    features['axioms'] = num_axioms
+    features['linear'] = not any(features[f] for f in feature_names)
+    return features
+
+
+def needed(m, features):
+    """
+    Returns True if the module m can act on a problem with the features.
+    """
+    f = features
+    if f['axioms'] > 0:
+        return True
+    if isinstance(m, cc_module.CongClosureModule):
+        return f['exp'] + f['abs'] + f['min'] + f['roots'] + f['builtins'] + f['functions'] > 0
+    elif isinstance(m, exp_module.ExponentialModule):
+        return f['exp'] > 0
+    elif isinstance(m, abs_module.AbsModule):
+        return f['abs'] > 0
+    elif isinstance(m, min_module.MinimumModule):
+        return f['min'] > 0
+    elif isinstance(m, nth_root_module.NthRootModule):
+        return f['roots'] + f['exp'] > 0
+    elif isinstance(m, builtins_module.BuiltinsModule):
+        return f['exp'] + f['abs'] + f['builtins'] > 0
+    elif isinstance(m, axiom_module.AxiomModule):
+        return f['exp'] + f['abs'] + f['roots'] + f['builtins'] > 0
+    elif isinstance(m, (fm_mult_module.FMMultiplicationModule,
+                        poly_mult_module.PolyMultiplicationModule,
+                        simplex_mult_module.SimplexMultiplicationModule)):
+        return f['products'] + f['exp'] + f['roots'] > 0
+    elif isinstance(m, interval_module.IntervalModule):
+        # without bounds, it only asserts the signs of the arguments of products
+        return m.bounds or f['products'] + f['exp'] + f['roots'] > 0
+    return True
+
+
+def select_modules(modules, features):
+    """
+    Returns the list of the modules in modules that can act on a problem with the features, in
+    the same order.
+    """
+    return [m for m in modules if needed(m, features)]
+
+
+def select_splits(features, split_depth, split_breadth):
+    """
+    Returns the pair (split_depth, split_breadth) to use on a problem with the features.
+    """
+    if features['linear']:
+        return 0, 0
+    return split_depth, split_breadth
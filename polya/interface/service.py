@@ -0,0 +1,296 @@
+####################################################################################################
+#
+# service.py
+#
+# A long-running solver service.
+#
+# The service reads problems, one JSON object per line, from stdin or from connections to a Unix
+# socket, and writes a JSON result line back for each one as soon as it is solved. Problems are
+# solved by a TaskPool of processes forked from the service process, which has already imported
+# and warmed up Polya, so that the cost of starting up is not paid again for each problem.
+#
+# A problem is an object of the form
+#   {"id": 7, "hyps": ["x > 0", "x * y < 1"], "conc": "y < 1 / x",
+#    "solver": "fm", "split_depth": 0, "split_breadth": 0, "timeout": 10}
+# where only hyps is required. Terms are written in Python syntax. Names of variables stand for
+# real variables, exp, log, abs, min, max, floor, ceil, sin, cos, tan and root(n, t) for the
+# built-in functions, and other applied names for uninterpreted functions. Comparisons may be
+# chained, as in "0 < x < 1".
+# The result is an object of the form
+#   {"id": 7, "result": true, "status": "refuted", "time": 0.05}
+# where result is true if the conclusion was proved, or, if there is none, the hypotheses were
+# refuted, and status is as for Solver, or one of "error", "timeout" and "crash".
+#
+# From the command line:
+#   python -m polya.interface.service [-socket PATH] [-j N] [-timeout T] [-solver fm|poly]
+#
+####################################################################################################
+
+import polya.main.terms as terms
+import polya.main.messages as messages
+import polya.interface.solve_util as solve_util
+import polya.interface.batch as batch
+import polya.util.budget as budget
+import fractions
+import operator
+import select
+import signal
+import socket
+import json
+import ast
+import sys
+import os
+
+
+####################################################################################################
+#
+# Parsing
+#
+####################################################################################################
+
+
+functions = {'exp': terms.exp, 'log': terms.log, 'abs': terms.abs_val, 'min': terms.minm,
+             'max': terms.maxm, 'floor': terms.floor, 'ceil': terms.ceil, 'sin': terms.sin,
+             'cos': terms.cos, 'tan': terms.tan, 'root': terms.root}
+
+binary_ops = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+              ast.Div: operator.div, ast.Pow: operator.pow}
+
+comparisons = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt,
+               ast.GtE: operator.ge, ast.Eq: operator.eq, ast.NotEq: operator.ne}
+
+
+class ParseError(Exception):
+    pass
+
+
+def parse_term(node, env):
+    """
+    Converts the expression node of a Python syntax tree to a Term or a number. env maps names to
+    the Vars and Funcs already created, and is extended with new ones.
+    """
+    if isinstance(node, ast.Num):
+        return fractions.Fraction(repr(node.n)) if isinstance(node.n, float) else node.n
+    elif isinstance(node, ast.Name):
+        if node.id not in env:
+            env[node.id] = terms.Var(node.id)
+        return env[node.id]
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        t = parse_term(node.operand, env)
+        return -t if isinstance(node.op, ast.USub) else t
+    elif isinstance(node, ast.BinOp) and type(node.op) in binary_ops:
+        t1, t2 = parse_term(node.left, env), parse_term(node.right, env)
+        if isinstance(node.op, ast.Div) and not isinstance(t2, (terms.Term, terms.STerm)):
+            t2 = fractions.Fraction(t2)
+        return binary_ops[type(node.op)](t1, t2)
+    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        name = node.func.id
+        f = functions.get(name) or env.setdefault(name + '()', terms.Func(name))
+        return f(*[parse_term(a, env) for a in node.args])
+    raise ParseError('Cannot parse {0}.'.format(ast.dump(node)))
+
+
+def parse_comparisons(s, env):
+    """
+    Parses the string s, a possibly chained comparison, into a list of TermComparisons.
+    """
+    try:
+        node = ast.parse(s.strip(), mode='eval').body
+    except SyntaxError:
+        raise ParseError('Cannot parse {0}.'.format(s))
+    if not isinstance(node, ast.Compare) or not all(type(o) in comparisons for o in node.ops):
+        raise ParseError('{0} is not a comparison.'.format(s))
+    ts = [parse_term(node.left, env)] + [parse_term(n, env) for n in node.comparators]
+    return [comparisons[type(o)](t1, t2) for o, t1, t2 in zip(node.ops, ts, ts[1:])]
+
+
+####################################################################################################
+#
+# Solving
+#
+####################################################################################################
+
+
+def solve_problem(problem, solver_type, timeout=None):
+    """
+    Solves problem, a dictionary as described above, with solver_type unless the problem names
+    another. If timeout is not None, the run is given a budget of timeout seconds.
+    Returns a dictionary with the result, status and statistics of the run.
+    """
+    messages.set_verbosity(messages.quiet)
+    env = {}
+    hyps = []
+    for h in problem.get('hyps', []):
+        hyps.extend(parse_comparisons(h, env))
+    conc = None
+    if problem.get('conc'):
+        conc = parse_comparisons(problem['conc'], env)
+        if len(conc) != 1:
+            raise ParseError('The conclusion must be a single comparison.')
+        conc = conc[0]
+
+    S = solve_util.Solver(problem.get('split_depth', 0), problem.get('split_breadth', 0), hyps,
+                          [], [], [], problem.get('solver', solver_type))
+    if timeout is not None:
+        S.set_budget(budget.Budget(time=timeout))
+    r = S.prove(conc) if conc is not None else S.check()
+    return {'result': r, 'status': S.status, 'statistics': S.statistics}
+
+
+def warm_up(solver_type):
+    """
+    Solves a small problem, so that the work done on first use is done before forking workers.
+    """
+    solve_problem({'hyps': ['x > 0', 'x * y < 0', 'y > 0']}, solver_type)
+
+
+####################################################################################################
+#
+# The service
+#
+####################################################################################################
+
+
+class Service(object):
+    """
+    Accepts problems as lines of JSON, solves them in a TaskPool of processes processes, and sends
+    a line of JSON back for each. A problem may set its own timeout, in seconds; otherwise
+    timeout is used. When a problem runs out of time, its budget first ends the run with status
+    'unknown'; if that does not happen within grace seconds, the process is killed.
+    """
+
+    def __init__(self, processes=None, timeout=None, solver_type='fm', grace=1):
+        self.pool = batch.TaskPool(processes)
+        self.timeout, self.solver_type, self.grace = timeout, solver_type, grace
+        self.replies = {}   # maps a task number to (reply function, problem id)
+
+    def submit(self, line, reply):
+        """
+        Starts solving the problem in line, a JSON string. The result will be passed to reply as
+        a JSON string.
+        """
+        try:
+            problem = json.loads(line)
+            if not isinstance(problem, dict):
+                raise ValueError('A problem must be a JSON object.')
+        except ValueError as e:
+            reply(json.dumps({'id': None, 'status': 'error', 'error': str(e)}, sort_keys=True))
+            return
+        timeout = problem.get('timeout', self.timeout)
+        k = self.pool.submit(solve_problem, (problem, self.solver_type, timeout),
+                             None if timeout is None else timeout + self.grace)
+        self.replies[k] = (reply, problem.get('id'))
+
+    def poll(self):
+        """
+        Sends the results of the problems that have been solved.
+        """
+        for k, r in self.pool.poll():
+            reply, pid = self.replies.pop(k)
+            if r['status'] == batch.DONE:
+                result = dict(r['value'])
+                result['id'] = pid
+            else:
+                result = {'id': pid, 'result': False, 'status': r['status']}
+                if r['status'] == batch.ERROR:
+                    result['error'] = r['value']
+            result['time'] = r['time']
+            reply(json.dumps(result, sort_keys=True))
+
+    def serve_stream(self, fin, fout, poll_interval=.01):
+        """
+        Reads problems from the file fin, and writes results to fout, until fin is closed and all
+        problems are solved.
+        """
+        def reply(s):
+            fout.write(s + '\n')
+            fout.flush()
+
+        fd, buf, is_open = fin.fileno(), '', True
+        while is_open or self.pool.busy():
+            if is_open and select.select([fd], [], [], poll_interval)[0]:
+                data = os.read(fd, 65536)
+                if data == '':
+                    is_open = False
+                    data = '\n'
+                buf += data
+                lines = buf.split('\n')
+                buf = lines.pop()
+                for line in lines:
+                    if line.strip():
+                        self.submit(line, reply)
+            elif not is_open:
+                select.select([], [], [], poll_interval)
+            self.poll()
+
+    def serve_socket(self, path, poll_interval=.01):
+        """
+        Listens on a Unix socket at path. Each connection may send any number of problems, and
+        receives their results. A connection is closed once the client has stopped sending and
+        all its results have been sent. Runs until interrupted.
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen(16)
+        clients = {}    # maps a socket to [input buffer, number of pending problems, open]
+
+        def replier(c):
+            def reply(s):
+                clients[c][1] -= 1
+                try:
+                    c.sendall(s + '\n')
+                except socket.error:
+                    pass
+            return reply
+
+        try:
+            while True:
+                readable = select.select([server] + [c for c in clients if clients[c][2]], [], [],
+                                         poll_interval)[0]
+                for c in readable:
+                    if c is server:
+                        conn, addr = server.accept()
+                        clients[conn] = ['', 0, True]
+                        continue
+                    data = c.recv(65536)
+                    if data == '':
+                        clients[c][2] = False
+                        data = '\n'
+                    clients[c][0] += data
+                    lines = clients[c][0].split('\n')
+                    clients[c][0] = lines.pop()
+                    for line in lines:
+                        if line.strip():
+                            clients[c][1] += 1
+                            self.submit(line, replier(c))
+                self.poll()
+                for c in [c for c in clients if not clients[c][2] and clients[c][1] == 0]:
+                    c.close()
+                    del clients[c]
+        finally:
+            self.pool.terminate()
+            server.close()
+            os.remove(path)
+
+
+def main(args):
+    opts = {'-socket': None, '-j': None, '-timeout': None, '-solver': 'fm'}
+    for o in opts:
+        if o in args:
+            opts[o] = args[args.index(o) + 1]
+    processes = int(opts['-j']) if opts['-j'] else None
+    timeout = float(opts['-timeout']) if opts['-timeout'] else None
+    warm_up(opts['-solver'])
+    service = Service(processes, timeout, opts['-solver'])
+    if opts['-socket']:
+        # exit through serve_socket's cleanup when terminated
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        service.serve_socket(opts['-socket'])
+    else:
+        service.serve_stream(sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
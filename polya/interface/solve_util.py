@@ -11,10 +11,14 @@
 #
 ####################################################################################################
 
+import polya.modules.polyhedron.lrs as lrs
+import polya.modules.polyhedron.lrs_polyhedron_util as lrs_util
 import polya.modules.polyhedron.poly_add_module as poly_add_module
 import polya.modules.polyhedron.poly_mult_module as poly_mult_module
 import polya.modules.fourier_motzkin.fm_add_module as fm_add_module
 import polya.modules.fourier_motzkin.fm_mult_module as fm_mult_module
+import polya.modules.simplex.simplex_add_module as simplex_add_module
+import polya.modules.simplex.simplex_mult_module as simplex_mult_module
 import polya.modules.congruence_closure_module as cc_module
 import polya.modules.axiom_module as axiom_module
 import polya.modules.absolute_value_module as abs_module
@@ -22,25 +26,96 @@ import polya.modules.nth_root_module as nth_root_module
 import polya.modules.exponential_module as exp_module
 import polya.modules.minimum_module as min_module
 import polya.modules.builtins_module as builtins_module
+import polya.modules.interval_module as interval_module
 import polya.main.formulas as formulas
 import polya.main.messages as messages
 import polya.main.blackboard as blackboard
 import polya.main.terms as terms
+import polya.util.budget as budget
+import polya.util.timer as timer
 import run_util
+import select_util
+import batch
+import multiprocessing
+import timeit
+import time
+import copy
+import sys
 
 
-def run(B, split_depth, split_breadth, solver_type):
+def default_modules(axioms, solver_type, arithmetic_first=False):
+    """
+    Returns a pair (modules, am), where modules is a list of all the available modules, with the
+    arithmetic modules of solver_type last, or first if arithmetic_first is True, and am is the
+    AxiomModule among them, which holds the list axioms. The interval module runs just before
+    the arithmetic modules.
+    """
+    am = axiom_module.AxiomModule(axioms)
+    modules = [cc_module.CongClosureModule(), exp_module.ExponentialModule(am)]
+    modules.extend([abs_module.AbsModule(am), min_module.MinimumModule(),
+                    nth_root_module.NthRootModule(am),
+                    builtins_module.BuiltinsModule(am), am])
+    if solver_type == 'poly':
+        pa = poly_add_module.PolyAdditionModule()
+        pm = poly_mult_module.PolyMultiplicationModule()
+    elif solver_type == 'fm':
+        pa = fm_add_module.FMAdditionModule()
+        pm = fm_mult_module.FMMultiplicationModule()
+    elif solver_type == 'simplex':
+        pa = simplex_add_module.SimplexAdditionModule()
+        pm = simplex_mult_module.SimplexMultiplicationModule()
+    else:
+        messages.announce(
+            'Unsupported option: {0}'.format(solver_type),
+            messages.INFO)
+        raise Exception
+    im = interval_module.IntervalModule()
+    if arithmetic_first:
+        return [im, pa, pm] + modules, am
+    return modules + [im, pa, pm], am
+
+
+def default_portfolio():
+    """
+    Returns the configurations raced by default in portfolio mode: the 'fm' and 'poly' solver
+    types if lrs, redund and cdd are installed, and 'fm' and 'simplex' if not.
+    """
+    if lrs.get_lrs_path() and lrs.get_redund_path() and lrs_util.get_cdd():
+        return ['fm', 'poly']
+    return ['fm', 'simplex']
+
+
+def run_configuration(B, axioms, config, b):
+    """
+    Runs the modules of the portfolio configuration config on B, with the axioms, within the
+    Budget b. Used in the worker processes of a portfolio.
+    Returns a triple (status, stats, used), where status and stats are as set by
+    Solver.run_modules, and used is the amount of each resource of b used, or {} if b is None.
+    """
+    modules, _ = default_modules(axioms, config['solver_type'], config['arithmetic_first'])
+    s = Solver(config['split_depth'], config['split_breadth'], [], [], [], modules,
+               config['solver_type'], 0, config['split_search'],
+               select_modules=config['select_modules'])
+    s.set_budget(b)
+    s.run_modules(B)
+    return s.status, s.stats, b.statistics() if b is not None else {}
+
+
+def run(B, split_depth, split_breadth, solver_type, split_processes=0, split_search='dfs',
+        portfolio=None, select_modules=False):
     """
     Given a blackboard B, runs the default modules  until either a contradiction is
-    found or no new information is learned.
+    found or no new information is learned. If portfolio is not None, races its configurations,
+    as in Solver. If select_modules is True, only runs the modules that can act on B.
     Returns True if a contradiction is found, False otherwise.
     """
-    s = Solver(split_depth, split_breadth, [], [], [], [], solver_type)
+    s = Solver(split_depth, split_breadth, [], [], [], [], solver_type, split_processes,
+               split_search, portfolio=portfolio, select_modules=select_modules)
     s.B = B
     return s.check()
 
 
-def solve(split_depth, split_breadth, solver_type, *assertions):
+def solve(split_depth, split_breadth, solver_type, *assertions, **kwargs):
     """
     Given TermComparisons assertions, returns True if they are found to be inconsistent,
      false otherwise. Uses geometric methods if available, otherwise FM.
@@ -51,13 +126,17 @@ def solve(split_depth, split_breadth, solver_type, *assertions):
     except terms.Contradiction as e:
         messages.announce(e.msg+'\n', messages.ASSERTION)
         return True
-    return run(B, split_depth, split_breadth, solver_type)
+    return run(B, split_depth, split_breadth, solver_type, kwargs.get('split_processes', 0),
+               kwargs.get('split_search', 'dfs'), kwargs.get('portfolio'),
+               kwargs.get('select_modules', False))
 
 
 class Solver:
 
     def __init__(self, split_depth, split_breadth, assertions, terms, axioms, modules,
-                 default_solver):
+                 default_solver, split_processes=0, split_search='dfs',
+                 conflict_budget=run_util.default_conflict_budget, portfolio=None,
+                 select_modules=False):
         """
         Instantiates a Solver object.
         Arguments:
@@ -66,7 +145,19 @@ class Solver:
          -- assertions: a list of TermComparisons to assert to the new Solver. Defaults to empty.
          -- axioms: a list of Axioms to assert to the Solver's axiom module. Defaults to empty.
          -- modules: a list of modules for the solver to use. Defaults to all available modules.
-         -- default_solver: 'fm' or 'poly' arithmetic.
+         -- default_solver: 'fm', 'poly' or 'simplex' arithmetic.
+         -- split_processes: the number of worker processes used to explore case splits
+           concurrently. If at most 1, splits are explored sequentially.
+         -- split_search: 'dfs' to explore case splits depth first, or 'cdcl' to learn clauses
+           from failed splits and backjump.
+         -- conflict_budget: the number of conflicts after which a 'cdcl' search gives up.
+         -- portfolio: a list of configurations to race against each other, or None. Each is a
+           solver type, or a dictionary with any of the keys 'solver_type', 'split_depth',
+           'split_breadth', 'split_search', 'select_modules' and 'arithmetic_first', which put
+           the arithmetic modules before the others. Missing keys take the values given to the
+           Solver.
+         -- select_modules: if True, each run only uses the modules that can act on the kinds of
+           terms in the problem, and no case splits for linear problems, as in select_util.
         """
         if not isinstance(assertions, list) or not isinstance(axioms, list):
             messages.announce(
@@ -77,27 +168,16 @@ class Solver:
                 messages.INFO)
             raise Exception
 
+        if portfolio is not None and len(modules) > 0:
+            messages.announce(
+                'Error: a portfolio can only be used with the default modules.',
+                messages.INFO)
+            raise Exception
+
         self.B = blackboard.Blackboard()
-        self.fm = None
+        self.axioms = list(axioms)
         if len(modules) == 0:
-            self.fm = axiom_module.AxiomModule(axioms)
-            modules = [cc_module.CongClosureModule(), exp_module.ExponentialModule(self.fm)]
-            modules.extend([abs_module.AbsModule(self.fm), min_module.MinimumModule(),
-                            nth_root_module.NthRootModule(self.fm),
-                            builtins_module.BuiltinsModule(self.fm), self.fm])
-            if default_solver == 'poly':
-                pa = poly_add_module.PolyAdditionModule()
-                pm = poly_mult_module.PolyMultiplicationModule()
-            elif default_solver == 'fm':
-                pa = fm_add_module.FMAdditionModule()
-                pm = fm_mult_module.FMMultiplicationModule()
-            else:
-                messages.announce(
-                    'Unsupported option: {0}'.format(default_solver),
-                    messages.INFO)
-                raise Exception
-
-            modules.extend([pa, pm])
+            modules, self.fm = default_modules(axioms, default_solver)
         else:
             self.fm = next((m for m in modules if isinstance(m, axiom_module.AxiomModule)), None)
             self.fm.add_axioms(axioms)
@@ -107,6 +187,164 @@ class Solver:
         self.assume(*terms)
         self.modules = modules
         self.split_depth, self.split_breadth = split_depth, split_breadth
+        self.split_processes = split_processes
+        self.split_search, self.conflict_budget = split_search, conflict_budget
+        self.solver_type, self.portfolio = default_solver, portfolio
+        self.select_modules = select_modules
+        self.budget = None
+        self.status = None
+        self.stats = timer.Statistics()
+        self.statistics = {}
+
+    def set_budget(self, b):
+        """
+        Bounds the work done by each subsequent call to check or prove.
+        Argument:
+         -- b: a budget.Budget, or None to remove the bounds.
+        """
+        self.budget = b
+
+    def run_modules(self, B):
+        """
+        Runs the modules on B within the Solver's budget, and sets status and statistics.
+        status is 'refuted' if a contradiction is found, 'unknown' if the budget is exhausted
+        first, and 'saturated' otherwise. stats is the timer.Statistics of the run. statistics is
+        its report, with 'status', and, if the Solver has a budget, the amount of each resource
+        used, keyed by name as in budget.Budget.statistics. If select_modules is True, statistics
+        also has 'selection', with the features of B and the modules and split settings chosen
+        for them.
+        Returns True if a contradiction is found, False otherwise.
+        """
+        if self.portfolio is not None:
+            return self.run_portfolio(B)
+        modules, split_depth, split_breadth = self.modules, self.split_depth, self.split_breadth
+        selection = None
+        if self.select_modules:
+            features = select_util.get_features(B, select_util.num_axioms(modules))
+            modules = select_util.select_modules(modules, features)
+            split_depth, split_breadth = select_util.select_splits(features, split_depth,
+                                                                   split_breadth)
+            selection = {'features': features, 'modules': [m.__class__.__name__ for m in modules],
+                         'split_depth': split_depth, 'split_breadth': split_breadth}
+            messages.announce('Selected modules: {0}'.format(', '.join(selection['modules'])),
+                              messages.MODULE)
+        if self.budget is not None:
+            self.budget.reset()
+        self.stats = timer.Statistics()
+        previous = budget.activate(self.budget)
+        previous_stats = timer.activate(self.stats)
+        try:
+            refuted = run_util.run_modules(
+                B, modules, split_depth, split_breadth, self.split_processes,
+                self.split_search, self.conflict_budget
+            )
+            self.status = 'refuted' if refuted else 'saturated'
+        except budget.BudgetExhausted as e:
+            messages.announce(e.msg, messages.ASSERTION)
+            refuted = False
+            self.status = 'unknown'
+        finally:
+            budget.activate(previous)
+            timer.activate(previous_stats)
+            previous_stats.merge(self.stats)
+        self.statistics = self.stats.report()
+        if self.budget is not None:
+            self.statistics.update(self.budget.statistics())
+        self.statistics['status'] = self.status
+        if selection is not None:
+            self.statistics['selection'] = selection
+        return refuted
+
+    def configuration(self, c):
+        """
+        Returns the portfolio configuration c as a dictionary with all its keys, taking missing
+        values from the Solver.
+        """
+        config = {'solver_type': self.solver_type, 'split_depth': self.split_depth,
+                  'split_breadth': self.split_breadth, 'split_search': self.split_search,
+                  'select_modules': self.select_modules, 'arithmetic_first': False}
+        config.update({'solver_type': c} if isinstance(c, basestring) else c)
+        return config
+
+    def run_portfolio(self, B, poll_interval=.005):
+        """
+        Runs each configuration of the portfolio on B in a worker process of its own, each within
+        the Solver's budget, and stops them all as soon as one finds a contradiction.
+        Sets status and statistics as run_modules does, from the run of the winning configuration,
+        if there is one. status is 'saturated' if some configuration finished without finding a
+        contradiction, and 'unknown' otherwise. statistics also has 'winner', the index of the
+        winning configuration or None, and 'portfolio', the outcome of each configuration.
+        The messages printed by the winning configuration, or else the first, are printed.
+        In a daemonic process, such as a worker of a batch, the configurations are run one after
+        another instead.
+        Returns True if a contradiction is found, False otherwise.
+        """
+        configs = [self.configuration(c) for c in self.portfolio]
+        results = [None] * len(configs)
+        winner = None
+        sequential = multiprocessing.current_process().daemon
+        if sequential:
+            # the workers of a batch cannot start processes, so the configurations take turns
+            for k, c in enumerate(configs):
+                t = timeit.default_timer()
+                results[k] = {'status': batch.DONE, 'output': '',
+                              'value': run_configuration(copy.deepcopy(B), self.axioms, c,
+                                                         self.budget),
+                              'time': round(timeit.default_timer() - t, 4)}
+                if results[k]['value'][0] == 'refuted':
+                    winner = k
+                    break
+        else:
+            pool = batch.TaskPool(len(configs))
+            for c in configs:
+                pool.submit(run_configuration, (B, self.axioms, c, self.budget))
+            try:
+                while pool.busy() and winner is None:
+                    for k, r in pool.poll():
+                        results[k] = r
+                        if r['status'] == batch.DONE and r['value'][0] == 'refuted' and \
+                                winner is None:
+                            winner = k
+                    time.sleep(poll_interval)
+            finally:
+                pool.terminate()
+
+        done = [k for k in range(len(configs))
+                if results[k] is not None and results[k]['status'] == batch.DONE]
+        shown = winner if winner is not None else 0
+        if results[shown] is not None:
+            sys.stdout.write(results[shown]['output'])
+        if winner is not None:
+            self.status = 'refuted'
+        elif any(results[k]['value'][0] == 'saturated' for k in done):
+            self.status = 'saturated'
+        else:
+            self.status = 'unknown'
+        self.stats = results[shown]['value'][1] if shown in done else timer.Statistics()
+        self.stats.count('portfolio_configurations', len(configs))
+        if sequential:
+            # the runs of the configurations were already added to the current statistics
+            timer.count('portfolio_configurations', len(configs))
+        else:
+            timer.current.merge(self.stats)
+        self.statistics = self.stats.report()
+        if shown in done:
+            self.statistics.update(results[shown]['value'][2])
+        self.statistics['status'] = self.status
+        self.statistics['winner'] = winner
+        self.statistics['portfolio'] = [
+            {'configuration': c,
+             'status': r['value'][0] if r is not None and r['status'] == batch.DONE else
+             (r['status'] if r is not None else 'cancelled'),
+             'time': r['time'] if r is not None else None}
+            for c, r in zip(configs, results)]
+        return winner is not None
+
+    def statistics_json(self):
+        """
+        Returns the statistics of the last call to check or prove as a JSON string.
+        """
+        return self.stats.to_json()
 
     def set_modules(self, modules):
         self.modules = modules
@@ -127,23 +365,25 @@ class Solver:
     def check(self):
         """
         Searches for a contradiction in what has been asserted to the solver.
-        Returns True if a contradiction is found, false otherwise.
+        Returns True if a contradiction is found, false otherwise. If the search was cut off by the
+        budget, status is set to 'unknown'.
         """
         if self.contradiction:
+            self.status = 'refuted'
             return True
-        self.contradiction = run_util.run_modules(
-            self.B, self.modules, self.split_depth, self.split_breadth
-        )
+        self.contradiction = self.run_modules(self.B)
         return self.contradiction
 
     def prove(self, claim):
         """
         Tries to establish the truth of TermComparison claim from what is already known.
-        Returns true if claim follows from the current blackboard, false otherwise.
+        Returns true if claim follows from the current blackboard, false otherwise. If the search
+        was cut off by the budget, status is set to 'unknown'.
         Argument:
          -- claim: a TermComparison, ie 3*x > 2*y**2
         """
         if self.contradiction:
+            self.status = 'refuted'
             return True
 
         a = terms.TermComparison(claim.term1, terms.comp_negate(claim.comp), claim.term2)
@@ -152,9 +392,10 @@ class Solver:
         except terms.Contradiction as e:
             messages.announce(e.msg+'\n', messages.ASSERTION)
             self.contradiction = True
+            self.status = 'refuted'
             return True
         else:
-            return run_util.run_modules(B, self.modules, self.split_depth, self.split_breadth)
+            return self.run_modules(B)
 
     def _assert_comparison(self, c):
         """
@@ -192,6 +433,7 @@ class Solver:
         """
         Adds an axiom to the solver, and instantiates a AxiomModule if necessary.
         """
+        self.axioms.append(a)
         if self.fm:
             self.fm.add_axiom(a)
         else:
@@ -0,0 +1,134 @@
+####################################################################################################
+#
+# test_run_util.py
+#
+# Checks that incremental saturation, where each module is passed the new information since its
+# last run, reaches the same blackboard as recomputing from the full blackboard every time, and
+# that a SplitQueue, which only updates the weights of the candidates that have changed, orders
+# the split candidates as get_splits does, and that the conflict-driven split search proves the
+# sample problems that need case splits, and reports running out of its conflict budget.
+#
+# Run with: python -m unittest discover -s polya -p 'test_*.py'
+#
+####################################################################################################
+
+import polya.main.messages as messages
+import polya.main.terms as terms
+import polya.main.main as main
+import polya.interface.run_util as run_util
+import unittest
+import copy
+import imp
+import os
+
+sample_problems = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               '..', '..', 'examples', 'sample_problems.py')
+
+
+def facts(B):
+    """
+    Returns the terms and the comparisons stored in B, in a form that can be compared between
+    blackboards.
+    """
+    return (sorted(str(B.term_defs[i]) for i in range(B.num_terms)),
+            sorted((p, sorted((hp.a, hp.b, hp.strong) for hp in hps))
+                   for p, hps in B.inequalities.items()),
+            sorted(B.equalities.items()), sorted(B.zero_inequalities.items()),
+            sorted(B.zero_equalities), sorted(B.zero_disequalities),
+            sorted((p, sorted(cs)) for p, cs in B.disequalities.items()))
+
+
+def saturate(e, incremental, negate_conclusion):
+    """
+    Saturates the blackboard of the Example e, with the negation of its conclusion if
+    negate_conclusion is True, using fresh copies of its modules.
+    Returns the facts of the saturated blackboard, or None if a contradiction is found.
+    """
+    S = e.make_solver()
+    B, modules = S.B, copy.deepcopy(S.modules)
+    try:
+        if negate_conclusion and e.conc:
+            B.assert_comparison(terms.TermComparison(e.conc.term1, terms.comp_negate(e.conc.comp),
+                                                     e.conc.term2))
+        run_util.saturate_modules(B, modules, incremental)
+    except terms.Contradiction:
+        return None
+    return facts(B)
+
+
+class IncrementalSaturationTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+        self.examples = imp.load_source('sample_problems', sample_problems).examples
+
+    def test_sample_problems(self):
+        for k, e in enumerate(self.examples):
+            if e.omit:
+                continue
+            for negate_conclusion in (False, True):
+                self.assertEqual(saturate(e, True, negate_conclusion),
+                                 saturate(e, False, negate_conclusion),
+                                 'example {0}'.format(k))
+
+
+
+class SplitQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+        self.examples = imp.load_source('sample_problems', sample_problems).examples
+
+    def test_sample_problems(self):
+        for k, e in enumerate(self.examples):
+            if e.omit:
+                continue
+            S = e.make_solver()
+            B, modules = S.B, copy.deepcopy(S.modules)
+            queue = run_util.SplitQueue(B)
+            try:
+                run_util.saturate_modules(B, modules)
+                # rule out the last candidate each time, to reach positions that the splits of the
+                # solver do not
+                for depth in range(3):
+                    candidates = queue.get_splits(B, modules)
+                    self.assertEqual(candidates, run_util.get_splits(B, modules),
+                                     'example {0}'.format(k))
+                    self.assertEqual(queue.weights, run_util.get_split_weights(B, modules),
+                                     'example {0}'.format(k))
+                    if len(candidates) == 0:
+                        break
+                    B.assert_comparison(run_util.split_negation(candidates[-1]))
+                    run_util.saturate_modules(B, modules)
+            except terms.Contradiction:
+                pass
+
+
+
+class CdclSplitTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+        self.examples = imp.load_source('sample_problems', sample_problems).examples
+
+    def test_sample_problems(self):
+        for k, e in enumerate(self.examples):
+            if e.omit or e.split_depth <= 0:
+                continue
+            S = e.make_solver()
+            S.split_search = 'cdcl'
+            self.assertTrue(e.run(S), 'example {0}'.format(k))
+
+    def test_conflict_budget(self):
+        # the hypotheses are consistent, and the search meets a conflict before saturating
+        x, y, z = terms.Var('x'), terms.Var('y'), terms.Var('z')
+        for conflict_budget, status in ((None, 'saturated'), (1, 'unknown')):
+            S = main.Solver(assertions=[x * y * z > 0, x + y < 0, x * z > y], split_depth=3,
+                            split_breadth=10, split_search='cdcl')
+            S.conflict_budget = conflict_budget
+            self.assertFalse(S.check())
+            self.assertEqual(S.status, status)
+
+
+if __name__ == '__main__':
+    unittest.main()
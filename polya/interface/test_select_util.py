@@ -0,0 +1,61 @@
+####################################################################################################
+#
+# test_select_util.py
+#
+# Checks that module selection keeps the modules needed by axioms held by an axiom module, whether
+# the axioms are given to the Solver or to the module itself, so that selection does not lose a
+# proof that the full list of modules finds.
+#
+# Run with: python -m unittest discover -s polya -p 'test_*.py'
+#
+####################################################################################################
+
+import polya.main.messages as messages
+import polya.main.terms as terms
+import polya.main.formulas as formulas
+from polya.modules import congruence_closure_module as cc_module
+from polya.modules import axiom_module
+from polya.modules.fourier_motzkin import fm_add_module
+from polya.modules.fourier_motzkin import fm_mult_module
+import polya.main.main as main
+import polya.interface.select_util as select_util
+import unittest
+import imp
+import os
+
+sample_problems = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               '..', '..', 'examples', 'sample_problems.py')
+
+
+class SelectModulesTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+
+    def solver(self, select_modules):
+        x, y, f = terms.Var('x'), terms.Var('y'), terms.Func('f')
+        modules = [cc_module.CongClosureModule(),
+                   axiom_module.AxiomModule([formulas.Forall([x], f(x) > 0)]),
+                   fm_add_module.FMAdditionModule(), fm_mult_module.FMMultiplicationModule()]
+        return main.Solver(assertions=[y > 0], modules=modules,
+                           select_modules=select_modules), f(y) > 0
+
+    def test_module_axioms(self):
+        S, conc = self.solver(True)
+        self.assertEqual(select_util.num_axioms(S.modules), 1)
+        self.assertTrue(S.prove(conc))
+        self.assertEqual(S.statistics['selection']['features']['axioms'], 1)
+        S, conc = self.solver(False)
+        self.assertTrue(S.prove(conc))
+
+    def test_sample_problems_with_modules(self):
+        examples = imp.load_source('sample_problems', sample_problems).examples
+        for k, e in enumerate(examples):
+            if e.omit or not e.modules:
+                continue
+            e.set_module_selection(True)
+            self.assertTrue(e.run(e.make_solver()), 'example {0}'.format(k))
+
+
+if __name__ == '__main__':
+    unittest.main()
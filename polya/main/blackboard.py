@@ -27,12 +27,36 @@
 #  * All known comparisons with zero are stored in zero_inequalities, zero_disequalities,
 #    and zero_equalities.
 #  * All known equalities between terms are stored in term_equalities.
-#  * The two most relevant comparisons between t_i and t_j are stored in inequalities.
-#    If one of these comparisons is an inequality with 0, it is duplicated here. If equality is
-#    known between t_i and t_j, this is NOT stored here.
+#  * The two most relevant comparisons between t_i and t_j are stored in inequalities, but only
+#    for pairs about which something other than the signs of t_i and t_j is known. Once such a
+#    pair is stored, comparisons with 0 are duplicated in its entry; for other pairs, they are
+#    combined from zero_inequalities when needed, by pair_halfplanes. If equality is known between
+#    t_i and t_j, this is NOT stored here.
 #  * All non-redundant disequalities between t_i and t_j are stored in disequalities. Anything that
 #    is implied by known equality or inequality information is removed from this table.
 #
+# The answers of implies are cached. Each index and pair of indices has a version number, which
+# is increased whenever the information stored about it changes, and a cached answer about t_i and
+# t_j is used only while the versions of i, j and (i, j) are those it was computed with.
+#
+# Modules that assert many comparisons at once can do so in a batch:
+#   with B.batch():
+#       for c in learned:
+#           B.assert_comparison(c)
+# Within a batch, comparisons are stored as usual, but the clauses are not updated and the
+# Trackers are not told about the changes. When the batch ends, each clause mentioning a changed
+# index is updated once, unit clauses are asserted, and the Trackers receive all the changes.
+#
+# The terms are divided into components: ti and tj are in the same component if one occurs in the
+# additive or multiplicative definition of the other, or if a comparison or equality between them
+# is stored. t0 is not linked to anything, since it occurs everywhere as the constant one; instead,
+# it is included in every component. The additive and multiplicative systems of different
+# components share no terms except t0, so the arithmetic modules can solve them one at a time.
+# Since t0 is shared, the additive problems are still linked through the comparisons of terms
+# with constants: from ti > 3 and tj < 2, it follows that 2 * ti > 3 * tj. After solving the
+# components, the additive modules assert these comparisons, as returned by
+# component_comparisons. The multiplicative problems are not linked this way, since constants
+# occur in them as coefficients and not as t0.
 #
 ####################################################################################################
 
@@ -42,12 +66,30 @@ import polya.main.terms as terms
 import polya.main.messages as messages
 import polya.util.geometry as geometry
 import polya.util.mul_util as mul_util
+import polya.util.timer as timer
+import contextlib
+import fractions
+import itertools
 
 
 class Error(Exception):
     pass
 
 
+def new_info_indices(delta):
+    """
+    Takes a set of indices i and pairs of indices (i, j), as returned by get_new_info.
+    Returns the set of all indices occurring in delta.
+    """
+    inds = set()
+    for k in delta:
+        if isinstance(k, tuple):
+            inds.update(k)
+        else:
+            inds.add(k)
+    return inds
+
+
 ####################################################################################################
 #
 # Blackboard
@@ -66,6 +108,7 @@ class Tracker(object):
         self.m_index = 0
         self.updates = {}
         self.bb = bb
+        self.held = None  # while updates are held, the set of keys updated
 
     def has_new_info(self, module):
         if module in self.updates:
@@ -81,7 +124,8 @@ class Tracker(object):
         else:
             s = set(self.bb.inequalities.keys() + self.bb.disequalities.keys()
                     + self.bb.equalities.keys() + self.bb.zero_inequalities.keys()
-                    + list(self.bb.zero_equalities.union(self.bb.zero_disequalities)))
+                    + list(self.bb.zero_equalities.union(self.bb.zero_disequalities))
+                    + range(self.bb.num_terms))
             self.updates[module] = set()
             return s
 
@@ -89,10 +133,33 @@ class Tracker(object):
         self.m_index += 1
         return self.m_index - 1
 
+    def release(self, module):
+        self.updates.pop(module, None)
+
     def update(self, key):
+        if self.held is not None:
+            self.held.add(key)
+            return
         for k in self.updates:
             self.updates[k].add(key)
 
+    def hold(self):
+        """
+        Collects the keys passed to update, without passing them on to the modules, until
+        release_held is called.
+        """
+        if self.held is None:
+            self.held = set()
+
+    def release_held(self):
+        """
+        Passes the keys collected since hold was called on to the modules.
+        """
+        held, self.held = self.held, None
+        if held:
+            for k in self.updates:
+                self.updates[k].update(held)
+
 
 class Blackboard(object):
 
@@ -103,10 +170,13 @@ class Blackboard(object):
         self.term_defs = {0: terms.one}       # maps each index to its definition
         self.terms = {0: terms.one}           # maps each index to its fully expanded term
         self.term_names = {terms.one.key: 0}      # reverse lookup: maps a term to is defining index
+        self.mul_args = set()                 # indices occurring as arguments of a MulTerm
 
         # comparisons between named subterms
         self.inequalities = {}  # Dictionary mapping (i, j) to a list of Halfplanes [h1, h2],
                                 # such that h2 is cw of h1
+        self.partners = {}  # Dictionary mapping i to the set of j such that (i, j) or (j, i)
+                            # is a key of inequalities
         self.zero_inequalities = {0: terms.GT}  # Dictionary mapping i to comp
         self.equalities = {}  # Dictionary mapping (i, j) to coeff
         self.zero_equalities = set([])  # Set of IVar indices equal to 0
@@ -118,6 +188,144 @@ class Blackboard(object):
 
         self.tracker = Tracker(self)
 
+        # the cache for implies
+        self.versions = {}       # maps an index or pair of indices to its version number
+        self.clause_version = 0  # increased whenever the clauses change
+        self.implies_cache = {}  # maps (i, comp, coeff, j) to (answer, versions, clause_version)
+        self.used_clauses = False
+
+        # components of the terms, as a union-find structure
+        self.component_parent = {}  # maps an index to an index in the same component; the
+                                    # smallest index of each component is not a key
+
+        # batches of assertions
+        self.batch_depth = 0
+        self.batch_changes = set()  # indices whose clauses are to be updated when the batch ends
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        A context manager, within which the updating of clauses and Trackers is deferred until
+        the end of the outermost batch. If the batch ends with an exception, the Trackers are
+        updated, but the clauses are not.
+        """
+        if self.batch_depth == 0:
+            self.tracker.hold()
+        self.batch_depth += 1
+        completed = False
+        try:
+            yield self
+            completed = True
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.end_batch(completed)
+
+    def end_batch(self, update_clauses=True):
+        """
+        Performs the updates deferred during a batch.
+        """
+        changes, self.batch_changes = self.batch_changes, set()
+        self.tracker.release_held()
+        if not update_clauses or not changes or not self.clauses:
+            return
+        for c in self.clauses:
+            if any(i in changes for i in c.zero_comparisons) or \
+                    any(i in changes or j in changes for (i, j) in c.comparisons):
+                c.update(self)
+        timer.count('clause_scans')
+        self.propagate_clauses()
+
+    def touch(self, *keys):
+        """
+        Records that the information stored about each index or pair of indices in keys has
+        changed, so that cached answers depending on it are no longer used.
+        """
+        for k in keys:
+            self.versions[k] = self.versions.get(k, 0) + 1
+
+    def component_of(self, i):
+        """
+        Returns the smallest index in the component of ti.
+        """
+        parent = self.component_parent
+        root = i
+        while root in parent:
+            root = parent[root]
+        while i != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def join(self, i, j):
+        """
+        Merges the components of ti and tj, unless one of them is t0.
+        """
+        if i == 0 or j == 0:
+            return
+        ri, rj = self.component_of(i), self.component_of(j)
+        if ri != rj:
+            self.component_parent[max(ri, rj)] = min(ri, rj)
+
+    def components(self):
+        """
+        Returns the components of the terms, as a list of sorted lists of indices, each beginning
+        with 0. The components are ordered by their smallest nonzero index.
+        """
+        groups = {}
+        for i in range(1, self.num_terms):
+            groups.setdefault(self.component_of(i), [0]).append(i)
+        return [groups[r] for r in sorted(groups)] or [[0]]
+
+    def split_by_component(self, facts, indices):
+        """
+        Takes a list of facts, and a function mapping each fact to the indices occurring in it,
+        which must all be in the same component or 0.
+        Returns a list of pairs (component, facts), one for each component of components, with
+        the facts about terms in it. Facts about t0 alone are included in every component.
+        """
+        comps = self.components()
+        parts = dict((self.component_of(c[-1]), []) for c in comps)
+        common = []
+        for f in facts:
+            i = next((i for i in indices(f) if i != 0), None)
+            if i is None:
+                common.append(f)
+            else:
+                parts[self.component_of(i)].append(f)
+        return [(c, parts[self.component_of(c[-1])] + common) for c in comps]
+
+    def component_comparisons(self, pairs=None):
+        """
+        Returns the comparisons between terms of different components that follow from their
+        comparisons with t0, by eliminating t0, as a list of TermComparisons. If pairs is given,
+        only the comparisons between ti and tj with (i, j) in pairs, and i < j, are returned.
+        """
+        bounds = {}  # maps j to a list of triples (s, b, comp), each s * t0 + b * tj comp 0
+        for (i, j, s, b, strong) in self.get_numeric_inequalities():
+            if i == 0 and b != 0:
+                bounds.setdefault(j, []).append((s, b, terms.GT if strong else terms.GE))
+        for (i, j, s, b) in self.get_numeric_equalities():
+            if i == 0 and b != 0:
+                bounds.setdefault(j, []).extend([(s, b, terms.EQ), (-s, -b, terms.EQ)])
+
+        def combine(c1, c2):
+            # the comparison of the sum of x c1 0 and y c2 0 with 0
+            if c1 == terms.EQ or c2 == terms.EQ:
+                return c2 if c1 == terms.EQ else c1
+            return terms.GT if terms.GT in (c1, c2) else terms.GE
+
+        comparisons = []
+        for i, j in itertools.combinations(sorted(bounds), 2):
+            if self.component_of(i) == self.component_of(j) or (pairs is not None and
+                                                                 (i, j) not in pairs):
+                continue
+            for (s1, b1, c1), (s2, b2, c2) in itertools.product(bounds[i], bounds[j]):
+                if s1 == -s2:
+                    # b1 * ti + b2 * tj comp 0
+                    comparisons.append(terms.comp_eval[combine(c1, c2)](
+                        terms.STerm(b1, terms.IVar(i)), terms.STerm(-b2, terms.IVar(j))))
+        return comparisons
+
     def has_name(self, term):
         """
         Takes a Term.
@@ -166,16 +374,19 @@ class Blackboard(object):
                 raise Error('cannot create name for {0!s}'.format(t))
             i = self.num_terms  # index of the new term
             self.term_defs[i] = new_def
+            if isinstance(new_def, terms.MulTerm):
+                self.mul_args.update(a.term.index for a in new_def.args)
             self.terms[i] = t
             self.term_names[t.key] = i
             self.num_terms += 1
+            if isinstance(new_def, (terms.AddTerm, terms.MulTerm)):
+                for a in new_def.args:
+                    self.join(i, a.term.index)
             if messages.visible(messages.DEF):
                 messages.announce_strong('Defining t{0!s} := {1!s}'.format(i, new_def))
             if messages.visible(messages.DEF_FULL):
                 messages.announce_strong('  := {1!s}'.format(i, t))
-            for j in self.zero_inequalities:
-                hp = geometry.halfplane_of_comp(self.zero_inequalities[j], 0)
-                self.inequalities[j, i] = [hp]
+            self.tracker.update(i)
             return terms.IVar(i)
 
     def add_term(self, t):
@@ -206,6 +417,12 @@ class Blackboard(object):
         """
         return self.tracker.identify()
 
+    def release(self, module):
+        """
+        Stops tracking new information for the identifier module.
+        """
+        self.tracker.release(module)
+
     def get_inequalities(self):
         """
         Returns a list of comparisons t_i <> c*t_j or t_i <> 0.
@@ -241,18 +458,69 @@ class Blackboard(object):
                 disequalities.append(terms.IVar(p[0]) != coeff * terms.IVar(p[1]))
         return disequalities
 
+    def get_numeric_inequalities(self):
+        """
+        Returns the comparisons of get_inequalities as a list of tuples (i, j, a, b, strong), each
+        representing a * ti + b * tj > 0 if strong, and a * ti + b * tj >= 0 otherwise. a is always
+        1 or -1. Comparisons ti <> 0 are represented with j = 0 and b = 0.
+        """
+        inequalities = []
+        for i in self.zero_inequalities:
+            comp = self.zero_inequalities[i]
+            inequalities.append((i, 0, (1 if comp in [terms.GE, terms.GT] else -1), 0,
+                                 comp in [terms.GT, terms.LT]))
+        for (i, j) in self.inequalities:
+            for hp in self.inequalities[i, j]:
+                if hp.a != 0 and hp.b != 0:
+                    # hp is the set of points (x, y) with hp.a * y - hp.b * x > 0
+                    s = 1 if hp.b < 0 else -1
+                    inequalities.append((i, j, s, fractions.Fraction(hp.a, -s * hp.b), hp.strong))
+        return inequalities
+
+    def get_numeric_equalities(self):
+        """
+        Returns the equalities of get_equalities as a list of tuples (i, j, a, b), each
+        representing a * ti + b * tj = 0. Equalities ti = 0 are represented with j = 0 and b = 0.
+        """
+        equalities = [(i, 0, 1, 0) for i in self.zero_equalities]
+        for (i, j) in self.equalities:
+            equalities.append((i, j, 1, -self.equalities[i, j]))
+        return equalities
+
+    def get_numeric_definitions(self):
+        """
+        Returns the definitions ti = c1 * tj1 + ... + cn * tjn of the additive terms, as a list of
+        pairs (i, [(c1, j1), ..., (cn, jn)]), ordered by i.
+        """
+        return [(i, [(a.coeff, a.term.index) for a in self.term_defs[i].args])
+                for i in range(self.num_terms) if isinstance(self.term_defs[i], terms.AddTerm)]
+
     def update_clause(self, *p):
         """
         p is either a singleton (i) or a pair (i, j).
         Updates any clauses that have literals containing either t_i or t_i and t_j.
+        Within a batch, the update is deferred until the batch ends.
         """
+        if self.batch_depth > 0:
+            self.batch_changes.update(p)
+            return
+        if self.clauses:
+            timer.count('clause_scans')
         for c in self.clauses:
             if len(p) == 1:
                 c.update_on_index(p[0], self)
             else:
                 c.update_on_indices(p[0], p[1], self)
+        self.propagate_clauses()
 
-        self.clauses = set(c for c in self.clauses if not c.satisfied)
+    def propagate_clauses(self):
+        """
+        Removes the satisfied clauses, raises a contradiction if a clause has become empty, and
+        asserts the clauses that have a single literal left.
+        """
+        if self.clauses:
+            self.clauses = set(c for c in self.clauses if not c.satisfied)
+            self.clause_version += 1
 
         empty, unit = None, []
         for c in self.clauses:
@@ -266,10 +534,12 @@ class Blackboard(object):
 
         if empty is not None:
             messages.announce('Contradiction from clause.', messages.DEBUG)
-            self.raise_contradiction(100, terms.EQ, 100, 100)
+            self.raise_contradiction(0, terms.EQ, 0, 0)
         else:  # do these separately, so that learning from one won't recurse to the others.
             for c in unit:
                 self.clauses.remove(c)
+            if unit:
+                self.clause_version += 1
 
             for c in unit:
                 tc = c.first()
@@ -278,6 +548,32 @@ class Blackboard(object):
     def implies(self, i, comp, coeff, j):
         """
         Checks to see if the statement ti comp coeff * tj is known by the Blackboard.
+        The answer is cached until the information about ti, tj, or the pair changes, or, if the
+        answer depended on the clauses, until they change. Hits and misses are counted in the
+        current statistics as implies_hits and implies_misses.
+        """
+        key = (i, comp, coeff, j)
+        versions = (self.versions.get(i, 0), self.versions.get(j, 0),
+                    self.versions.get((i, j), 0))
+        entry = self.implies_cache.get(key)
+        if entry is not None and entry[1] == versions and \
+                (entry[2] is None or entry[2] == self.clause_version):
+            timer.count('implies_hits')
+            if entry[2] is not None:
+                self.used_clauses = True
+            return entry[0]
+
+        timer.count('implies_misses')
+        used_clauses, self.used_clauses = self.used_clauses, False
+        answer = self.compute_implies(i, comp, coeff, j)
+        self.implies_cache[key] = (answer, versions,
+                                   self.clause_version if self.used_clauses else None)
+        self.used_clauses = used_clauses or self.used_clauses
+        return answer
+
+    def compute_implies(self, i, comp, coeff, j):
+        """
+        Computes the answer of implies, without the cache.
         """
         #print 'checking if t{0} {1} {2} t{3}'.format(i, terms.comp_str[comp], coeff, j)
         if coeff == 0:
@@ -329,7 +625,7 @@ class Blackboard(object):
             else:
 
                 new_comp = geometry.halfplane_of_comp(comp, coeff)
-                old_comps = self.inequalities.get((i, j), [])
+                old_comps = self.pair_halfplanes(i, j)
 
                 for c in [d for d in old_comps if d.eq_dir(new_comp)]:
                     if c.strong or not new_comp.strong:
@@ -418,6 +714,7 @@ class Blackboard(object):
             return False
 
     def has_clause(self, *literals):
+        self.used_clauses = True
         disjunctions = []
         for l in literals:
             tc = l.canonize()
@@ -452,6 +749,7 @@ class Blackboard(object):
         elif self.implies(term1.index, terms.comp_negate(comp), coeff, term2.index):
             self.raise_contradiction(term1.index, comp, coeff, term2.index)
 
+        timer.record_fact()
         if comp in (terms.GE, terms.GT, terms.LE, terms.LT):
             if coeff == 0:
                 self.assert_zero_inequality(term1.index, comp)
@@ -497,7 +795,7 @@ class Blackboard(object):
         self.announce_comparison(i, comp, coeff, j)
         self.tracker.update((i, j))
 
-        old_comps = self.inequalities.get((i, j), [])
+        old_comps = self.pair_halfplanes(i, j)
         new_comp = geometry.halfplane_of_comp(comp, coeff)
 
 
@@ -511,6 +809,7 @@ class Blackboard(object):
             if c.eq_dir(new_comp):
                 if new_comp.strong and not c.strong:
                     c.strong = True
+                    self.touch((i, j))
                     return
                 else:
                     # shouldn't get here
@@ -577,16 +876,19 @@ class Blackboard(object):
                 new_comps = [old_comps[0], new_comp]
             if new_comps[0].compare_hp(new_comps[1]) == 0:  # we have equality
                 del self.inequalities[i, j]
+                self.touch((i, j))
                 self.assert_equality(i, coeff, j)
                 return None
 
-        self.inequalities[i, j] = new_comps
+        self.store_halfplanes((i, j), new_comps)
 
         if (i, j) in self.disequalities:
             diseqs = self.disequalities.pop((i, j))
+            self.touch((i, j))
             n_diseqs = set(k for k in diseqs if not self.implies(i, terms.NE, k, j))
             if len(n_diseqs) > 0:
                 self.disequalities[i, j] = n_diseqs
+                self.touch((i, j))
 
         self.update_clause(i, j)
 
@@ -602,6 +904,7 @@ class Blackboard(object):
                       if not terms.comp_eval[c](k, 0))
             if len(des) > 0:
                 self.disequalities[0, i] = des
+            self.touch(i, (0, i))
 
         self.announce_zero_comparison(i, comp)
         self.tracker.update(i)
@@ -611,14 +914,20 @@ class Blackboard(object):
             if self.zero_inequalities[i] in [terms.LE, terms.GE] and comp in [terms.LE, terms.GE]:
                 # learn equality
                 del self.zero_inequalities[i]
+                self.touch(i)
                 self.assert_zero_equality(i)
                 return
 
         self.zero_inequalities[i] = comp
+        self.touch(i)
         new_zero_ineqs = []
-        for j in (j for j in range(self.num_terms) if j != i):
+        # Pairs that are not stored hold no information beyond the signs, so this cannot add
+        # to what they imply.
+        for j in sorted(self.partners.get(i, ())):
             p = (i, j) if i < j else (j, i)
-            old_comps = self.inequalities.get(p, [])
+            if p not in self.inequalities:
+                continue
+            old_comps = self.inequalities[p]
             if i < j:
                 new_comp = geometry.halfplane_of_comp(comp, 0)
             else:
@@ -630,6 +939,7 @@ class Blackboard(object):
                     c.strong = True
                     cont = True
             if cont:
+                self.touch(p)
                 continue
 
             if len(old_comps) == 0:
@@ -648,7 +958,7 @@ class Blackboard(object):
                     new_comps = [old_comps[0], new_comp]
                 else:
                     new_comps = old_comps
-            self.inequalities[p] = new_comps
+            self.store_halfplanes(p, new_comps)
             self.tracker.update(p)
 
             if self.sign(j) == 0 and len(self.inequalities[p]) == 2:
@@ -671,16 +981,52 @@ class Blackboard(object):
 
         self.update_clause(i)
 
+    def pair_halfplanes(self, i, j):
+        """
+        Assumes i < j.
+        Returns the list of at most two Halfplanes between ti and tj, in the form stored in
+        inequalities. If the pair is not stored, the list is built from the signs of ti and tj,
+        as assert_zero_inequality would have stored them; it is then a new list, which the caller
+        may pass to store_halfplanes.
+        """
+        if (i, j) in self.inequalities or i > j:
+            return self.inequalities.get((i, j), [])
+        hps = []
+        if i in self.zero_inequalities:
+            hps.append(geometry.halfplane_of_comp(self.zero_inequalities[i], 0))
+        if j in self.zero_inequalities:
+            comp = self.zero_inequalities[j]
+            new_hp = geometry.Halfplane((1 if comp in [terms.GE, terms.GT] else -1), 0,
+                                        (True if comp in [terms.LT, terms.GT] else False))
+            if len(hps) == 1 and hps[0].compare_hp(new_hp) > 0:
+                hps.insert(0, new_hp)
+            else:
+                hps.append(new_hp)
+        return hps
+
+    def store_halfplanes(self, p, hps):
+        """
+        Stores the list of Halfplanes hps for the pair of indices p.
+        """
+        i, j = p
+        self.inequalities[p] = hps
+        self.partners.setdefault(i, set()).add(j)
+        self.partners.setdefault(j, set()).add(i)
+        self.join(i, j)
+        self.touch(p)
+
     def assert_equality(self, i, coeff, j):
         """
         Adds the equality "ti = coeff * tj"
         This should never be called directly; rather, assert_comparison should be used.
         """
         self.equalities[i, j] = coeff
+        self.join(i, j)
         if (i, j) in self.inequalities:
             self.inequalities.pop(i, j)
         if (i, j) in self.disequalities:
             self.disequalities.pop(i, j)
+        self.touch((i, j))
         self.announce_comparison(i, terms.EQ, coeff, j)
         self.tracker.update((i, j))
         self.update_clause(i, j)
@@ -693,6 +1039,7 @@ class Blackboard(object):
         for k in self.zero_equalities:
             self.assert_comparison(terms.IVar(i) == terms.IVar(k))
         self.zero_equalities.add(i)
+        self.touch(i)
         # todo: there's a lot of simplification that could happen if a term is equal to 0
         self.announce_zero_comparison(i, terms.EQ)
         self.update_clause(i)
@@ -725,6 +1072,7 @@ class Blackboard(object):
                     self.disequalities[i, j].add(coeff)
             else:
                 self.disequalities[i, j] = {coeff}
+            self.touch((i, j))
 
             self.update_clause(i, j)
             self.tracker.update((i, j))
@@ -744,6 +1092,7 @@ class Blackboard(object):
                 self.assert_zero_inequality(i, terms.GT)
         else:
             self.zero_disequalities.add(i)
+            self.touch(i)
 
         self.update_clause(i)
         self.tracker.update(i)
@@ -772,6 +1121,7 @@ class Blackboard(object):
         l = len(c)
         if l > 1:
             self.clauses.add(c)
+            self.clause_version += 1
         elif l == 1:
             self.assert_comparison(c.first())
         else:
@@ -18,6 +18,7 @@ from __future__ import division
 import polya.main.messages as messages
 
 import polya.modules.polyhedron.lrs as lrs
+import polya.modules.polyhedron.lrs_polyhedron_util as lrs_util
 # import polya.modules.polyhedron.poly_add_module as poly_add_module
 # import polya.modules.polyhedron.poly_mult_module as poly_mult_module
 # import polya.modules.fourier_motzkin.fm_add_module as fm_add_module
@@ -31,6 +32,8 @@ from polya.modules.polyhedron.poly_mult_module import PolyMultiplicationModule
 from polya.modules.polyhedron.poly_add_module import PolyAdditionModule
 from polya.modules.fourier_motzkin.fm_add_module import FMAdditionModule
 from polya.modules.fourier_motzkin.fm_mult_module import FMMultiplicationModule
+from polya.modules.simplex.simplex_add_module import SimplexAdditionModule
+from polya.modules.simplex.simplex_mult_module import SimplexMultiplicationModule
 from polya.modules.congruence_closure_module import CongClosureModule
 from polya.modules.axiom_module import AxiomModule
 from polya.modules.exponential_module import ExponentialModule
@@ -38,6 +41,7 @@ from polya.modules.absolute_value_module import AbsModule
 from polya.modules.minimum_module import MinimumModule
 from polya.modules.nth_root_module import NthRootModule
 from polya.modules.builtins_module import BuiltinsModule
+from polya.modules.interval_module import IntervalModule
 from polya.main.blackboard import Blackboard
 from polya.interface.example import run_examples
 from polya.main.messages import set_verbosity, quiet, modules, low, normal, debug
@@ -49,22 +53,33 @@ from polya.main.messages import set_verbosity, quiet, modules, low, normal, debu
 #
 ####################################################################################################
 
-solver_options = ['fm', 'poly']
-default_solver = 'none'
+solver_options = ['fm', 'poly', 'simplex']
+default_solver = None   # chosen by get_default_solver on first use
 default_split_depth = 0
 default_split_breadth = 0
+default_split_processes = 0
+default_split_search = 'dfs'
+default_portfolio = None
+default_select_modules = False
 
 
-try:
-    import cdd
-    have_cdd = True
-except Exception:
-    have_cdd = False
+def have_poly_components():
+    """
+    Returns True if lrs, redund and cdd, needed by the polyhedron modules, are all installed.
+    Looking for them is put off until it is needed, as it spawns processes and imports cdd.
+    """
+    return bool(lrs.get_lrs_path() and lrs.get_redund_path() and lrs_util.get_cdd())
+
 
-if lrs.lrs_path and lrs.redund_path and have_cdd:
-    default_solver = 'poly'
-else:
-    default_solver = 'fm'
+def get_default_solver():
+    """
+    Returns the default solver type: the one set by set_solver_type, or else 'poly' if its
+    components are installed and 'fm' if not.
+    """
+    global default_solver
+    if default_solver is None:
+        default_solver = 'poly' if have_poly_components() else 'fm'
+    return default_solver
 
 
 def show_configuration():
@@ -74,15 +89,16 @@ def show_configuration():
     messages.announce('', messages.INFO)
     messages.announce('Welcome to the Polya inequality prover.', messages.INFO)
     messages.announce('Looking for components...', messages.INFO)
-    if lrs.lrs_path is None:
+    if lrs.get_lrs_path() is None:
         messages.announce('lrs not found.', messages.INFO)
     else:
-        messages.announce('lrs found (path: {0!s}).'.format(lrs.lrs_path), messages.INFO)
-    if lrs.redund_path is None:
+        messages.announce('lrs found (path: {0!s}).'.format(lrs.get_lrs_path()), messages.INFO)
+    if lrs.get_redund_path() is None:
         messages.announce('redund not found.', messages.INFO)
     else:
-        messages.announce('redund found (path: {0!s}).'.format(lrs.redund_path), messages.INFO)
-    if have_cdd:
+        messages.announce('redund found (path: {0!s}).'.format(lrs.get_redund_path()),
+                          messages.INFO)
+    if lrs_util.get_cdd() is not None:
         messages.announce('cdd found.', messages.INFO)
     else:
         messages.announce('cdd not found.', messages.INFO)
@@ -110,6 +126,43 @@ def set_split_defaults(split_depth, split_breadth):
     default_split_depth, default_split_breadth = split_depth, split_breadth
 
 
+def set_split_processes(n):
+    """
+    Sets the default number of worker processes used to explore case splits concurrently.
+    If n is at most 1, case splits are explored sequentially.
+    """
+    global default_split_processes
+    default_split_processes = n
+
+
+def set_split_search(s):
+    """
+    Sets the default case split search: 'dfs' to explore splits depth first, or 'cdcl' to learn
+    clauses from failed splits and backjump.
+    """
+    global default_split_search
+    default_split_search = s
+
+
+def set_portfolio(configs):
+    """
+    Sets the default portfolio: a list of configurations, as in Solver, to race against each
+    other in separate processes, or None to run a single configuration.
+    solve_util.default_portfolio() returns the list of solver types raced by default.
+    """
+    global default_portfolio
+    default_portfolio = configs
+
+
+def set_module_selection(flag):
+    """
+    If flag is True, each problem is only given the modules that can act on the kinds of terms
+    it contains, and linear problems are run without case splits. See select_util.
+    """
+    global default_select_modules
+    default_select_modules = flag
+
+
 ####################################################################################################
 #
 # Prepackaged solving methods
@@ -125,7 +178,12 @@ def solve(*assertions):
 
     Returns True if the assertions are contradictory, False otherwise.
     """
-    return solve_util.solve(default_split_depth, default_split_breadth, default_solver, *assertions)
+    return solve_util.solve(default_split_depth, default_split_breadth, get_default_solver(),
+                            *assertions,
+                            split_processes=default_split_processes,
+                            split_search=default_split_search,
+                            portfolio=default_portfolio,
+                            select_modules=default_select_modules)
 
 
 def run(B):
@@ -133,12 +191,15 @@ def run(B):
     Runs the default modules on the given Blackboard object, using default solver and split
     settings.
     """
-    return solve_util.run(B, default_split_depth, default_split_breadth, default_solver)
+    return solve_util.run(B, default_split_depth, default_split_breadth, get_default_solver(),
+                          default_split_processes, default_split_search, default_portfolio,
+                          default_select_modules)
 
 
 def Solver(assertions=list(), terms=list(), axioms=list(), modules=list(),
            split_depth=default_split_depth, split_breadth=default_split_breadth,
-           solver_type=default_solver):
+           solver_type=None, split_processes=None, split_search=None, portfolio=None,
+           select_modules=None):
     """
     Instantiates a Solver object.
     Arguments:
@@ -147,10 +208,28 @@ def Solver(assertions=list(), terms=list(), axioms=list(), modules=list(),
      -- modules: a list of modules for the solver to use. Defaults to all available modules.
      -- split_depth: How many successive (cumulative) case splits to try.
      -- split_breadth: How many split options to consider.
-     -- solver_type: 'fm' or 'poly' arithmetic.
+     -- solver_type: 'fm', 'poly' or 'simplex' arithmetic. Defaults to get_default_solver().
+     -- split_processes: How many worker processes to use for case splits. Defaults to the value
+       set by set_split_processes.
+     -- split_search: 'dfs' or 'cdcl'. Defaults to the value set by set_split_search.
+     -- portfolio: a list of configurations to race, as in solve_util.Solver. Defaults to the
+       value set by set_portfolio.
+     -- select_modules: whether to run only the modules that can act on the problem. Defaults to
+       the value set by set_module_selection.
     """
+    if solver_type is None:
+        solver_type = get_default_solver()
+    if split_processes is None:
+        split_processes = default_split_processes
+    if split_search is None:
+        split_search = default_split_search
+    if portfolio is None and len(modules) == 0:
+        portfolio = default_portfolio
+    if select_modules is None:
+        select_modules = default_select_modules
     return solve_util.Solver(split_depth, split_breadth, assertions, terms, axioms, modules,
-                             solver_type)
+                             solver_type, split_processes, split_search, portfolio=portfolio,
+                             select_modules=select_modules)
 
 
 def Example(hyps=None, terms=None, conc=None, axioms=None, modules=None, omit=False, comment=None,
@@ -168,4 +247,4 @@ def Example(hyps=None, terms=None, conc=None, axioms=None, modules=None, omit=Fa
      -- split_depth, split_depth: as in Solver.
     """
     return example.Example(hyps, terms, conc, axioms, modules, omit, comment,
-                           split_depth, split_breadth, default_solver)
\ No newline at end of file
+                           split_depth, split_breadth, get_default_solver())
\ No newline at end of file
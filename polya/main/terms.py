@@ -503,6 +503,18 @@ class Func(object):
         self.arity = arity
         self.canonize = self.default_canonize if canonize is None else canonize
 
+    def __getstate__(self):
+        # bound methods cannot be pickled, so the default canonizer is restored on unpickling
+        state = self.__dict__.copy()
+        if state['canonize'] == self.default_canonize:
+            state['canonize'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.canonize is None:
+            self.canonize = self.default_canonize
+
     def __call__(self, *args):
         if self.arity is not None and len(args) != self.arity:
             raise Error('Wrong number of arguments to {0!s}'.format(self.name))
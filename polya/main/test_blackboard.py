@@ -0,0 +1,55 @@
+####################################################################################################
+#
+# test_blackboard.py
+#
+# Checks that the arithmetic modules, which solve the components of the terms one at a time,
+# still learn the comparisons between terms of different components that follow from their
+# comparisons with constants.
+#
+# Run with: python -m unittest discover -s polya -p 'test_*.py'
+#
+####################################################################################################
+
+import polya.main.messages as messages
+import polya.main.terms as terms
+import polya.main.formulas as formulas
+import polya.main.main as main
+import unittest
+
+a, b, c, d, e, x = [terms.Var(v) for v in 'abcdex']
+f = terms.Func('f')
+
+# a and b, and e and d, are in different components, and only compared through constants
+bounds = [a > 3, b < 2, e > 3, d < 2]
+
+
+class ComponentComparisonsTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+
+    def test_component_comparisons(self):
+        S = main.Solver(assertions=[a > 3, b < 2], solver_type='fm')
+        ia, ib = S.B.term_name(a).index, S.B.term_name(b).index
+        self.assertNotEqual(S.B.component_of(ia), S.B.component_of(ib))
+        comparisons = S.B.component_comparisons()
+        self.assertNotEqual(comparisons, [])
+        self.assertFalse(any(S.B.implies_comparison(c) for c in comparisons))
+        S.B.assert_comparison(terms.IVar(ia) * 2 > terms.IVar(ib) * 3)
+        self.assertTrue(all(S.B.implies_comparison(c) for c in comparisons))
+
+    def test_clause(self):
+        for solver_type in ('fm', 'simplex'):
+            S = main.Solver(assertions=bounds, solver_type=solver_type)
+            S.add_clause([a < b, e < d, c > 0])
+            self.assertTrue(S.prove(c > 0), solver_type)
+
+    def test_axiom(self):
+        axiom = formulas.Forall([x], formulas.Or(x < b, e < d, f(x) > 0))
+        for solver_type in ('fm', 'simplex'):
+            S = main.Solver(assertions=bounds, axioms=[axiom], solver_type=solver_type)
+            self.assertTrue(S.prove(f(a) > 0), solver_type)
+
+
+if __name__ == '__main__':
+    unittest.main()
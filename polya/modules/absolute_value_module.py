@@ -34,7 +34,7 @@ class AbsModule:
         # self.am.add_axiom(formulas.Forall([x], formulas.Implies(x >= 0, terms.abs_val(x) == x)))
         # self.am.add_axiom(formulas.Forall([x], formulas.Implies(x <= 0, terms.abs_val(x) == -x)))
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Adds variations on the triangle inequality.
         Looks for expressions abs(c1 * t1 + ... + ck * tk) for which each ti either
@@ -109,9 +109,15 @@ class AbsModule:
 
         timer.stop(timer.ABS)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
+        """
+        Asks for the sign of the argument of each abs term, if it is not known. If changed is a
+        set of indices, only the arguments in changed are considered.
+        """
         inds = [i for i in range(B.num_terms) if (isinstance(B.term_defs[i], terms.FuncTerm)
                                             and B.term_defs[i].func_name == 'abs' and
+                                            (changed is None or
+                                             B.term_defs[i].args[0].term.index in changed) and
                                             B.weak_sign(B.term_defs[i].args[0].term.index) == 0)]
         weights = []
         for i in inds:
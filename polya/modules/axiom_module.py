@@ -18,6 +18,7 @@ import polya.main.terms as terms
 import polya.main.messages as messages
 import polya.main.formulas as formulas
 import polya.util.timer as timer
+import polya.util.budget as budget
 import polya.util.num_util as num_util
 import fractions
 import copy
@@ -594,7 +595,7 @@ class AxiomModule:
         for a in axioms:
             self.add_axiom(a)
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Instantiates all stored axioms with respect to B and asserts new clauses.
         """
@@ -611,13 +612,15 @@ class AxiomModule:
             messages.announce("Instantiating axiom: {}".format(a), messages.DEBUG)
             if a.unifiable:
                 clauses = instantiate(a, self.used_envs, B)
+                budget.spend(budget.INSTANCES, len(clauses))
                 for c in clauses:
                     B.assert_clause(*c)
             else:
                 clauses = instantiate_triggerless(a, self.used_envs, B)
+                budget.spend(budget.INSTANCES, len(clauses))
                 for c in clauses:
                     B.assert_clause(*c)
         timer.stop(timer.FUN)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
         return None
\ No newline at end of file
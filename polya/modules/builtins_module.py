@@ -73,7 +73,7 @@ class BuiltinsModule:
         self.added = {'sin': False, 'cos': False, 'tan': False, 'floor': False, 'abs': False,
                       'exp': False, 'log': False}
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Adds axioms for sin, cos, tan, floor
         """
@@ -111,5 +111,5 @@ class BuiltinsModule:
 
         timer.stop(timer.BUILTIN)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
         return None
\ No newline at end of file
@@ -16,6 +16,7 @@
 
 import polya.main.terms as terms
 import polya.main.messages as messages
+import polya.main.blackboard as blackboard
 import polya.util.timer as timer
 import fractions
 import itertools
@@ -26,10 +27,12 @@ class CongClosureModule:
     def __init__(self):
         pass
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Checks the blackboard B for function terms with equal arguments, and asserts that the
         function terms are equal.
+        If delta is a set of indices and pairs with new information, only pairs of function terms
+        that are new, or whose arguments have new information, are checked.
         """
 
         def eq_func_terms(f1, f2):
@@ -57,14 +60,27 @@ class CongClosureModule:
             name = B.term_defs[i].func_name
             func_classes[name] = func_classes.get(name, []) + [i]
 
+        if delta is not None:
+            changed = blackboard.new_info_indices(delta)
+            for name in func_classes:
+                func_classes[name] = [(i, (i in changed or
+                                           any(a.term.index in changed
+                                               for a in B.term_defs[i].args)))
+                                      for i in func_classes[name]]
+        else:
+            for name in func_classes:
+                func_classes[name] = [(i, True) for i in func_classes[name]]
+
         for name in func_classes:
             tinds = func_classes[name]
-            for (i, j) in itertools.combinations(tinds, 2):
+            for ((i, i_new), (j, j_new)) in itertools.combinations(tinds, 2):
+                if not (i_new or j_new):
+                    continue
                 # ti and tj are function terms with the same symbols. check if they're equal.
                 f1, f2 = B.term_defs[i], B.term_defs[j]
                 if eq_func_terms(f1, f2):
                     B.assert_comparison(terms.IVar(i) == terms.IVar(j))
         timer.stop(timer.CCM)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
         return None
\ No newline at end of file
@@ -42,13 +42,14 @@ def find_exps_with_arg(B, i):
                 and B.term_defs[i].args[0].term.index == i)]
 
 
-def exp_factor_constant(B):
+def exp_factor_constant(B, inds=None):
     """
     Takes a Blackboard B. For each i,
     If B.term_defs[i] is of the form exp(c*t), will declare that it is equal to exp(t)**c
+    If inds is not None, only indices i in inds are considered.
     """
-    exp_inds = [i for i in range(B.num_terms) if (isinstance(B.term_defs[i], terms.FuncTerm)
-                                                  and B.term_defs[i].func == terms.exp)]
+    exp_inds = [i for i in (range(B.num_terms) if inds is None else inds)
+                if (isinstance(B.term_defs[i], terms.FuncTerm) and B.term_defs[i].func == terms.exp)]
     for i in exp_inds:
         exponent = B.term_defs[i].args[0]
         if exponent.coeff != 1:
@@ -57,13 +58,14 @@ def exp_factor_constant(B):
             B.assert_comparison(terms.IVar(i) == term2.coeff * n)
 
 
-def log_factor_exponent(B):
+def log_factor_exponent(B, inds=None):
     """
     Takes a Blackboard B. Looks for terms of the form log(t**e), and asserts that they are equal to
     e*log(t).
+    If inds is not None, only indices i in inds are considered.
     """
-    log_inds = [i for i in range(B.num_terms) if (isinstance(B.term_defs[i], terms.FuncTerm)
-                                                  and B.term_defs[i].func == terms.log)]
+    log_inds = [i for i in (range(B.num_terms) if inds is None else inds)
+                if (isinstance(B.term_defs[i], terms.FuncTerm) and B.term_defs[i].func == terms.log)]
 
     for i in log_inds:
         coeff, t = B.term_defs[i].args[0].coeff, B.term_defs[B.term_defs[i].args[0].term.index]
@@ -73,17 +75,18 @@ def log_factor_exponent(B):
             B.assert_comparison(terms.IVar(i) == t.args[0].exponent * terms.log(t.args[0].term))
 
 
-def exp_factor_sum(B):
+def exp_factor_sum(B, inds=None):
     """
     Takes a Blackboard and a list of IVar indices, s.t. i in exp_inds implies B.term_defs[i] is an
     exponential function.
     Asserts a number of comparisons to B.
     If B.term_defs[i] is of the form exp(t_1 + ct_2 + ...), will declare that it is equal to
     exp(t_1)*exp(ct_2)*...
+    If inds is not None, only indices i in inds are considered.
     """
 
-    exp_inds = [i for i in range(B.num_terms) if (isinstance(B.term_defs[i], terms.FuncTerm)
-                                                  and B.term_defs[i].func == terms.exp)]
+    exp_inds = [i for i in (range(B.num_terms) if inds is None else inds)
+                if (isinstance(B.term_defs[i], terms.FuncTerm) and B.term_defs[i].func == terms.exp)]
     for i in exp_inds:
         coeff, t = B.term_defs[i].args[0].coeff, B.term_defs[B.term_defs[i].args[0].term.index]
         if isinstance(t, terms.AddTerm) and coeff == 1:
@@ -115,17 +118,18 @@ def exp_factor_both(B):
             B.assert_comparison(terms.IVar(i) == term2.coeff * n)
 
 
-def log_factor_product(B):
+def log_factor_product(B, inds=None):
     """
     Takes a Blackboard and looks for terms of the form log(a*b*...).
     Asserts that they are equal to log(a)+log(b)+...
+    If inds is not None, only indices i in inds are considered.
     """
     def is_pos(mulpair):
         return (B.implies_zero_comparison(mulpair.term.index, terms.GT) or
             (mulpair.exponent % 2 == 0 and B.implies_zero_comparison(mulpair.term.index, terms.NE)))
 
-    log_inds = [i for i in range(B.num_terms) if (isinstance(B.term_defs[i], terms.FuncTerm)
-                                                  and B.term_defs[i].func == terms.log)]
+    log_inds = [i for i in (range(B.num_terms) if inds is None else inds)
+                if (isinstance(B.term_defs[i], terms.FuncTerm) and B.term_defs[i].func == terms.log)]
     for i in log_inds:
         coeff, t = B.term_defs[i].args[0].coeff, B.term_defs[B.term_defs[i].args[0].term.index]
         if coeff == 1 and isinstance(t, terms.MulTerm) and all(is_pos(a) for a in t.args):
@@ -133,6 +137,19 @@ def log_factor_product(B):
             t2 = reduce(lambda x, y: x+y, margs, 0).canonize()
             B.assert_comparison(terms.IVar(i) == t2)
 
+
+def log_arg_changed(B, i, delta):
+    """
+    Returns True if t_i is of the form log(c * t_j), and t_j is a product with an argument whose
+    index is in delta.
+    """
+    t = B.term_defs[i]
+    if not (isinstance(t, terms.FuncTerm) and t.func == terms.log):
+        return False
+    a = B.term_defs[t.args[0].term.index]
+    return isinstance(a, terms.MulTerm) and any(p.term.index in delta for p in a.args)
+
+
 class ExponentialModule:
 
     def __init__(self, am):
@@ -164,24 +181,32 @@ class ExponentialModule:
 #         self.am.add_axiom(formulas.Forall([x], formulas.Implies(x > 0, terms.exp(terms.log(x)) == x)))
 #         self.am.add_axiom(formulas.Forall([x], terms.log(terms.exp(x)) == x))
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Asserts identities about exp and log terms found in B.
+        If delta is a set of indices and pairs with new information, only terms that are new, or
+        whose arguments have new sign information, are considered.
         """
         timer.start(timer.EXP)
         messages.announce_module('exponential module')
+        if delta is not None:
+            # the factoring routines depend only on definitions and signs
+            new_inds = sorted(i for i in delta if not isinstance(i, tuple))
+            log_inds = [i for i in range(B.num_terms) if i in delta or log_arg_changed(B, i, delta)]
+        else:
+            new_inds = log_inds = None
         if any(isinstance(t, terms.FuncTerm) and t.func == terms.exp for t in B.term_defs.values()):
             B.assert_comparison(terms.exp(0) == 1)
         if any(isinstance(t, terms.FuncTerm) and t.func == terms.log for t in B.term_defs.values()):
             B.assert_comparison(terms.log(1) == 0)
-        exp_factor_constant(B)
-        exp_factor_sum(B)
+        exp_factor_constant(B, new_inds)
+        exp_factor_sum(B, new_inds)
         #exp_factor_both(B)
-        log_factor_exponent(B)
-        log_factor_product(B)
+        log_factor_exponent(B, log_inds)
+        log_factor_product(B, log_inds)
         timer.stop(timer.EXP)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
         return None
 
 if __name__ == '__main__':
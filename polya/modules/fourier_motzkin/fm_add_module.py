@@ -24,6 +24,8 @@
 import polya.main.terms as terms
 import polya.main.messages as messages
 import polya.util.timer as timer
+import polya.util.budget as budget
+import polya.util.subst_util as subst_util
 import fractions
 
 
@@ -239,6 +241,7 @@ def elim(zero_equations, zero_comparisons, v):
         except StopIteration:  # v does not occur in c
             new_comparisons.append(c)
     for c1 in pos_comparisons:
+        budget.spend(budget.FM_ROWS, len(neg_comparisons))
         for c2 in neg_comparisons:
             c = elim_ineq_ineq(c1, c2, v)
             if not trivial_ineq(c):
@@ -265,17 +268,28 @@ def inequality_to_zero_comparison(c):
     return ZeroComparison(cast_to_sum(term), strong)
 
 
-def get_additive_information(B):
+def summands_to_sum(summands):
     """
-    Retrieves known additive comparisons and inequalities from the blackboard B.
+    Represents a list of pairs (c, i), standing for the sum of the c * ti, as a Sum.
     """
-    zero_equalities = [equality_to_zero_equality(c) for c in B.get_equalities()]
-    zero_comparisons = [inequality_to_zero_comparison(c) for c in B.get_inequalities()]
+    return Sum([Summand(c, i) for (c, i) in summands])
+
+
+def get_additive_information(B, subst):
+    """
+    Retrieves known additive comparisons and inequalities from the blackboard B, with each term
+    replaced by the representative of its equality class in the Substitution subst.
+    """
+    zero_equalities = [summands_to_sum(subst.summands([(a, i), (b, j)]))
+                       for (i, j, a, b) in B.get_numeric_equalities()]
+    zero_comparisons = [ZeroComparison(summands_to_sum(subst.summands([(a, i), (b, j)])), strong)
+                        for (i, j, a, b, strong) in B.get_numeric_inequalities()]
     # convert each definition ti = s0 + s1 + ... + sn to a zero equality
-    for i in range(B.num_terms):
-        if isinstance(B.term_defs[i], terms.AddTerm):
-            zero_equalities.append(cast_to_sum(terms.IVar(i) - B.term_defs[i]))
-    return zero_equalities, zero_comparisons
+    for i, summands in B.get_numeric_definitions():
+        zero_equalities.append(
+            summands_to_sum(subst.summands([(1, i)] + [(-c, j) for (c, j) in summands])))
+    return ([e for e in zero_equalities if not trivial_eq(e)],
+            [c for c in zero_comparisons if not trivial_ineq(c)])
 
 
 def zero_equality_to_comparison(e):
@@ -316,18 +330,48 @@ def zero_comparison_to_comparison(c):
         return None
 
 
-def assert_comparisons_to_blackboard(zero_equalities, zero_comparisons, B):
+def assert_comparisons_to_blackboard(zero_equalities, zero_comparisons, B, subst):
     """
-    Asserts all the comparisons to zero_equalities and zero_comparisons to B.
+    Asserts all the comparisons to zero_equalities and zero_comparisons to B. These are between
+    the representatives of subst, and each is asserted for all the terms of their classes.
     """
     for ze in zero_equalities:
-        c = zero_equality_to_comparison(ze)
-        if c:
-            B.assert_comparison(c)
+        for e in subst.expand([(s.coeff, s.index) for s in ze.args]):
+            c = zero_equality_to_comparison(summands_to_sum(e))
+            if c:
+                B.assert_comparison(c)
     for zc in zero_comparisons:
-        c = zero_comparison_to_comparison(zc)
-        if c:
-            B.assert_comparison(c)
+        for e in subst.expand([(s.coeff, s.index) for s in zc.term.args]):
+            c = zero_comparison_to_comparison(ZeroComparison(summands_to_sum(e), zc.strong))
+            if c:
+                B.assert_comparison(c)
+
+
+def learn_comparisons(indices, eqs, comps, B, subst):
+    """
+    indices is a sorted list of indices, including all those occurring in the zero equalities eqs
+    and zero comparisons comps.
+    Learns the comparisons between each pair of terms with these indices, and asserts them to B,
+    expanded by subst.
+    """
+    for a, i in enumerate(indices):
+        # at this point, eqs and comps have all comparisons with indices >= i
+        i_eqs, i_comps = eqs, comps
+        # determine all comparisons with IVar(i) and IVar(j) with j >= i
+        for b in range(a + 1, len(indices)):
+            j = indices[b]
+            # at this point, i_eqs and i_comps have all comparisons with i and indices >= j
+            ij_eqs, ij_comps = i_eqs, i_comps
+            # determine all comparisons between IVar(i) and IVar(j)
+            for k in indices[b + 1:]:
+                ij_eqs, ij_comps = elim(ij_eqs, ij_comps, k)
+            assert_comparisons_to_blackboard(ij_eqs, ij_comps, B, subst)
+            # done with IVar(j)
+            i_eqs, i_comps = elim(i_eqs, i_comps, j)
+        # add this point, i_eqs and i_comps contain only comparisons with IVar(i) alone
+        assert_comparisons_to_blackboard(i_eqs, i_comps, B, subst)
+        # done with IVar(i)
+        eqs, comps = elim(eqs, comps, i)
 
 
 class FMAdditionModule:
@@ -335,32 +379,35 @@ class FMAdditionModule:
     def __init__(self):
         pass
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Learns equalities and inequalities from additive information in B, and asserts them
         to B.
+        If delta is an empty set of new information, B is unchanged since the last run, and
+        there is nothing to do.
         """
+        if delta is not None and len(delta) == 0:
+            return
         timer.start(timer.FMADD)
         messages.announce_module('Fourier-Motzkin additive module')
-        eqs, comps = get_additive_information(B)
-        for i in range(B.num_terms):
-            # at this point, eqs and comps have all comparisons with indices >= i
-            i_eqs, i_comps = eqs, comps
-            # determine all comparisons with IVar(i) and IVar(j) with j >= i
-            for j in range(i + 1, B.num_terms):
-                # at this point, i_eqs and i_comps have all comparisons with i and indices >= j
-                ij_eqs, ij_comps = i_eqs, i_comps
-                # determine all comparisons between IVar(i) and IVar(j)
-                for k in range(j + 1, B.num_terms):
-                    ij_eqs, ij_comps = elim(ij_eqs, ij_comps, k)
-                assert_comparisons_to_blackboard(ij_eqs, ij_comps, B)
-                # done with IVar(j)
-                i_eqs, i_comps = elim(i_eqs, i_comps, j)
-            # add this point, i_eqs and i_comps contain only comparisons with IVar(i) alone
-            assert_comparisons_to_blackboard(i_eqs, i_comps, B)
-            # done with IVar(i)
-            eqs, comps = elim(eqs, comps, i)
+        subst = subst_util.Substitution(B)
+        eqs, comps = get_additive_information(B, subst)
+        eq_parts = B.split_by_component(eqs, lambda e: [s.index for s in e.args])
+        comp_parts = B.split_by_component(comps, lambda c: [s.index for s in c.term.args])
+        constants = len(subst.members.get(0, [])) > 1
+        with B.batch():
+            for c in subst.equalities():
+                B.assert_comparison(c)
+            for (indices, c_eqs), (_, c_comps) in zip(eq_parts, comp_parts):
+                reps = subst.representatives(indices)
+                # with only one term besides t0, and no other term equal to it or to t0,
+                # everything there is to learn is stored in B
+                if len(indices) > 2 or len(reps) < len(indices) or constants:
+                    timer.record_max('fm_add_component', len(reps))
+                    learn_comparisons(reps, c_eqs, c_comps, B, subst)
+            for c in B.component_comparisons():
+                B.assert_comparison(c)
         timer.stop(timer.FMADD)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
         return None
\ No newline at end of file
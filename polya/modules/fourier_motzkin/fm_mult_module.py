@@ -17,9 +17,11 @@
 
 import polya.main.terms as terms
 import polya.main.messages as messages
+import polya.main.blackboard as blackboard
 #import polya.polyhedron.poly_mult_module as poly_mult_module
 import polya.util.mul_util as mul_util
 import polya.util.timer as timer
+import polya.util.budget as budget
 import fractions
 
 
@@ -245,6 +247,7 @@ def elim(one_equations, one_comparisons, v):
         except StopIteration:  # v does not occur in c
             new_comparisons.append(c)
     for c1 in pos_comparisons:
+        budget.spend(budget.FM_ROWS, len(neg_comparisons))
         for c2 in neg_comparisons:
             c = elim_ineq_ineq(c1, c2, v)
             if not trivial_ineq(c):
@@ -338,14 +341,44 @@ def assert_comparisons_to_blackboard(one_equalities, one_comparisons, B):
     """
     Asserts all the comparisons to zero_equalities and zero_comparisons to B.
     """
-    for oe in one_equalities:
-        c = one_equality_to_comparison(oe, B)
-        if c:
-            B.assert_comparison(c)
-    for oc in one_comparisons:
-        c = one_comparison_to_comparison(oc, B)
-        if c:
-            B.assert_comparison(c)
+    with B.batch():
+        for oe in one_equalities:
+            c = one_equality_to_comparison(oe, B)
+            if c:
+                B.assert_comparison(c)
+        for oc in one_comparisons:
+            c = one_comparison_to_comparison(oc, B)
+            if c:
+                B.assert_comparison(c)
+
+
+def learn_comparisons(indices, eqs, comps, B):
+    """
+    indices is a sorted list of indices beginning with 0, including all those occurring in the
+    one equalities eqs and one comparisons comps.
+    Learns the comparisons between each pair of terms with these indices, and asserts them to B.
+    """
+    # t0 = 1; ignore
+    for a in range(1, len(indices)):
+        i = indices[a]
+        # at this point, eqs and comps have all comparisons with indices >= i
+        i_eqs, i_comps = eqs, comps
+        # determine all comparisons with IVar(i) and IVar(j) with j >= i
+        for b in range(a + 1, len(indices)):
+            j = indices[b]
+            # at this point, i_eqs and i_comps have all comparisons with i and indices >= j
+            ij_eqs, ij_comps = i_eqs, i_comps
+            # determine all comparisons between IVar(i) and IVar(j)
+            for k in indices[b + 1:]:
+                ij_eqs, ij_comps = elim(ij_eqs, ij_comps, k)
+            #print 'comps:', ij_comps
+            assert_comparisons_to_blackboard(ij_eqs, ij_comps, B)
+            # done with IVar(j)
+            i_eqs, i_comps = elim(i_eqs, i_comps, j)
+        # add this point, i_eqs and i_comps contain only comparisons with IVar(i) alone
+        assert_comparisons_to_blackboard(i_eqs, i_comps, B)
+        # done with IVar(i)
+        eqs, comps = elim(eqs, comps, i)
 
 
 class FMMultiplicationModule:
@@ -353,36 +386,29 @@ class FMMultiplicationModule:
     def __init__(self):
         pass
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Learns sign information and equalities and inequalities from multiplicative information in
         B, and asserts them to B.
+        If delta is a set of indices and pairs with new information, sign information is only
+        derived for terms affected by it.
         """
+        if delta is not None and len(delta) == 0:
+            return
         timer.start(timer.FMMUL)
         messages.announce_module('Fourier-Motzkin multiplicative module')
-        mul_util.derive_info_from_definitions(B)
-        mul_util.preprocess_cancellations(B)
+        changed = blackboard.new_info_indices(delta) if delta is not None else None
+        mul_util.derive_info_from_definitions(B, changed)
+        mul_util.preprocess_cancellations(B, changed)
         eqs, comps = get_multiplicative_information(B)
-        # t0 = 1; ignore
-        for i in range(1, B.num_terms):
-            # at this point, eqs and comps have all comparisons with indices >= i
-            i_eqs, i_comps = eqs, comps
-            # determine all comparisons with IVar(i) and IVar(j) with j >= i
-            for j in range(i + 1, B.num_terms):
-                # at this point, i_eqs and i_comps have all comparisons with i and indices >= j
-                ij_eqs, ij_comps = i_eqs, i_comps
-                # determine all comparisons between IVar(i) and IVar(j)
-                for k in range(j + 1, B.num_terms):
-                    ij_eqs, ij_comps = elim(ij_eqs, ij_comps, k)
-                #print 'comps:', ij_comps
-                assert_comparisons_to_blackboard(ij_eqs, ij_comps, B)
-                # done with IVar(j)
-                i_eqs, i_comps = elim(i_eqs, i_comps, j)
-            # add this point, i_eqs and i_comps contain only comparisons with IVar(i) alone
-            assert_comparisons_to_blackboard(i_eqs, i_comps, B)
-            # done with IVar(i)
-            eqs, comps = elim(eqs, comps, i)
+        eq_parts = B.split_by_component(eqs, lambda e: [m.index for m in e.args])
+        comp_parts = B.split_by_component(comps, lambda c: [m.index for m in c.term.args])
+        for (indices, c_eqs), (_, c_comps) in zip(eq_parts, comp_parts):
+            # with only one term besides t0, everything there is to learn is stored in B
+            if len(indices) > 2:
+                timer.record_max('fm_mul_component', len(indices))
+                learn_comparisons(indices, c_eqs, c_comps, B)
         timer.stop(timer.FMMUL)
 
-    def get_split_weight(self, B):
-        return mul_util.get_split_weight(B)
\ No newline at end of file
+    def get_split_weight(self, B, changed=None):
+        return mul_util.get_split_weight(B, changed)
\ No newline at end of file
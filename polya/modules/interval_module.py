@@ -0,0 +1,204 @@
+####################################################################################################
+#
+# interval_module.py
+#
+# The routine for learning bounds on terms by interval constraint propagation.
+#
+# Each term ti starts with the interval of the constant bounds ti <> c stored in the blackboard.
+# A forward pass, in order of the indices, narrows the interval of each sum, product and function
+# application to that computed from the intervals of its arguments, and a backward pass, in the
+# reverse order, narrows the intervals of the arguments of each definition from that of the term
+# it defines, as in the HC4 algorithm. The equalities ti = c * tj are used in the backward pass.
+# Each pass takes time linear in the size of the definitions.
+#
+# The module is meant to run before the arithmetic modules, which then start from the signs it
+# finds. By default, it only asserts the new signs of the arguments of products, which the
+# multiplicative modules need to use a product at all. Every other fact makes the problems of
+# the arithmetic modules larger, and the Fourier-Motzkin multiplicative module in particular can
+# slow down sharply when given the signs of many terms at once. With bounds=True, the new bounds
+# of every term are asserted, rounded outward to small denominators.
+#
+####################################################################################################
+
+import polya.main.terms as terms
+import polya.main.messages as messages
+import polya.util.interval_util as interval_util
+import polya.util.timer as timer
+import fractions
+
+Interval = interval_util.Interval
+
+# the number of forward and backward passes in each run
+max_rounds = 2
+
+
+def blackboard_interval(B, i):
+    """
+    Returns the Interval given by the comparisons between ti and constants stored in B.
+    """
+    if i == 0:
+        return Interval(1, 1)
+    if i in B.zero_equalities:
+        return Interval(0, 0)
+    I = Interval()
+    comp = B.zero_inequalities.get(i)
+    if comp is not None:
+        strict = comp in (terms.GT, terms.LT)
+        if comp in (terms.GT, terms.GE):
+            I = Interval(0, None, strict)
+        else:
+            I = Interval(None, 0, False, strict)
+    if (0, i) in B.equalities:
+        # t0 = c * ti
+        c = 1 / fractions.Fraction(B.equalities[0, i])
+        return I & Interval(c, c)
+    for hp in B.inequalities.get((0, i), []):
+        # with t0 = 1, hp.a * ti > hp.b, or >= if hp is weak
+        if hp.a > 0:
+            I = I & Interval(fractions.Fraction(hp.b) / hp.a, None, hp.strong)
+        elif hp.a < 0:
+            I = I & Interval(None, fractions.Fraction(hp.b) / hp.a, False, hp.strong)
+    return I
+
+
+class IntervalModule:
+
+    def __init__(self, bounds=False):
+        """
+        If bounds is True, asserts the constant bounds found for every term, and not only the
+        signs of the arguments of products.
+        """
+        self.bounds = bounds
+
+    def forward(self, B, intervals, i):
+        """
+        Returns an Interval containing the values of the definition of ti, given the intervals of
+        the other terms.
+        """
+        d = B.term_defs[i]
+        arg = lambda a: intervals[a.term.index].scale(a.coeff)
+        if isinstance(d, terms.AddTerm):
+            return reduce(lambda x, y: x + y, [arg(a) for a in d.args])
+        elif isinstance(d, terms.MulTerm):
+            return reduce(lambda x, y: x * y,
+                          [intervals[a.term.index].power(a.exponent) for a in d.args])
+        elif isinstance(d, terms.FuncTerm):
+            if isinstance(d.func, terms.NthRoot):
+                return interval_util.root_range(d.func.n, arg(d.args[0]))
+            elif d.func_name in interval_util.fixed_ranges:
+                return interval_util.fixed_ranges[d.func_name]
+            elif d.func_name == 'abs':
+                return arg(d.args[0]).abs()
+            elif d.func_name == 'minm':
+                return interval_util.minimum([arg(a) for a in d.args])
+            elif d.func_name == 'exp':
+                return interval_util.exp_range(arg(d.args[0]))
+            elif d.func_name == 'log':
+                return interval_util.log_range(arg(d.args[0]))
+            elif d.func_name == 'floor':
+                return interval_util.floor_range(arg(d.args[0]))
+        return Interval()
+
+    def backward(self, B, intervals, i):
+        """
+        Returns a list of pairs (j, I), such that tj is in I, from the interval of ti and the
+        intervals of the arguments of its definition.
+        """
+        d, J = B.term_defs[i], intervals[i]
+        arg = lambda a: intervals[a.term.index].scale(a.coeff)
+        narrowed = []
+
+        def inverse(a, I):
+            # a is c * tj, with c * tj in I
+            if a.coeff == 0:
+                return a.term.index, Interval()
+            return a.term.index, I.scale(1 / fractions.Fraction(a.coeff))
+
+        if isinstance(d, terms.AddTerm):
+            # c * tj = ti - (the other summands)
+            for k, a in enumerate(d.args):
+                rest = [arg(b) for b in d.args[:k] + d.args[k + 1:]]
+                I = reduce(lambda x, y: x - y, rest, J)
+                narrowed.append(inverse(a, I))
+        elif isinstance(d, terms.MulTerm):
+            # tj ** e = ti / (the other factors), if these are known not to be 0
+            for k, a in enumerate(d.args):
+                if a.exponent not in (1, -1):
+                    continue
+                rest = [intervals[b.term.index].power(b.exponent)
+                        for b in d.args[:k] + d.args[k + 1:]]
+                rest = reduce(lambda x, y: x * y, rest, Interval(1, 1))
+                if rest.is_positive() or rest.is_negative():
+                    I = J * rest.reciprocal()
+                    narrowed.append((a.term.index, I if a.exponent == 1 else I.reciprocal()))
+        elif isinstance(d, terms.FuncTerm) and not isinstance(d.func, terms.NthRoot):
+            if d.func_name == 'minm':
+                # each argument is at least ti
+                I = Interval(J.lower, None, J.lower_strict)
+                narrowed.extend(inverse(a, I) for a in d.args)
+            elif d.func_name == 'abs' and J.upper is not None:
+                I = Interval(-J.upper, J.upper, J.upper_strict, J.upper_strict)
+                narrowed.append(inverse(d.args[0], I))
+            elif d.func_name == 'exp':
+                narrowed.append(inverse(d.args[0], interval_util.exp_inverse(J)))
+            elif d.func_name == 'log' and arg(d.args[0]).is_positive():
+                # as in log_range, log says nothing about arguments not known to be positive
+                narrowed.append(inverse(d.args[0], interval_util.log_inverse(J)))
+        return narrowed
+
+    def update_blackboard(self, B, delta=None):
+        """
+        Learns constant bounds on the terms of B by interval propagation, and asserts them to B.
+        If delta is an empty set of new information, nothing has changed since the last run.
+        """
+        if delta is not None and len(delta) == 0:
+            return
+        timer.start(timer.INTERVAL)
+        messages.announce_module('interval module')
+        known = [blackboard_interval(B, i) for i in range(B.num_terms)]
+        intervals = list(known)
+        for r in range(max_rounds):
+            changed = False
+            for i in range(1, B.num_terms):
+                I = intervals[i] & self.forward(B, intervals, i).rounded()
+                if I.tighter_lower(intervals[i]) or I.tighter_upper(intervals[i]):
+                    intervals[i], changed = I, True
+            for (i, j), c in B.equalities.items():
+                # ti = c * tj
+                intervals[i] = intervals[i] & intervals[j].scale(c).rounded()
+                c = fractions.Fraction(c)
+                intervals[j] = intervals[j] & intervals[i].scale(1 / c).rounded()
+            for i in range(B.num_terms - 1, 0, -1):
+                for j, I in self.backward(B, intervals, i):
+                    I = intervals[j] & I.rounded()
+                    if I.tighter_lower(intervals[j]) or I.tighter_upper(intervals[j]):
+                        intervals[j], changed = I, True
+            if not changed or any(I.is_empty() for I in intervals):
+                break
+
+        empty = next((i for i in range(B.num_terms) if intervals[i].is_empty()), None)
+        if empty is not None:
+            # the lower bound found for t_empty contradicts its upper bound
+            I = intervals[empty]
+            B.raise_contradiction(empty, terms.GT if I.lower_strict else terms.GE, I.lower, 0)
+
+        with B.batch():
+            for i in range(1, B.num_terms):
+                if self.bounds:
+                    I = intervals[i]
+                elif i in B.mul_args:
+                    I = intervals[i].signs()
+                else:
+                    continue
+                if I.tighter_lower(known[i]):
+                    timer.count('interval_bounds')
+                    t = terms.IVar(i)
+                    B.assert_comparison(t > I.lower if I.lower_strict else t >= I.lower)
+                if I.tighter_upper(known[i]):
+                    timer.count('interval_bounds')
+                    t = terms.IVar(i)
+                    B.assert_comparison(t < I.upper if I.upper_strict else t <= I.upper)
+        timer.stop(timer.INTERVAL)
+
+    def get_split_weight(self, B, changed=None):
+        return None
@@ -12,6 +12,7 @@
 
 import polya.main.terms as terms
 import polya.main.messages as messages
+import polya.main.blackboard as blackboard
 # import polya.main.formulas as formulas
 import polya.util.timer as timer
 # import polya.util.num_util as num_util
@@ -25,16 +26,25 @@ class MinimumModule:
     def __init__(self):
         pass
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Asserts identities about minm terms
+        If delta is a set of indices and pairs with new information, only minm terms that are new,
+        or whose arguments have new information, are considered.
         """
         messages.announce_module('minimum module')
         timer.start(timer.MINM)
+        changed = blackboard.new_info_indices(delta) if delta is not None else None
         for i in range(B.num_terms):
             if isinstance(B.term_defs[i], terms.FuncTerm) and B.term_defs[i].func_name == 'minm':
                 # t_i is of the form minm(...)
                 args = B.term_defs[i].args
+                arg_inds = [a.term.index for a in args]
+                if changed is not None:
+                    if i not in changed and not any(k in changed for k in arg_inds):
+                        continue
+                    # a new term, or new sign information about an argument, affects every j
+                    all_j = i in delta or any(k in delta for k in arg_inds)
                 # assert that t_i is le all of its arguments
                 for a in args:
                     B.assert_comparison(terms.IVar(i) <= a)
@@ -51,6 +61,10 @@ class MinimumModule:
                 # see if any multiple of another problem term is known to be less than all the
                 # arguments.
                 for j in range(B.num_terms):
+                    if changed is not None and not all_j and \
+                            not (j in delta or any((j, k) in delta or (k, j) in delta
+                                                   for k in arg_inds)):
+                        continue
                     if  j != i:
                         comp_range = geometry.ComparisonRange(geometry.neg_infty, geometry.infty,
                                                               True, True, True)
@@ -74,10 +88,18 @@ class MinimumModule:
                                     B.assert_comparison(c * terms.IVar(j) <= terms.IVar(i))
         timer.stop(timer.MINM)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
+        """
+        Asks for the comparison of the arguments of each minm term with two arguments, if it is
+        not known. If changed is a set of indices, only the terms with an argument in changed are
+        considered.
+        """
         min_inds = [i for i in range(B.num_terms) if (isinstance(B.term_defs[i], terms.FuncTerm)
                                                       and B.term_defs[i].func == terms.minm
                                                       and len(B.term_defs[i].args) == 2)]
+        if changed is not None:
+            min_inds = [i for i in min_inds
+                        if any(a.term.index in changed for a in B.term_defs[i].args)]
         splits = []
         for i in min_inds:
             t = B.term_defs[i]
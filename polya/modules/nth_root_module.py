@@ -30,7 +30,7 @@ class NthRootModule:
         """
         self.am = am
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Adds axioms corresponding to each nth root function present.
         """
@@ -65,7 +65,7 @@ class NthRootModule:
 
         timer.stop(timer.ROOT)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
         return None
 
 if __name__ == '__main__':
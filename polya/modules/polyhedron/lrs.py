@@ -14,6 +14,8 @@ import pipes
 import tempfile
 import os.path
 #import polya.main.messages as messages
+import polya.util.budget as budget
+import polya.util.timer as timer
 
 
 import subprocess
@@ -33,8 +35,6 @@ def find_lrs_path():
         else:
             return s
 
-lrs_path = find_lrs_path()
-
 
 def find_redund_path():
     """
@@ -48,7 +48,27 @@ def find_redund_path():
         else:
             return s
 
-redund_path = find_redund_path()
+
+# The paths are looked for on first use, since probing each candidate spawns a process.
+paths = {}
+
+
+def get_lrs_path():
+    """
+    Returns the path of lrs, or None if it is not installed.
+    """
+    if 'lrs' not in paths:
+        paths['lrs'] = find_lrs_path()
+    return paths['lrs']
+
+
+def get_redund_path():
+    """
+    Returns the path of redund, or None if it is not installed.
+    """
+    if 'redund' not in paths:
+        paths['redund'] = find_redund_path()
+    return paths['redund']
 
 
 def make_frac(string):
@@ -84,6 +104,17 @@ def output_to_matrix(str_output):
     return mat, lin_set
 
 
+def record_matrix_size(matrix):
+    """
+    Records the number of rows of a cdd matrix passed to lrs in the current statistics.
+    Matrices passed as strings are not measured.
+    """
+    if hasattr(matrix, 'row_size'):
+        timer.count('lrs_rows', matrix.row_size)
+        timer.record_max('lrs_rows', matrix.row_size)
+        timer.record_max('lrs_cols', matrix.col_size)
+
+
 def get_generators(matrix):
     """
     Given a matrix in H-rep, gets the v-rep
@@ -98,10 +129,12 @@ def get_inequalities(matrix):
     """
     Given a matrix in v-rep, gets the h-rep
     """
+    budget.spend(budget.LRS_CALLS)
+    record_matrix_size(matrix)
     s = str(matrix)
     #timecount.start()
     p = pipes.Template()
-    p.append(lrs_path, "--")
+    p.append(get_lrs_path(), "--")
     p.debug(False)
     t = tempfile.NamedTemporaryFile(mode='r')
     f = p.open(t.name, 'w')
@@ -128,9 +161,11 @@ def redund_and_generate(matrix):
     """
     Uses lrs to remove redundancies before performing v-to-h conversion.
     """
+    budget.spend(budget.LRS_CALLS)
+    record_matrix_size(matrix)
     s = str(matrix)
     p = pipes.Template()
-    p.append(redund_path, "--")
+    p.append(get_redund_path(), "--")
     p.debug(False)
     t = tempfile.NamedTemporaryFile(mode='r')
     f = p.open(t.name, 'w')
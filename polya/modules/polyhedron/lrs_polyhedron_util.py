@@ -16,13 +16,36 @@
 
 import polya.main.terms as terms
 import polya.modules.polyhedron.lrs as lrs
+import polya.util.timer as timer
+import fractions
+import timeit
 
-# where should this go?
-try:
-    import cdd  # This is needed for matrix formatting. Can we get around this?
-except ImportError:
-    cdd = None
-    #pass
+# cdd is needed for matrix formatting. It is imported on first use by get_cdd.
+cdd = None
+cdd_imported = False
+
+
+def get_cdd():
+    """
+    Returns the cdd module, or None if it is not installed.
+    """
+    global cdd, cdd_imported
+    if not cdd_imported:
+        try:
+            import cdd
+        except ImportError:
+            cdd = None
+        cdd_imported = True
+    return cdd
+
+
+# If use_redund is true, and redund is installed, get_vertices removes redundant rows with redund
+# before enumerating vertices.
+use_redund = False
+
+# get_vertices remembers the results for up to vertex_cache_size matrices.
+vertex_cache = {}
+vertex_cache_size = 64
 
 
 def get_vertices(comparison_matrix):
@@ -42,8 +65,72 @@ def get_vertices(comparison_matrix):
 
     Equality rows should be added with linear=True.
     The matrix must contain the row [0, 1, 0, 0, ..., 0] for proper strength information.
+
+    The result is cached, keyed by the matrix in the format given to lrs. The time taken by the
+    enumerations saved by the cache is counted as lrs_time_saved in the current statistics.
+    """
+    key = str(comparison_matrix)
+    if key in vertex_cache:
+        vertices, t = vertex_cache[key]
+        timer.count('vertex_cache_hits')
+        timer.count('lrs_time_saved', t)
+        return vertices
+    timer.count('vertex_cache_misses')
+
+    t = timeit.default_timer()
+    if use_redund and lrs.get_redund_path():
+        vertices = lrs.redund_and_generate(comparison_matrix)
+    else:
+        vertices = lrs.get_generators(comparison_matrix)
+    t = round(timeit.default_timer() - t, 4)
+    timer.count('lrs_time', t)
+    if len(vertex_cache) >= vertex_cache_size:
+        vertex_cache.clear()
+    vertex_cache[key] = (vertices, t)
+    return vertices
+
+
+def normalize_row(row, linear=False):
+    """
+    Returns a tuple of the coefficients row[2:] of a row of an H-format matrix, scaled so that
+    rows that differ by a positive factor have the same tuple, or any nonzero factor if linear is
+    true. Returns None if all the coefficients are zero.
+    """
+    d = next((x for x in row[2:] if x != 0), None)
+    if d is None:
+        return None
+    if not linear:
+        d = abs(d)
+    return tuple(fractions.Fraction(x, d) for x in row[2:])
+
+
+def reduce_rows(inequalities, equalities):
+    """
+    Removes rows of an H-format matrix that are implied by single other rows: repeated equalities
+    and inequalities, up to scaling; weak inequalities implied by a strict one or an equality; and
+    the trivial rows 0 >= 0 and 0 = 0.
+    Returns the reduced lists of inequalities and equalities.
     """
-    return lrs.get_generators(comparison_matrix)
+    eqs, eq_rows = set(), []
+    for row in equalities:
+        key = normalize_row(row, True)
+        if key is not None and key not in eqs:
+            eqs.add(key)
+            eq_rows.append(row)
+
+    position, ineq_rows = {}, []
+    for row in inequalities:
+        key = normalize_row(row)
+        if key is None:
+            if row[1] != 0:
+                ineq_rows.append(row)   # 0 > 0 is kept: it is a contradiction
+        elif key in position:
+            if row[1] != 0:
+                ineq_rows[position[key]] = row
+        elif row[1] != 0 or normalize_row(row, True) not in eqs:
+            position[key] = len(ineq_rows)
+            ineq_rows.append(row)
+    return ineq_rows, eq_rows
 
 
 def create_h_format_matrix(comparisons, num_vars):
@@ -88,10 +175,37 @@ def create_h_format_matrix(comparisons, num_vars):
         else:
             inequalities.append(row)
 
+    return h_format_matrix_of_rows(inequalities, equalities, num_vars)
+
+
+def make_h_row(summands, num_vars, strong=False):
+    """
+    summands is a list of pairs (c, i), representing the sum of the c * ti.
+    Returns the row of an H-format matrix for the inequality sum > 0 if strong, and for
+    sum >= 0, or sum = 0 if the row is used as an equality, otherwise.
+    """
+    row = [0] * (num_vars + 2)
+    row[1] = (-1 if strong else 0)
+    for c, i in summands:
+        row[i + 2] += c
+    return row
+
+
+def h_format_matrix_of_rows(inequalities, equalities, num_vars):
+    """
+    inequalities and equalities are lists of rows, as returned by make_h_row.
+    num_vars is the number of IVars defined.
+    Returns the H-format matrix of the rows, with redundant rows removed.
+    """
+    timer.count('h_rows', len(inequalities) + len(equalities))
+    inequalities, equalities = reduce_rows(inequalities, equalities)
+    timer.count('h_rows_reduced', len(inequalities) + len(equalities))
+
     row = [0]*(num_vars + 2)
     row[1] = 1
     inequalities.append(row)
 
+    cdd = get_cdd()
     matrix = cdd.Matrix(inequalities, number_type='fraction')
     matrix.rep_type = cdd.RepType.INEQUALITY
 
@@ -22,6 +22,7 @@ import polya.util.geometry as geo
 import polya.modules.polyhedron.lrs_polyhedron_util as lrs_util
 import polya.modules.polyhedron.lrs as lrs
 import polya.util.timer as timer
+import polya.util.subst_util as subst_util
 
 
 
@@ -56,36 +57,14 @@ def get_boundary_vertices(vertices):
     if len(vertices) < 2:
         raise VertexSetException('Fewer than two vertices')
 
-    b1 = next(v for v in vertices)
-    l_b1 = geo.line_of_point(b1)
-
-    try:
-        b2 = next(v for v in vertices if not geo.are_collinear_rays(b1, v))
-    except StopIteration:
+    bounds = geo.boundary_rays(list(vertices))
+    if bounds is None:
+        raise VertexSetException('Points not in semicircle.')
+    b1, b2 = bounds
+    if b1 is b2:
         # All vertices point in the same direction.
-        if any(v[2] != 0 for v in vertices):
-            s = (b1[0], b1[1], 1)
-        else:
-            s = (b1[0], b1[1], 0)
+        s = (b1[0], b1[1], 1 if b1[2] != 0 else 0)
         return s, s
-
-    l_b2 = geo.line_of_point(b2)
-    for v in vertices:
-        l_v = geo.line_of_point(v)
-        if geo.fall_on_same_side(l_v, [b1, b2]):
-            if not geo.fall_on_same_side(l_b1, [v, b2]):
-                b1, l_b1 = v, l_v
-            elif not geo.fall_on_same_side(l_b2, [v, b1]):
-                b2, l_b2 = v, l_v
-            elif v[2] != 0:
-                if geo.are_collinear_rays(b1, v):
-                    b1, l_b1 = v, l_v
-                elif geo.are_collinear_rays(b2, v):
-                    b2, l_b2 = v, l_v
-
-    if (not geo.fall_on_same_side(l_b1, vertices)) or (not geo.fall_on_same_side(l_b2, vertices)):
-        raise VertexSetException('Points not in semicircle.')
-
     return b1, b2
 
 
@@ -96,12 +75,14 @@ def get_boundary_vertices(vertices):
 ####################################################################################################
 
 
-def get_2d_comparisons(vertices, lin_set):
+def get_2d_comparisons(vertices, lin_set, indices=None):
     """
     Takes a matrix of vertices. Each row is of the form
      [0, delta, c_0, ..., c_n]
 
     lin_set tracks the linear set for lrs.
+    indices lists the index of the term of each column c_0, ..., c_n. By default, the column c_i
+    is that of t_i.
     Returns all possible TermComparisons from the given vertices.
     """
 
@@ -123,24 +104,28 @@ def get_2d_comparisons(vertices, lin_set):
 
     learned_comparisons = []
 
+    if indices is None:
+        indices = range(len(vertices[0])-2)
+
     # Look for comparisons between t_i and t_j by checking each vertex.
-    for (i, j) in itertools.combinations(range(len(vertices[0])-2), 2):
+    for (ci, cj) in itertools.combinations(range(len(vertices[0])-2), 2):
+        i, j = indices[ci], indices[cj]
         #messages.announce(
             #'Looking for comparisons between {0} and {1}'.format(i, j), messages.DEBUG)
 
         i_j_vertices = set()
         weak = False
         for v in vertices:
-            if v[i+2] != 0 or v[j+2] != 0:
-                i_j_vertices.add((v[i+2], v[j+2], v[1]))
+            if v[ci+2] != 0 or v[cj+2] != 0:
+                i_j_vertices.add((v[ci+2], v[cj+2], v[1]))
             elif v[1] != 0:
                 #(c,0,0) is a vertex, so (c-epsilon,0,0) is reachable.
                 weak = True
 
         for k in lin_set:
             v = vertices[k]
-            if v[i+2] != 0 or v[j+2] != 0:
-                i_j_vertices.add((-v[i+2], -v[j+2], v[1]))
+            if v[ci+2] != 0 or v[cj+2] != 0:
+                i_j_vertices.add((-v[ci+2], -v[cj+2], v[1]))
 
         if (i, j) == (2, 4): messages.announce('vertices:'+str(i_j_vertices), messages.DEBUG)
 
@@ -196,56 +181,76 @@ def get_2d_comparisons(vertices, lin_set):
     return learned_comparisons
 
 
-def get_additive_information(B):
+def get_additive_information(B, subst):
     """
-    Retrieves the relevant information from the blackboard.
+    Retrieves the relevant information from the blackboard, split by the components of B, with
+    each term replaced by the representative of its equality class in the Substitution subst.
+    Returns a list of triples (indices, inequalities, equalities), one for each component that
+    subst_util.additive_components keeps, where indices are the representatives in the component,
+    and inequalities and equalities are rows of an H-format matrix whose columns are the terms
+    with these indices.
     """
-    comparisons = B.get_inequalities() + B.get_equalities()
-
-    for key in B.term_defs:
-        if isinstance(B.term_defs[key], terms.AddTerm):
-            comparisons.append(
-                terms.TermComparison(B.term_defs[key], terms.EQ, terms.IVar(key))
-            )
-
-    return comparisons
+    parts = []
+    for reps, ineqs, eqs in subst_util.additive_components(B, subst):
+        col = dict((i, k) for k, i in enumerate(reps))
+        n = len(reps)
+        inequalities = [lrs_util.make_h_row([(c, col[i]) for (c, i) in summands], n, strong)
+                        for (summands, strong) in ineqs]
+        equalities = [lrs_util.make_h_row([(c, col[i]) for (c, i) in summands], n)
+                      for summands in eqs]
+        parts.append((reps, inequalities, equalities))
+    return parts
 
 
 class PolyAdditionModule:
     def __init__(self):
-        if not lrs.lrs_path:
+        if not lrs.get_lrs_path():
             raise Exception('lrs is needed to instantiate a polyhedron module.')
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Saturates a Blackboard B with additive inferences.
+        If delta is an empty set of new information, B is unchanged since the last run, and
+        there is nothing to do.
         """
+        if delta is not None and len(delta) == 0:
+            return
         timer.start(timer.PADD)
         messages.announce_module('polyhedron additive module')
 
     #    learn_additive_sign_info(blackboard)
 
-        comparisons = get_additive_information(B)
-
-        h_matrix = lrs_util.create_h_format_matrix(comparisons, B.num_terms)
-        messages.announce('Halfplane matrix:', messages.DEBUG)
-        messages.announce(h_matrix, messages.DEBUG)
-        v_matrix, v_lin_set = lrs_util.get_vertices(h_matrix)
-        messages.announce('Vertex matrix:', messages.DEBUG)
-        #messages.announce(str(v_matrix), messages.DEBUG)
-        for l in v_matrix:
-            messages.announce(str(l), messages.DEBUG)
-        messages.announce('Linear set:', messages.DEBUG)
-        messages.announce(str(v_lin_set), messages.DEBUG)
-
-        new_comparisons = get_2d_comparisons(v_matrix, v_lin_set)
-
-        for c in new_comparisons:
-            B.assert_comparison(c)
-
+        subst = subst_util.Substitution(B)
+        with B.batch():
+            for c in subst.equalities():
+                B.assert_comparison(c)
+
+        for indices, inequalities, equalities in get_additive_information(B, subst):
+            timer.record_max('poly_add_component', len(indices))
+            h_matrix = lrs_util.h_format_matrix_of_rows(inequalities, equalities, len(indices))
+            messages.announce('Halfplane matrix:', messages.DEBUG)
+            messages.announce(h_matrix, messages.DEBUG)
+            v_matrix, v_lin_set = lrs_util.get_vertices(h_matrix)
+            messages.announce('Vertex matrix:', messages.DEBUG)
+            #messages.announce(str(v_matrix), messages.DEBUG)
+            for l in v_matrix:
+                messages.announce(str(l), messages.DEBUG)
+            messages.announce('Linear set:', messages.DEBUG)
+            messages.announce(str(v_lin_set), messages.DEBUG)
+
+            new_comparisons = get_2d_comparisons(v_matrix, v_lin_set, indices)
+
+            with B.batch():
+                for c in new_comparisons:
+                    for c1 in subst.expand_comparison(c):
+                        B.assert_comparison(c1)
+
+        with B.batch():
+            for c in B.component_comparisons():
+                B.assert_comparison(c)
         timer.stop(timer.PADD)
 
-    def get_split_weight(self, B):
+    def get_split_weight(self, B, changed=None):
         return None
 
 
@@ -15,7 +15,7 @@
 ####################################################################################################
 
 import polya.main.terms as terms
-#import polya.main.blackboard as blackboard
+import polya.main.blackboard as blackboard
 import polya.main.messages as messages
 import polya.modules.polyhedron.lrs_polyhedron_util as lrs_util
 import polya.modules.polyhedron.lrs as lrs
@@ -23,11 +23,7 @@ import polya.modules.polyhedron.lrs as lrs
 import polya.util.num_util as num_util
 import polya.util.timer as timer
 import polya.util.mul_util as mul_util
-
-try:
-    import cdd
-except ImportError:
-    cdd = None
+import polya.util.geometry as geo
 
 import fractions
 #import math
@@ -40,6 +36,82 @@ import itertools
 ####################################################################################################
 
 
+def normalize_generator(row, linear=False):
+    """
+    Returns a tuple representing the same generator as row, [b, x_1, ..., x_n], so that
+    generators that differ by a scale factor have the same tuple: points are scaled to b = 1, and
+    rays to make the first nonzero entry 1 or -1. If linear is true, the row stands for a line,
+    and the first nonzero entry is made 1. Returns None if row is a zero ray or line.
+    A row of integers, as lrs mostly returns, is instead divided by the gcd of its entries, and
+    negated if the entry that would be made 1 is negative, which avoids building Fractions.
+    """
+    if row[0] != 0:
+        d = row[0]
+    else:
+        d = next((x for x in row if x != 0), None)
+        if d is None:
+            return None
+        if not linear:
+            d = abs(d)
+    if all(type(x) in (int, long) for x in row):
+        g = reduce(num_util.gcd, [abs(x) for x in row if x != 0])
+        if d < 0:
+            g = -g
+        return tuple(x // g for x in row)
+    return tuple(fractions.Fraction(x, d) for x in row)
+
+
+def project_generators(rows, lin_rows, cols):
+    """
+    Projects the generators rows and lin_rows, the rows standing for lines, onto the columns
+    cols, followed by the prime columns, which have already been split off into the last entry
+    of each row. Duplicate generators and zero rays and lines are dropped, since they do not
+    change the projected polyhedron.
+    Returns a pair of lists of rows: the generators and the lines.
+    """
+    def project(rs, linear):
+        seen, projected = set(), []
+        for r in rs:
+            p = [r[c] for c in cols] + r[-1]
+            key = normalize_generator(p, linear)
+            if key is not None and key not in seen:
+                seen.add(key)
+                projected.append(p)
+        return projected
+
+    base, lin = project(rows, False), project(lin_rows, True)
+    if len(base) == 0:
+        # A zero ray changes nothing, but keeps the matrix of generators nonempty.
+        base = [[0] * (len(cols) + len((rows + lin_rows)[0][-1]))]
+    timer.count('cdd_rows_dropped', len(rows) + len(lin_rows) - len(base) - len(lin))
+    return base, lin
+
+
+def projection_inequalities(base_matrix, lin_matrix):
+    """
+    Takes the generators and lines of a projected cone, as returned by project_generators.
+    Returns a list of pairs (c, linear), where c = [c_0, c_1, ..., c_n] is the inequality
+    c_0 + c_1 * x_1 + ... + c_n * x_n >= 0, and linear is true if it is an equality.
+    A cone in the plane is computed directly; otherwise cdd is used.
+    """
+    if len(base_matrix[0]) == 3 and all(r[1] == r[2] == 0 for r in base_matrix if r[0] != 0):
+        points = ([(r[1], r[2]) for r in base_matrix if r[0] == 0] +
+                  [(r[1], r[2]) for r in lin_matrix] + [(-r[1], -r[2]) for r in lin_matrix])
+        ineqs, eqs = geo.cone_inequalities(points)
+        return [([0, a, b], False) for (a, b) in ineqs] + [([0, a, b], True) for (a, b) in eqs]
+
+    cdd = lrs_util.get_cdd()
+    matrix = cdd.Matrix(base_matrix, number_type='fraction')
+    matrix.rep_type = cdd.RepType.GENERATOR
+    if lin_matrix:
+        matrix.extend(lin_matrix, linear=True)
+
+    timer.count('cdd_calls')
+    timer.record_max('cdd_rows', matrix.row_size)
+    ineqs = cdd.Polyhedron(matrix).get_inequalities()
+    return [(ineqs[ind], ind in ineqs.lin_set) for ind in range(len(ineqs))]
+
+
 def get_mul_comparisons(vertices, lin_set, num_vars, prime_of_index):
     """
     Returns a list of objects of the form (m1, m2, const, comp),
@@ -50,19 +122,15 @@ def get_mul_comparisons(vertices, lin_set, num_vars, prime_of_index):
         p = terms.MulPair(terms.IVar(0), 1)
         return [(p, p, 1, terms.LT)]
     new_comparisons = []
+    # Split off the prime columns, which are shared by every projection, once.
+    lin_set = set(lin_set)
+    split = [v[:num_vars+2] + [v[num_vars+2:]] for v in vertices]
+    rows = [split[k] for k in range(len(vertices)) if k not in lin_set]
+    lin_rows = [split[k] for k in sorted(lin_set)]
     for (i, j) in itertools.combinations(range(num_vars), 2):
-        base_matrix = [[vertices[k][0], vertices[k][i+2], vertices[k][j+2]]
-                       + vertices[k][num_vars+2:] for k in range(len(vertices)) if k not in lin_set]
-        matrix = cdd.Matrix(base_matrix, number_type='fraction')
-        matrix.rep_type = cdd.RepType.GENERATOR
-        for k in lin_set:
-            matrix.extend([[vertices[k][0], vertices[k][i+2], vertices[k][j+2]]
-                           + vertices[k][num_vars+2:]], linear=True)
-
-        ineqs = cdd.Polyhedron(matrix).get_inequalities()
-
-        for ind in range(len(ineqs)):
-            c = ineqs[ind]
+        base_matrix, lin_matrix = project_generators(rows, lin_rows, [0, i+2, j+2])
+
+        for c, linear in projection_inequalities(base_matrix, lin_matrix):
             if c[2] == c[1] == 0:  # no comp
                 continue
             strong = not any(
@@ -92,7 +160,7 @@ def get_mul_comparisons(vertices, lin_set, num_vars, prime_of_index):
             if skip:
                 continue
 
-            if ind in ineqs.lin_set:
+            if linear:
                 new_comp = terms.EQ
             else:
                 new_comp = terms.GT if strong else terms.GE
@@ -103,25 +171,66 @@ def get_mul_comparisons(vertices, lin_set, num_vars, prime_of_index):
     return new_comparisons
 
 
-def add_of_mul_comps(m_comparisons, num_terms):
+class PrimeTable:
+    """
+    Numbers the prime factors of multiplicative constants in the order they are first seen. Each
+    problem only has IVars for the primes that occur in its comparisons: the log of the k-th of
+    these, in the order of their numbers, is IVar(num_terms + k), where num_terms is the number of
+    terms of the blackboard. A PolyMultiplicationModule keeps one table for its whole life, so
+    that the primes keep their order in every pass, while the matrices only grow with the primes
+    of the current problem.
+    """
+
+    def __init__(self):
+        self.number = {}        # maps a prime to its number
+
+    def number_of(self, p):
+        if p not in self.number:
+            self.number[p] = len(self.number)
+        return self.number[p]
+
+    def columns(self, used, num_terms):
+        """
+        Returns a dictionary mapping each prime in used, which must all have numbers, to the index
+        of the IVar for its log.
+        """
+        return dict((p, num_terms + k) for k, p in enumerate(sorted(used, key=self.number.get)))
+
+    def order_comparisons(self, columns):
+        """
+        Returns the list of pairs (t, terms.GT), with t > 0 saying that the log of a prime in
+        columns is less than the log of the next larger one.
+        """
+        by_size = sorted(columns)
+        return [(terms.IVar(columns[p2]) - terms.IVar(columns[p1]), terms.GT)
+                for p1, p2 in zip(by_size, by_size[1:])]
+
+
+def add_of_mul_comps(m_comparisons, num_terms, primes=None):
     """
     Takes a list of multiplicative comparisons.
-    Returns [(t, comp)], poi, iop, new_num_terms
+    Returns [(t, comp)], poi, new_num_terms
     Where each t is a sum of IVars with t comp 0, poi is primes of index
     And new_num_terms is the number of IVars 0 ... n-1
+    primes is the PrimeTable numbering the primes; if it is None, a new one is used.
     """
-    # todo: is there a more elegant way to do this?
-    class indstore:
-        i = num_terms
+    if primes is None:
+        primes = PrimeTable()
 
-    index_of_prime = {}  # maps a prime factor to the index of its IVar
+    # the primes of the constants that are used below
+    used = set()
+    for c in m_comparisons:
+        if isinstance(c.term2, terms.STerm) and (c.comp == terms.EQ or c.term2.coeff >= 0):
+            const = fractions.Fraction(c.term2.coeff)
+            for n in [const.numerator, const.denominator]:
+                if n != 1:
+                    for q in num_util.factorization(n):
+                        primes.number_of(q)
+                        used.add(q)
+    columns = primes.columns(used, num_terms)
 
     def index_of(p):
-        if p in index_of_prime:
-            return index_of_prime[p]
-        index_of_prime[p] = indstore.i
-        indstore.i += 1
-        return indstore.i - 1
+        return columns[p]
 
     a_comparisons = []
 
@@ -178,33 +287,106 @@ def add_of_mul_comps(m_comparisons, num_terms):
                     t += fac[i] * terms.IVar(index_of(i))
             a_comparisons.append((t, c.comp))
 
-    plist = sorted(index_of_prime.keys())
-    for i in range(len(plist)-1):
-        a_comparisons.append((terms.IVar(index_of_prime[plist[i+1]])
-                              - terms.IVar(index_of_prime[plist[i]]), terms.GT))
-    prime_of_index = dict((value, key) for key, value in index_of_prime.iteritems())
-    return a_comparisons, prime_of_index, indstore.i
+    a_comparisons.extend(primes.order_comparisons(columns))
+    return a_comparisons, dict((i, p) for p, i in columns.items()), num_terms + len(columns)
+
+
+def blackboard_facts(B):
+    """
+    Returns the facts stored in B, as a tuple of frozensets of numeric tuples: the comparisons
+    (i, comp, coeff, j) returned by mul_util.get_pair_comparisons, the disequalities (i, coeff, j),
+    the comparisons (i, comp) with 0, and the indices known to be equal and not equal to 0.
+    """
+    return (frozenset(mul_util.get_pair_comparisons(B)),
+            frozenset((i, c, j) for (i, j), coeffs in B.disequalities.items() for c in coeffs),
+            frozenset(B.zero_inequalities.items()),
+            frozenset(B.zero_equalities),
+            frozenset(B.zero_disequalities))
+
+
+def facts_comparisons(facts):
+    """
+    Takes a tuple of frozensets as returned by blackboard_facts, and returns the TermComparisons
+    they represent.
+    """
+    pairs, diseqs, zero_ineqs, zero_eqs, zero_diseqs = facts
+    comparisons = [terms.comp_eval[comp](terms.IVar(i), coeff * terms.IVar(j))
+                   for (i, comp, coeff, j) in pairs]
+    comparisons.extend(terms.IVar(i) != coeff * terms.IVar(j) for (i, coeff, j) in diseqs)
+    comparisons.extend(terms.comp_eval[comp](terms.IVar(i), 0) for (i, comp) in zero_ineqs)
+    comparisons.extend(terms.IVar(i) == 0 for i in zero_eqs)
+    comparisons.extend(terms.IVar(i) != 0 for i in zero_diseqs)
+    return comparisons
+
+
+def problem_key(B, facts):
+    """
+    Returns a hashable key for a round of the module on B, given facts = blackboard_facts(B).
+    The key consists of the multiplicative definitions of the terms of B, the comparisons between
+    pairs of terms that the round uses, which are those where one of the terms is multiplicative
+    or both have a known sign, and the comparisons with 0 that the round uses, which are the known
+    signs of all terms and every comparison with 0 of the terms occurring in a definition or in a
+    comparison with a multiplicative term.
+    """
+    mul_inds = [i for i in range(B.num_terms) if isinstance(B.term_defs[i], terms.MulTerm)]
+    definitions = tuple((i, tuple((p.term.index, p.exponent) for p in B.term_defs[i].args))
+                        for i in mul_inds)
+    used = set(mul_inds) | B.mul_args
+    mul_pairs = [c for c in facts[0] if c[0] in mul_inds or c[3] in mul_inds]
+    used.update(i for c in mul_pairs for i in (c[0], c[3]))
+    signs = [c for c in facts[0] if B.sign(c[0]) != 0 and B.sign(c[3]) != 0]
+    _, _, zero_ineqs, zero_eqs, zero_diseqs = facts
+    return (B.num_terms, definitions, frozenset(mul_pairs + signs),
+            frozenset((i, comp) for (i, comp) in zero_ineqs
+                      if i in used or comp in (terms.GT, terms.LT)),
+            frozenset(i for i in zero_eqs if i in used),
+            frozenset(i for i in zero_diseqs if i in used))
+
+
+# the number of problems whose results a PolyMultiplicationModule remembers
+cache_size = 64
 
 
 class PolyMultiplicationModule:
     def __init__(self):
-        if not lrs.lrs_path:
+        if not lrs.get_lrs_path():
             raise Exception('lrs is needed to instantiate a polyhedron module.')
+        self.primes = PrimeTable()
+        self.cache = {}     # maps a problem_key to the comparisons learned in the round
 
-    def update_blackboard(self, B):
+    def update_blackboard(self, B, delta=None):
         """
         Saturates a Blackboard B with multiplicative inferences.
+        If delta is a set of indices and pairs with new information, sign information is only
+        derived for terms affected by it.
+        If a round was run before on the same problem_key, the facts it learned are asserted
+        again, and the round is skipped.
         """
+        if delta is not None and len(delta) == 0:
+            return
         timer.start(timer.PMUL)
         messages.announce_module('polyhedron multiplicative module')
-        mul_util.derive_info_from_definitions(B)
-
-        mul_util.preprocess_cancellations(B)
+        facts = blackboard_facts(B)
+        key = problem_key(B, facts)
+        if key in self.cache:
+            # The same round was run before, in this branch or another.
+            timer.count('pmul_cache_hits')
+            with B.batch():
+                for c in self.cache[key]:
+                    B.assert_comparison(c)
+            timer.stop(timer.PMUL)
+            return
+        timer.count('pmul_cache_misses')
+
+        changed = blackboard.new_info_indices(delta) if delta is not None else None
+        mul_util.derive_info_from_definitions(B, changed)
+
+        mul_util.preprocess_cancellations(B, changed)
 
         m_comparisons = mul_util.get_multiplicative_information(B)
         # Each ti in m_comparisons really represents |t_i|.
 
-        p = add_of_mul_comps(m_comparisons, B.num_terms)
+        p = add_of_mul_comps(m_comparisons, B.num_terms, self.primes)
         a_comparisons, prime_of_index, num_terms = p
         a_comparisons = [terms.comp_eval[c[1]](c[0], 0) for c in a_comparisons]
 
@@ -221,16 +403,28 @@ class PolyMultiplicationModule:
         new_comparisons = get_mul_comparisons(v_matrix, v_lin_set,
                                               B.num_terms, prime_of_index)
 
-
-        for m1, m2, coeff, comp in new_comparisons:
-            c = mul_util.process_mul_comp(m1, m2, coeff, comp, B)
-            if c is not None:
-                B.assert_comparison(c)
+        self.assert_comparisons(new_comparisons, B)
+        if B.num_terms == key[0]:
+            # the round learned the facts of B that are new since it started
+            if len(self.cache) >= cache_size:
+                self.cache.clear()
+            self.cache[key] = facts_comparisons(
+                tuple(f - f0 for f, f0 in zip(blackboard_facts(B), facts)))
         timer.stop(timer.PMUL)
 
+    def assert_comparisons(self, new_comparisons, B):
+        """
+        Asserts to B the comparisons (m1, m2, const, comp) returned by get_mul_comparisons.
+        """
+        with B.batch():
+            for m1, m2, coeff, comp in new_comparisons:
+                c = mul_util.process_mul_comp(m1, m2, coeff, comp, B)
+                if c is not None:
+                    B.assert_comparison(c)
+
 
-    def get_split_weight(self, B):
-        return mul_util.get_split_weight(B)
+    def get_split_weight(self, B, changed=None):
+        return mul_util.get_split_weight(B, changed)
 
 
 
@@ -0,0 +1,166 @@
+####################################################################################################
+#
+# simplex/simplex_add_module.py
+#
+# The routine for learning facts about additive terms with an exact rational simplex method.
+#
+# The additive information in a component of the blackboard is a homogeneous linear system in
+# the representatives of its terms, as in the other additive modules. Its solutions, projected to
+# the plane of ti and tj, form a cone, which determines what there is to learn about ti and tj.
+# The cone is found from the extreme values of tj on the lines ti = 1 and ti = -1, and from
+# whether (0, 1) and (0, -1) are solutions with ti = 0; each of these takes one linear program.
+# A comparison a*ti + b*tj >= 0 bounding the cone is strict unless a solution of the system,
+# with the strict inequalities, lies on the line a*ti + b*tj = 0. This is decided by maximizing
+# a variable delta that is subtracted from the strict inequalities.
+#
+# Only the pairs of interest are considered.
+#
+####################################################################################################
+
+import polya.main.terms as terms
+import polya.main.messages as messages
+import polya.util.geometry as geo
+import polya.util.subst_util as subst_util
+import polya.util.timer as timer
+import polya.modules.simplex.simplex_util as simplex_util
+
+
+class AdditiveProblem(object):
+    """
+    The linear problem of one component, in the representatives indices.
+    The programs built from it have the columns:
+     -- ('+', i) and ('-', i), the positive and negative parts of ti
+     -- ('s', summands, strong), the slack of each inequality
+     -- 'delta' and 'delta_slack', in the programs that test strictness, with delta <= 1
+    bases is a dictionary, shared between rounds, mapping a key for each program to the basis
+    that last solved it.
+    """
+
+    def __init__(self, indices, inequalities, equalities, bases):
+        self.indices = indices
+        self.bases = bases
+        ineqs = dict((('s', tuple(summands), strong), (summands, strong))
+                     for summands, strong in inequalities)
+        self.rows = [(ineqs[k][0], k, ineqs[k][1]) for k in sorted(ineqs)]
+        self.rows.extend((summands, None, False) for summands in equalities)
+
+    def program(self, extra, delta=False):
+        """
+        extra is a list of pairs (summands, v), each standing for the equation sum = v.
+        Returns the LinearProgram of the problem with these equations. If delta is true, delta is
+        subtracted from each strict inequality.
+        """
+        n = len(self.rows) + len(extra)
+        lp = simplex_util.LinearProgram(n + (1 if delta else 0))
+        entries = dict((i, {}) for i in self.indices)
+        for r, (summands, v) in enumerate([(s, 0) for (s, _, _) in self.rows] + extra):
+            for c, i in summands:
+                if i in entries:
+                    entries[i][r] = c
+            lp.set_rhs(r, v)
+        for i in self.indices:
+            lp.add_column(('+', i), entries[i])
+            lp.add_column(('-', i), dict((r, -c) for r, c in entries[i].items()))
+        for r, (_, slack, strong) in enumerate(self.rows):
+            if slack is not None:
+                lp.add_column(slack, {r: -1})
+        if delta:
+            column = dict((r, -1) for r, (_, slack, strong) in enumerate(self.rows) if strong)
+            column[n] = 1
+            lp.add_column('delta', column)
+            lp.add_column('delta_slack', {n: 1})
+            lp.set_rhs(n, 1)
+        return lp
+
+    def solve(self, key, lp, objective, start=None):
+        """
+        Solves lp, warm-started from start or else from the last basis stored for key.
+        """
+        sol = lp.solve(objective, start or self.bases.get(key))
+        if sol.basis is not None:
+            self.bases[key] = sol.basis
+        return sol
+
+    def feasible(self):
+        """
+        Returns False if the system, with its strict inequalities, has no solution.
+        """
+        lp = self.program([], delta=True)
+        return self.solve(('feasible', tuple(self.indices)), lp, {'delta': 1}).value > 0
+
+    def pair_comparisons(self, i, j, B):
+        """
+        Returns the comparisons between ti and tj that bound the projection of the solutions.
+        Strictness is only tested for comparisons whose strict form B does not already imply.
+        """
+        points = []
+        for s in (1, -1):
+            lp = self.program([([(1, i)], s)])
+            upper = self.solve(('max', i, j, s), lp, {('+', j): 1, ('-', j): -1})
+            if upper.status == simplex_util.INFEASIBLE:
+                continue
+            lower = self.solve(('min', i, j, s), lp, {('+', j): -1, ('-', j): 1}, upper.basis)
+            for sol, sign in ((upper, 1), (lower, -1)):
+                if sol.status == simplex_util.UNBOUNDED:
+                    points.append((0, sign))
+                else:
+                    points.append((s, sign * sol.value))
+            if upper.status == lower.status == simplex_util.UNBOUNDED:
+                # the whole line ti = s is a solution
+                points.append((s, 0))
+        for sign in (1, -1):
+            if (0, sign) not in points:
+                lp = self.program([([(1, i)], 0), ([(1, j)], sign)])
+                if self.solve(('ray', i, j, sign), lp, {}).status != simplex_util.INFEASIBLE:
+                    points.append((0, sign))
+
+        ineqs, eqs = geo.cone_inequalities(points)
+        comparisons = [a * terms.IVar(i) == -b * terms.IVar(j) for (a, b) in eqs]
+        for a, b in ineqs:
+            c = a * terms.IVar(i) > -b * terms.IVar(j)
+            if not B.implies_comparison(c):
+                lp = self.program([([(a, i), (b, j)], 0)], delta=True)
+                if self.solve(('strict', i, j, a, b), lp, {'delta': 1}).value != 0:
+                    c = a * terms.IVar(i) >= -b * terms.IVar(j)
+            comparisons.append(c)
+        return comparisons
+
+
+class SimplexAdditionModule:
+
+    def __init__(self):
+        self.bases = {}
+
+    def update_blackboard(self, B, delta=None):
+        """
+        Learns comparisons between the pairs of interest from the additive information in B, and
+        asserts them to B.
+        If delta is an empty set of new information, B is unchanged since the last run, and
+        there is nothing to do.
+        """
+        if delta is not None and len(delta) == 0:
+            return
+        timer.start(timer.SADD)
+        messages.announce_module('simplex additive module')
+        subst = subst_util.Substitution(B)
+        with B.batch():
+            for c in subst.equalities():
+                B.assert_comparison(c)
+            for indices, inequalities, equalities in subst_util.additive_components(B, subst):
+                timer.record_max('simplex_add_component', len(indices))
+                problem = AdditiveProblem(indices, inequalities, equalities, self.bases)
+                if not problem.feasible():
+                    messages.announce('Contradiction from the additive problem in {0}.'.format(
+                        ', '.join('t{0}'.format(i) for i in indices)), messages.DEBUG)
+                    B.raise_contradiction(0, terms.EQ, 0, 0)
+                for i, j in simplex_util.pairs_of_interest(B, indices, subst.rep):
+                    for c in problem.pair_comparisons(i, j, B):
+                        for c1 in subst.expand_comparison(c):
+                            B.assert_comparison(c1)
+            pairs = set(simplex_util.pairs_of_interest(B, range(B.num_terms)))
+            for c in B.component_comparisons(pairs):
+                B.assert_comparison(c)
+        timer.stop(timer.SADD)
+
+    def get_split_weight(self, B, changed=None):
+        return None
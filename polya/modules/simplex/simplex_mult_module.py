@@ -0,0 +1,180 @@
+####################################################################################################
+#
+# simplex/simplex_mult_module.py
+#
+# The routine for learning facts about multiplicative terms with an exact rational simplex method.
+#
+# The multiplicative information is read as in the Fourier-Motzkin module, as comparisons
+# c * t1^e1 * ... * tn^en > 1 (or >= 1, or = 1) between absolute values. Taking logs, these are
+# linear in the logs of the terms, and a comparison of ti^a * tj^b with a constant follows from
+# them exactly when it is a nonnegative combination of them, with weights y. This module finds
+# the weights by a linear program, for a few directions (a, b) and each pair of interest: the
+# equations make the exponents of the combination those of ti^a * tj^b, and the objective is to
+# make the constant of the combination as small as possible, which is the strongest fact.
+#
+# The objective needs the logs of the constants, which are only approximated. This only affects
+# which combination is chosen: every combination found is valid, and its constant is computed
+# exactly from the weights.
+#
+####################################################################################################
+
+import polya.main.terms as terms
+import polya.main.messages as messages
+import polya.main.blackboard as blackboard
+import polya.modules.fourier_motzkin.fm_mult_module as fm_mult_module
+import polya.modules.simplex.simplex_util as simplex_util
+import polya.util.mul_util as mul_util
+import polya.util.num_util as num_util
+import polya.util.timer as timer
+import fractions
+import math
+
+
+# the directions (a, b) for which ti^a * tj^b is compared with a constant
+pair_directions = [(1, -1), (-1, 1), (1, 1), (-1, -1)]
+
+# combinations that need an exponent larger than this are skipped
+max_exponent = 64
+
+# the bonus in the objective for using strict comparisons, to prefer strict results
+strict_bonus = fractions.Fraction(1, 10**9)
+
+
+def approx_log(c):
+    """
+    Returns a fraction close to the log of the positive fraction c.
+    """
+    c = fractions.Fraction(c)
+    return fractions.Fraction(math.log(c.numerator) - math.log(c.denominator)).limit_denominator(
+        10**6)
+
+
+class MultiplicativeProblem(object):
+    """
+    The comparisons of one component, with a column of weights for each: ('c', k) for the k-th
+    comparison, and ('+', k) and ('-', k) for the k-th equality, used in either direction.
+    The programs have a row for each index in indices other than 0, whose log is 0.
+    bases is a dictionary, shared between rounds, mapping a key for each program to the basis
+    that last solved it.
+    """
+
+    def __init__(self, indices, equalities, comparisons, bases):
+        self.indices = [i for i in indices if i != 0]
+        self.bases = bases
+        # each fact is (key, product, strong); the product is c * t1^e1 * ... * tn^en
+        self.facts = [(('c', k), c.term, c.strong) for k, c in enumerate(comparisons)]
+        for k, e in enumerate(equalities):
+            self.facts.append((('+', k), e, False))
+            self.facts.append((('-', k), e ** -1, False))
+
+    def program(self, exps, normalize=False):
+        """
+        exps maps indices to exponents. Returns the LinearProgram asking for weights that give
+        the product of the ti^exps[i] and a constant, and its objective. If normalize is true,
+        the weights must also add up to 1.
+        """
+        row = dict((i, r) for r, i in enumerate(self.indices))
+        n = len(self.indices)
+        lp = simplex_util.LinearProgram(n + (1 if normalize else 0))
+        for i in exps:
+            lp.set_rhs(row[i], exps[i])
+        objective = {}
+        for key, p, strong in self.facts:
+            column = dict((row[m.index], m.exp) for m in p.args if m.index != 0)
+            if normalize:
+                column[n] = 1
+            lp.add_column(key, column)
+            objective[key] = -approx_log(p.coeff) + (strict_bonus if strong else 0)
+        if normalize:
+            lp.set_rhs(n, 1)
+        return lp, objective
+
+    def combine(self, sol):
+        """
+        Takes the Solution of a program. Returns the OneComparison c * t1^e1 * ... > 1 or >= 1
+        that is the combination of the facts with its weights, raised to the least power that
+        makes all the exponents integers, or None if that power is too large.
+        """
+        weights = [(p, strong, sol[key]) for key, p, strong in self.facts if sol[key] != 0]
+        scale = int(num_util.lcmm([w.denominator for (_, _, w) in weights]))
+        if scale > max_exponent or any(abs(w * scale) > max_exponent for (_, _, w) in weights):
+            return None
+        product = fm_mult_module.Product(1, [])
+        for p, strong, w in weights:
+            product = product * p ** int(w * scale)
+        product.args = [m for m in product.args if m.index != 0 and m.exp != 0]
+        return fm_mult_module.OneComparison(product, any(strong for (_, strong, _) in weights))
+
+    def solve(self, key, lp, objective):
+        sol = lp.solve(objective, self.bases.get(key))
+        if sol.basis is not None:
+            self.bases[key] = sol.basis
+        return sol
+
+    def contradiction(self):
+        """
+        Returns a OneComparison with no terms that is false, if one is a combination of the facts,
+        and None otherwise.
+        """
+        lp, objective = self.program({}, normalize=True)
+        sol = self.solve(('contradiction', tuple(self.indices)), lp, objective)
+        if sol.status != simplex_util.OPTIMAL:
+            return None
+        c = self.combine(sol)
+        if c is None or c.term.coeff > 1 or (c.term.coeff == 1 and not c.strong):
+            return None
+        return c
+
+    def bounds(self, exps):
+        """
+        exps maps one or two indices to exponents. Returns the strongest comparison of the product
+        of the ti^exps[i] with a constant that the program finds, or None.
+        """
+        lp, objective = self.program(exps)
+        sol = self.solve(('bound', tuple(sorted(exps.items()))), lp, objective)
+        if sol.status != simplex_util.OPTIMAL:
+            return None
+        return self.combine(sol)
+
+
+class SimplexMultiplicationModule:
+
+    def __init__(self):
+        self.bases = {}
+
+    def update_blackboard(self, B, delta=None):
+        """
+        Learns sign information, and comparisons between the pairs of interest, from the
+        multiplicative information in B, and asserts them to B.
+        If delta is a set of indices and pairs with new information, sign information is only
+        derived for terms affected by it.
+        """
+        if delta is not None and len(delta) == 0:
+            return
+        timer.start(timer.SMUL)
+        messages.announce_module('simplex multiplicative module')
+        changed = blackboard.new_info_indices(delta) if delta is not None else None
+        mul_util.derive_info_from_definitions(B, changed)
+        mul_util.preprocess_cancellations(B, changed)
+        eqs, comps = fm_mult_module.get_multiplicative_information(B)
+        eqs = [e for e in eqs if not fm_mult_module.trivial_eq(e)]
+        comps = [c for c in comps if not fm_mult_module.trivial_ineq(c)]
+        eq_parts = B.split_by_component(eqs, lambda e: [m.index for m in e.args])
+        comp_parts = B.split_by_component(comps, lambda c: [m.index for m in c.term.args])
+        for (indices, c_eqs), (_, c_comps) in zip(eq_parts, comp_parts):
+            # with only one term besides t0, everything there is to learn is stored in B
+            if len(indices) <= 2:
+                continue
+            timer.record_max('simplex_mul_component', len(indices))
+            problem = MultiplicativeProblem(indices, c_eqs, c_comps, self.bases)
+            learned = [problem.contradiction()]
+            for i, j in simplex_util.pairs_of_interest(B, indices):
+                if i == 0:
+                    learned.extend(problem.bounds({j: e}) for e in (1, -1))
+                else:
+                    learned.extend(problem.bounds({i: a, j: b}) for (a, b) in pair_directions)
+            fm_mult_module.assert_comparisons_to_blackboard([], [c for c in learned if c], B)
+        timer.stop(timer.SMUL)
+
+    def get_split_weight(self, B, changed=None):
+        return mul_util.get_split_weight(B, changed)
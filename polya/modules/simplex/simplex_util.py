@@ -0,0 +1,322 @@
+####################################################################################################
+#
+# simplex/simplex_util.py
+#
+# An exact rational simplex method, shared by the simplex additive and multiplicative modules.
+#
+# A LinearProgram asks to maximize c . y subject to A y = b and y >= 0. Its columns are named by
+# keys, which are used to describe solutions and bases. solve uses the two-phase simplex method
+# with Bland's rule, so it always terminates. The tableau is dense, and each of its rows is kept
+# as a list of integers with no common factor, which is much faster than a row of Fractions.
+#
+# solve returns the final basis as a list of column keys. Given back to solve as the start of a
+# later program, the columns of that basis are pivoted in first, and the first phase is skipped if
+# they form a feasible basis. The modules use this to warm-start each program from the basis
+# that solved it in the previous round, or from the last program solved on the same rows.
+#
+# Rather than compute every comparison between every pair of terms, the simplex modules only
+# look at the pairs of interest, found by pairs_of_interest: the pairs that the other modules and
+# the case splits can use.
+#
+####################################################################################################
+
+import fractions
+import itertools
+import polya.main.terms as terms
+import polya.util.timer as timer
+import polya.util.budget as budget
+import polya.util.num_util as num_util
+
+
+OPTIMAL, INFEASIBLE, UNBOUNDED = range(3)
+
+
+class Solution(object):
+    """
+    The result of solving a LinearProgram.
+     -- status: OPTIMAL, INFEASIBLE or UNBOUNDED.
+     -- value: the optimal value, if status is OPTIMAL.
+     -- values: a dictionary mapping the keys of the basic columns to their values.
+     -- basis: the keys of the final basis, or None if the program is infeasible.
+    """
+
+    def __init__(self, status, value=None, values=None, basis=None):
+        self.status, self.value, self.basis = status, value, basis
+        self.values = values if values is not None else {}
+
+    def __getitem__(self, key):
+        return self.values.get(key, 0)
+
+
+class LinearProgram(object):
+    """
+    The program maximize c . y subject to A y = b and y >= 0, with num_rows equations.
+    """
+
+    def __init__(self, num_rows):
+        self.num_rows = num_rows
+        self.keys = []      # the key of each column
+        self.index = {}     # maps each key to the number of its column
+        self.columns = []   # each column is a dictionary mapping rows to nonzero entries
+        self.rhs = [fractions.Fraction(0)] * num_rows
+        self.tableau = None  # the rows built by make_tableau, kept until the program changes
+
+    def add_column(self, key, entries):
+        """
+        Adds a column named key, where entries is a dictionary mapping row numbers to coefficients.
+        """
+        self.tableau = None
+        self.index[key] = len(self.keys)
+        self.keys.append(key)
+        self.columns.append(dict((r, fractions.Fraction(c)) for r, c in entries.items() if c != 0))
+
+    def set_rhs(self, r, v):
+        self.tableau = None
+        self.rhs[r] = fractions.Fraction(v)
+
+    def make_tableau(self):
+        """
+        Returns the rows [A_r, b_r] of the tableau, scaled to integers, with b_r >= 0.
+        """
+        if self.tableau is None:
+            n = len(self.keys)
+            rows = [[0] * n + [self.rhs[r]] for r in range(self.num_rows)]
+            for c, column in enumerate(self.columns):
+                for r, x in column.items():
+                    rows[r][c] = x
+            self.tableau = [integer_row(row, -1 if row[-1] < 0 else 1) for row in rows]
+        return [list(row) for row in self.tableau]
+
+    def solve(self, objective, start=None):
+        """
+        objective is a dictionary mapping keys to coefficients.
+        start is a list of keys, or None. If its columns form a feasible basis, after pivoting
+        them in, the first phase is skipped.
+        Returns a Solution.
+        """
+        timer.count('simplex_solves')
+        t = Tableau(self.make_tableau(), len(self.keys))
+        if not (start and t.warm_start([self.index[k] for k in start if k in self.index])):
+            t = Tableau(self.make_tableau(), len(self.keys))
+            if not t.phase_one():
+                return Solution(INFEASIBLE)
+        else:
+            timer.count('simplex_warm_starts')
+        cost = [0] * len(self.keys)
+        for k in objective:
+            if k in self.index:
+                cost[self.index[k]] = fractions.Fraction(objective[k])
+        bounded = t.optimize(cost)
+        basis = [self.keys[c] for c in t.basis]
+        if not bounded:
+            return Solution(UNBOUNDED, basis=basis)
+        values = dict((self.keys[c], fractions.Fraction(row[-1], row[c]))
+                      for row, c in zip(t.rows, t.basis))
+        value = sum(cost[self.index[k]] * values[k] for k in values)
+        return Solution(OPTIMAL, value, values, basis)
+
+
+def integer_row(row, sign=1):
+    """
+    Returns the list of integers proportional to the list of integers and fractions row, times
+    sign, with no common factor.
+    """
+    scale = sign * num_util.lcmm([x.denominator for x in row if x != 0])
+    return reduce_row([x.numerator * (scale // x.denominator) for x in row])
+
+
+def reduce_row(row):
+    """
+    Divides the list of integers row by the gcd of its entries.
+    """
+    g = 0
+    for x in row:
+        if x != 0:
+            g = fractions.gcd(g, x)
+            if g == 1 or g == -1:
+                return row
+    g = abs(g)
+    return [x // g for x in row] if g > 1 else row
+
+
+class Tableau(object):
+    """
+    A simplex tableau. Each row is [A_r, b_r], as a list of integers scaled by a positive factor,
+    and basis[r] is the column that is basic in row r, whose entry in row r is positive.
+    Columns with numbers num_cols and above are artificial.
+    """
+
+    def __init__(self, rows, num_cols):
+        self.rows = rows
+        self.num_cols = num_cols
+        self.basis = [None] * len(rows)
+        self.objective = None   # the reduced costs, scaled by a positive factor, while optimizing
+
+    def eliminate(self, other, row, c):
+        """
+        Returns a positive multiple of other, minus a multiple of row, with entry 0 in column c.
+        row[c] must be positive.
+        """
+        f = other[c]
+        if f == 0:
+            return other
+        p = row[c]
+        return reduce_row([p * x - f * y for x, y in zip(other, row)])
+
+    def pivot(self, r, c):
+        """
+        Makes column c basic in row r.
+        """
+        budget.spend(budget.PIVOTS)
+        row = self.rows[r]
+        if row[c] < 0:
+            row = self.rows[r] = [-x for x in row]
+        for s, other in enumerate(self.rows):
+            if s != r:
+                self.rows[s] = self.eliminate(other, row, c)
+        if self.objective is not None:
+            self.objective = self.eliminate(self.objective, row, c)
+        self.basis[r] = c
+
+    def warm_start(self, cols):
+        """
+        Pivots the columns cols into the basis, one row each. Returns True if this gives a
+        feasible basis for every row.
+        """
+        for c in cols:
+            r = next((r for r in range(len(self.rows))
+                      if self.basis[r] is None and self.rows[r][c] != 0), None)
+            if r is not None:
+                self.pivot(r, c)
+        return all(c is not None for c in self.basis) and all(row[-1] >= 0 for row in self.rows)
+
+    def phase_one(self):
+        """
+        Finds a feasible basis. Each row starts with a column that occurs in no other row, such as
+        the slack of an inequality, if there is one with the right sign, and otherwise with an
+        artificial column. Rows found to be redundant are removed. Returns False if there is no
+        feasible solution.
+        """
+        n = self.num_cols
+        rows_of = [[] for c in range(n)]
+        for r, row in enumerate(self.rows):
+            for c in range(n):
+                if row[c] != 0:
+                    rows_of[c].append(r)
+        for c in range(n):
+            if len(rows_of[c]) == 1:
+                r = rows_of[c][0]
+                row = self.rows[r]
+                if self.basis[r] is None and (row[c] > 0 or row[-1] == 0):
+                    if row[c] < 0:
+                        self.rows[r] = [-x for x in row]
+                    self.basis[r] = c
+        artificial = [r for r in range(len(self.rows)) if self.basis[r] is None]
+        m = len(artificial)
+        for a, r in enumerate(artificial):
+            row = self.rows[r]
+            row[-1:-1] = [0] * m
+            row[n + a] = 1
+            self.basis[r] = n + a
+        for r, row in enumerate(self.rows):
+            if self.basis[r] < n:
+                row[-1:-1] = [0] * m
+        if m == 0:
+            return True
+
+        # maximize minus the sum of the artificial columns
+        cost = [0] * n + [-1] * m
+        self.optimize(cost)
+        if any(row[-1] != 0 for row, c in zip(self.rows, self.basis) if c >= n):
+            return False
+
+        # drive the artificial columns out of the basis, and drop the redundant rows
+        for r, row in enumerate(self.rows):
+            if self.basis[r] >= n:
+                c = next((c for c in range(n) if row[c] != 0), None)
+                if c is not None:
+                    self.pivot(r, c)
+        keep = [r for r in range(len(self.rows)) if self.basis[r] < n]
+        self.rows = [self.rows[r][:n] + self.rows[r][-1:] for r in keep]
+        self.basis = [self.basis[r] for r in keep]
+        return True
+
+    def optimize(self, cost):
+        """
+        Maximizes cost . y from the present feasible basis, by Bland's rule.
+        Returns False if the objective is unbounded.
+        """
+        width = len(self.rows[0]) - 1 if self.rows else len(cost)
+        objective = integer_row(list(cost[:width]) + [0])
+        for row, b in zip(self.rows, self.basis):
+            objective = self.eliminate(objective, row, b)
+        self.objective = objective
+        try:
+            while True:
+                c = next((k for k in range(width) if self.objective[k] > 0), None)
+                if c is None:
+                    return True
+                # the row minimizing row[-1] / row[c], with ties broken by the basic column
+                best = None
+                for r, row in enumerate(self.rows):
+                    if row[c] > 0:
+                        if best is None:
+                            best = r
+                        else:
+                            d = row[-1] * self.rows[best][c] - self.rows[best][-1] * row[c]
+                            if d < 0 or (d == 0 and self.basis[r] < self.basis[best]):
+                                best = r
+                if best is None:
+                    return False
+                self.pivot(best, c)
+        finally:
+            self.objective = None
+
+
+def pairs_of_interest(B, indices, rep=lambda i: (1, i)):
+    """
+    indices is a list of indices of terms of B, and rep maps an index i to a pair (k, r), such
+    that ti = k * tr. Only indices r in indices count, and pairs with k = 0 are skipped.
+    Returns a sorted list of pairs (i, j), with i < j in indices, such that:
+     -- i is 0, or
+     -- a comparison between ti and tj is stored in B or occurs in a clause, or
+     -- one of ti and tj is defined from the other, or both are arguments of a definition, or
+     -- both are arguments of applications of the same function, or
+     -- both are products or factors of products, since the multiplicative modules compare them, or
+     -- one is an argument of a minm term, which the minimum module compares with every term.
+    """
+    indices = set(indices)
+    pairs = set((0, i) for i in indices if i != 0) if 0 in indices else set()
+
+    def add(p, q):
+        (kp, p), (kq, q) = rep(p), rep(q)
+        if kp != 0 and kq != 0 and p != q and p in indices and q in indices:
+            pairs.add((min(p, q), max(p, q)))
+
+    for (p, q) in itertools.chain(B.inequalities, B.equalities, B.disequalities):
+        add(p, q)
+    for c in B.clauses:
+        for (p, q) in c.comparisons:
+            add(p, q)
+
+    func_args, mul_indices = {}, set()
+    for i in range(B.num_terms):
+        d = B.term_defs[i]
+        if isinstance(d, (terms.AddTerm, terms.MulTerm, terms.FuncTerm)):
+            args = [a.term.index for a in d.args if isinstance(a.term, terms.IVar)]
+            for a in args:
+                add(i, a)
+            for a, b in itertools.combinations(args, 2):
+                add(a, b)
+            if isinstance(d, terms.FuncTerm):
+                func_args.setdefault(d.func_name, set()).update(args)
+                if d.func_name == 'minm':
+                    for a in args:
+                        for j in indices:
+                            add(a, j)
+            elif isinstance(d, terms.MulTerm):
+                mul_indices.update(args + [i])
+    for args in func_args.values() + [mul_indices]:
+        for a, b in itertools.combinations(sorted(args), 2):
+            add(a, b)
+    return sorted(pairs)
@@ -0,0 +1,37 @@
+####################################################################################################
+#
+# test_simplex_add_module.py
+#
+# Checks that the simplex additive module reports an infeasible additive problem as a
+# contradiction of the blackboard.
+#
+# Run with: python -m unittest discover -s polya -p 'test_*.py'
+#
+####################################################################################################
+
+import polya.main.messages as messages
+import polya.main.terms as terms
+import polya.main.main as main
+from polya.modules import axiom_module
+from polya.modules.simplex import simplex_add_module
+import unittest
+
+
+class InfeasibleTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+
+    def test_infeasible(self):
+        x, y, z = terms.Var('x'), terms.Var('y'), terms.Var('z')
+        S = main.Solver(assertions=[x > 0, y > 0, z > 0, x + y + z < 0],
+                        modules=[axiom_module.AxiomModule()])
+        with self.assertRaises(terms.Contradiction) as c:
+            simplex_add_module.SimplexAdditionModule().update_blackboard(S.B)
+        self.assertIn('1 == 0', c.exception.msg)
+        S = main.Solver(assertions=[x > 0, y > 0, z > 0, x + y + z < 0], solver_type='simplex')
+        self.assertTrue(S.check())
+
+
+if __name__ == '__main__':
+    unittest.main()
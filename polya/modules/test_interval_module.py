@@ -0,0 +1,61 @@
+####################################################################################################
+#
+# test_interval_module.py
+#
+# Checks that the interval module only narrows the argument of log when it is known to be
+# positive, so that problems about log of nonpositive arguments are not refuted, while log still
+# bounds positive arguments.
+#
+# Run with: python -m unittest discover -s polya -p 'test_*.py'
+#
+####################################################################################################
+
+import polya.main.messages as messages
+import polya.main.terms as terms
+import polya.main.main as main
+from polya.modules import interval_module
+from polya.modules import axiom_module
+import unittest
+
+x, y = terms.Var('x'), terms.Var('y')
+
+# problems that say nothing about log on its domain, and so are consistent
+consistent = [[x < 0, y == terms.log(x)], [x <= 0, y == terms.log(x)],
+              [x < 0, terms.log(x) > 0], [x < -1, y == terms.log(x)]]
+
+
+def interval_modules():
+    """
+    Returns the interval module, asserting all bounds, with the axiom module that a Solver needs.
+    """
+    return [interval_module.IntervalModule(True), axiom_module.AxiomModule()]
+
+
+class LogNarrowingTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+
+    def test_nonpositive_arguments(self):
+        for assertions in consistent:
+            S = main.Solver(assertions=assertions, modules=interval_modules())
+            self.assertFalse(S.check(), str(assertions))
+            S = main.Solver(assertions=assertions, solver_type='fm')
+            self.assertFalse(S.check(), str(assertions))
+
+    def test_positive_argument(self):
+        # log(x) > 0 narrows x to x > 1
+        S = main.Solver(assertions=[x > 0, x < 1, terms.log(x) > 0],
+                        modules=interval_modules())
+        self.assertTrue(S.check())
+
+    def test_contradiction(self):
+        # the contradiction names the term whose interval is empty
+        S = main.Solver(assertions=[x > 0, x < 1, terms.log(x) > 0], modules=interval_modules())
+        with self.assertRaises(terms.Contradiction) as c:
+            interval_module.IntervalModule(True).update_blackboard(S.B)
+        self.assertIn(':= x', c.exception.msg)
+
+
+if __name__ == '__main__':
+    unittest.main()
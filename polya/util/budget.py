@@ -0,0 +1,121 @@
+####################################################################################################
+#
+# budget.py
+#
+# Cooperative resource limits.
+#
+# A Budget bounds the work done by a run of the modules: wall-clock time, saturation rounds, rows
+# generated by Fourier-Motzkin elimination, calls to lrs, simplex pivots, and clauses instantiated
+# from axioms.
+# The routines that do this work report it with spend, and check raises BudgetExhausted as soon
+# as a limit is passed. Only the budget stored in current is charged, so nothing is bounded
+# unless a caller installs one with activate. The work is counted in the statistics of timer
+# either way.
+# The conflicts of a conflict-driven split search are bounded by its own conflict_budget rather
+# than by a Budget, but running out of them is reported with BudgetExhausted as well.
+#
+####################################################################################################
+
+import timeit
+import polya.util.timer as timer
+
+TIME, ROUNDS, FM_ROWS, LRS_CALLS, INSTANCES, PIVOTS, CONFLICTS = range(7)
+resource_names = {TIME: 'time', ROUNDS: 'rounds', FM_ROWS: 'fm_rows', LRS_CALLS: 'lrs_calls',
+                  INSTANCES: 'instances', PIVOTS: 'pivots', CONFLICTS: 'conflicts'}
+
+
+class BudgetExhausted(Exception):
+    """
+    Raised when a resource limit of the current Budget is passed.
+    """
+
+    def __init__(self, resource, limit):
+        Exception.__init__(self, resource, limit)
+        self.resource, self.limit = resource, limit
+        self.msg = 'Budget exhausted: {0} limit of {1!s} reached.'.format(
+            resource_names[resource], limit)
+
+
+class Budget(object):
+    """
+    Limits on the resources a run may use. A limit of None means the resource is unbounded.
+    Arguments:
+     -- time: the number of seconds of wall-clock time.
+     -- rounds: the number of saturation rounds.
+     -- fm_rows: the number of rows generated by Fourier-Motzkin elimination.
+     -- lrs_calls: the number of calls to lrs and redund.
+     -- instances: the number of clauses instantiated from axioms.
+     -- pivots: the number of pivots made by the simplex modules.
+    """
+
+    def __init__(self, time=None, rounds=None, fm_rows=None, lrs_calls=None, instances=None,
+                 pivots=None):
+        self.limits = {TIME: time, ROUNDS: rounds, FM_ROWS: fm_rows, LRS_CALLS: lrs_calls,
+                       INSTANCES: instances, PIVOTS: pivots}
+        self.reset()
+
+    def reset(self):
+        """
+        Sets all usage back to zero and restarts the clock.
+        """
+        self.used = dict((r, 0) for r in self.limits if r != TIME)
+        self.start = timeit.default_timer()
+
+    def elapsed(self):
+        return timeit.default_timer() - self.start
+
+    def check(self):
+        """
+        Raises BudgetExhausted if any limit has been passed.
+        """
+        if self.limits[TIME] is not None and self.elapsed() > self.limits[TIME]:
+            raise BudgetExhausted(TIME, self.limits[TIME])
+        for r in self.used:
+            if self.limits[r] is not None and self.used[r] > self.limits[r]:
+                raise BudgetExhausted(r, self.limits[r])
+
+    def spend(self, resource, n=1):
+        """
+        Records n units of resource as used, and checks the limits.
+        """
+        self.used[resource] += n
+        self.check()
+
+    def statistics(self):
+        """
+        Returns a dictionary mapping the name of each resource to the amount used.
+        """
+        stats = dict((resource_names[r], self.used[r]) for r in self.used)
+        stats[resource_names[TIME]] = round(self.elapsed(), 3)
+        return stats
+
+
+current = None
+
+
+def activate(budget):
+    """
+    Makes budget the current Budget, and returns the previous one, so that it can be restored.
+    budget may be None, in which case nothing is bounded.
+    """
+    global current
+    previous, current = current, budget
+    return previous
+
+
+def spend(resource, n=1):
+    """
+    Charges n units of resource to the current Budget, if there is one, and counts them in the
+    current statistics.
+    """
+    timer.count(resource_names[resource], n)
+    if current is not None:
+        current.spend(resource, n)
+
+
+def check():
+    """
+    Raises BudgetExhausted if the current Budget, if there is one, has been exhausted.
+    """
+    if current is not None:
+        current.check()
@@ -277,6 +277,110 @@ def halfplane_flip(hp):
     return Halfplane(-hp.b, -hp.a, hp.strong)
 
 
+####################################################################################################
+#
+# Two-dimensional cones
+#
+# The cone generated by a finite set of rays in the plane is found by sorting the rays by angle:
+# the rays lie in a closed half-plane exactly when some gap between consecutive angles is at
+# least pi, and then the rays on either side of that gap bound the cone. Rays are compared with
+# cross products of integer vectors, so that no precision is lost.
+#
+####################################################################################################
+
+
+def integer_direction(x, y):
+    """
+    Returns the pair of coprime integers pointing in the same direction as the nonzero rational
+    vector (x, y), or (0, 0) for the zero vector.
+    """
+    x, y = fractions.Fraction(x), fractions.Fraction(y)
+    a, b = x.numerator * y.denominator, y.numerator * x.denominator
+    g = abs(fractions.gcd(a, b)) or 1
+    return a // g, b // g
+
+
+def cross(u, v):
+    return u[0] * v[1] - u[1] * v[0]
+
+
+def angle_cmp(u, v):
+    """
+    Compares the nonzero integer vectors u and v by their angle in [0, 2pi).
+    """
+    hu = 0 if (u[1] > 0 or (u[1] == 0 and u[0] > 0)) else 1
+    hv = 0 if (v[1] > 0 or (v[1] == 0 and v[0] > 0)) else 1
+    if hu != hv:
+        return hu - hv
+    c = cross(u, v)
+    return -1 if c > 0 else (1 if c < 0 else 0)
+
+
+def boundary_rays(points):
+    """
+    points is a list of tuples whose first two entries are the coordinates of a nonzero vector.
+    If all the vectors lie in a closed half-plane through the origin, returns a pair of them that
+    bound the cone they generate. Otherwise, returns None.
+    Among vectors pointing the same way, one whose third entry is nonzero is preferred, if there
+    is a third entry. If all the vectors point the same way, the pair consists of that vector
+    twice, and if they all lie on one line, the pair points in opposite directions.
+    Takes O(k log k) steps for k points.
+    """
+    def preferred(p, q):
+        return q if len(q) > 2 and q[2] != 0 and not (len(p) > 2 and p[2] != 0) else p
+
+    # group the points by direction, in order of angle
+    dirs = sorted(((integer_direction(p[0], p[1]), p) for p in points),
+                  cmp=lambda a, b: angle_cmp(a[0], b[0]))
+    groups = []
+    for d, p in dirs:
+        if groups and angle_cmp(groups[-1][0], d) == 0:
+            groups[-1][1] = preferred(groups[-1][1], p)
+        else:
+            groups.append([d, p])
+
+    if len(groups) == 1:
+        return groups[0][1], groups[0][1]
+    # find a gap of at least pi, going counterclockwise from groups[k] to groups[k+1]
+    for k in range(len(groups)):
+        u, v = groups[k][0], groups[(k + 1) % len(groups)][0]
+        c = cross(u, v)
+        if c < 0 or (c == 0 and u[0] * v[0] + u[1] * v[1] < 0):
+            return groups[(k + 1) % len(groups)][1], groups[k][1]
+    return None
+
+
+def cone_inequalities(points):
+    """
+    points is a list of pairs, the coordinates of vectors generating a cone in the plane.
+    Returns a pair (ineqs, eqs) of lists of pairs (a, b) of coprime integers, such that the cone
+    is the set of (x, y) with a*x + b*y >= 0 for each (a, b) in ineqs and a*x + b*y = 0 for each
+    in eqs.
+    """
+    points = [integer_direction(*p) for p in points if p[0] != 0 or p[1] != 0]
+    if len(points) == 0:
+        return [], [(1, 0), (0, 1)]
+    bounds = boundary_rays(points)
+    if bounds is None:
+        return [], []
+    u, v = bounds
+    if cross(u, v) != 0:
+        # a pointed cone: the normals of u and v, turned towards the other
+        n1 = (-u[1], u[0]) if cross(u, v) > 0 else (u[1], -u[0])
+        n2 = (-v[1], v[0]) if cross(v, u) > 0 else (v[1], -v[0])
+        return [n1, n2], []
+    n = (-u[1], u[0])
+    if u[0] * v[0] + u[1] * v[1] > 0:
+        # a single ray
+        return [u], [n]
+    p = next((p for p in points if cross(u, p) != 0), None)
+    if p is None:
+        # a line
+        return [], [n]
+    # a half-plane
+    return [n if cross(u, p) > 0 else (u[1], -u[0])], []
+
+
 ####################################################################################################
 #
 # Extended real intervals
@@ -0,0 +1,320 @@
+####################################################################################################
+#
+# interval_util.py
+#
+# Exact rational interval arithmetic, used by the interval module.
+#
+# An Interval is the set of reals between a lower and an upper bound, each of which is a
+# Fraction, or None for an infinite bound, and each of which may be strict or weak. The
+# operations return intervals that contain every value of the operation on the members of their
+# arguments; they are as tight as possible for sums, scalings, products and integer powers, and
+# only sound for the other functions, whose ranges are bounded by rational functions.
+#
+# Products are computed from the products of the endpoints, with infinite endpoints as float
+# infinities, and 0 times an infinite endpoint taken to be 0.
+#
+####################################################################################################
+
+import polya.util.mul_util as mul_util
+import fractions
+
+inf = float('inf')
+
+
+def extreme(ends, lower):
+    """
+    ends is a nonempty list of pairs (v, strict), where v is a Fraction or a float infinity.
+    Returns the pair (v, strict) for the least v if lower is True, and the largest otherwise. The
+    result is strict only if every pair with that value is.
+    """
+    v = min(e[0] for e in ends) if lower else max(e[0] for e in ends)
+    return v, all(s for (w, s) in ends if w == v)
+
+
+def mul_ends(a, b):
+    """
+    Returns the product of the endpoints a and b, each a pair (v, strict), as such a pair.
+    """
+    (u, su), (v, sv) = a, b
+    if (u == 0 and not su) or (v == 0 and not sv):
+        return 0, False
+    if u == 0 or v == 0:
+        return 0, True
+    return u * v, su or sv
+
+
+class Interval(object):
+    """
+    The set of reals x with lower < x < upper, where each < is <= if the bound is not strict.
+    A bound of None is infinite, and is always strict.
+    """
+
+    def __init__(self, lower=None, upper=None, lower_strict=False, upper_strict=False):
+        self.lower = lower if lower is None else fractions.Fraction(lower)
+        self.upper = upper if upper is None else fractions.Fraction(upper)
+        self.lower_strict = lower_strict or lower is None
+        self.upper_strict = upper_strict or upper is None
+
+    def __str__(self):
+        return '{0}{1}, {2}{3}'.format('(' if self.lower_strict else '[',
+                                       '-inf' if self.lower is None else self.lower,
+                                       'inf' if self.upper is None else self.upper,
+                                       ')' if self.upper_strict else ']')
+
+    def __repr__(self):
+        return self.__str__()
+
+    @staticmethod
+    def from_ends(lower, upper):
+        """
+        Takes the endpoints lower and upper as pairs (v, strict), where v may be a float infinity.
+        """
+        return Interval(None if lower[0] in (inf, -inf) else lower[0],
+                        None if upper[0] in (inf, -inf) else upper[0], lower[1], upper[1])
+
+    def ends(self):
+        """
+        Returns the endpoints as pairs (v, strict), with float infinities for infinite bounds.
+        """
+        return ((-inf if self.lower is None else self.lower, self.lower_strict),
+                (inf if self.upper is None else self.upper, self.upper_strict))
+
+    def is_empty(self):
+        return (self.lower is not None and self.upper is not None and
+                (self.lower > self.upper or
+                 (self.lower == self.upper and (self.lower_strict or self.upper_strict))))
+
+    def is_positive(self):
+        return self.lower is not None and (self.lower > 0 or
+                                           (self.lower == 0 and self.lower_strict))
+
+    def is_negative(self):
+        return self.upper is not None and (self.upper < 0 or
+                                           (self.upper == 0 and self.upper_strict))
+
+    def is_nonnegative(self):
+        return self.lower is not None and self.lower >= 0
+
+    def is_nonpositive(self):
+        return self.upper is not None and self.upper <= 0
+
+    def tighter_lower(self, other):
+        """
+        Returns True if the lower bound of self is stronger than that of other.
+        """
+        if self.lower is None:
+            return False
+        if other.lower is None or self.lower > other.lower:
+            return True
+        return self.lower == other.lower and self.lower_strict and not other.lower_strict
+
+    def tighter_upper(self, other):
+        """
+        Returns True if the upper bound of self is stronger than that of other.
+        """
+        if self.upper is None:
+            return False
+        if other.upper is None or self.upper < other.upper:
+            return True
+        return self.upper == other.upper and self.upper_strict and not other.upper_strict
+
+    def __and__(self, other):
+        lower = self if not other.tighter_lower(self) else other
+        upper = self if not other.tighter_upper(self) else other
+        return Interval(lower.lower, upper.upper, lower.lower_strict, upper.upper_strict)
+
+    def __add__(self, other):
+        lower = None if self.lower is None or other.lower is None else self.lower + other.lower
+        upper = None if self.upper is None or other.upper is None else self.upper + other.upper
+        return Interval(lower, upper, self.lower_strict or other.lower_strict,
+                        self.upper_strict or other.upper_strict)
+
+    def __neg__(self):
+        return Interval(None if self.upper is None else -self.upper,
+                        None if self.lower is None else -self.lower,
+                        self.upper_strict, self.lower_strict)
+
+    def __sub__(self, other):
+        return self + -other
+
+    def scale(self, c):
+        """
+        Returns the interval of the c * x, for x in self.
+        """
+        if c == 0:
+            return Interval(0, 0)
+        elif c > 0:
+            return Interval(None if self.lower is None else c * self.lower,
+                            None if self.upper is None else c * self.upper,
+                            self.lower_strict, self.upper_strict)
+        else:
+            return -self.scale(-c)
+
+    def __mul__(self, other):
+        ends = [mul_ends(a, b) for a in self.ends() for b in other.ends()]
+        return Interval.from_ends(extreme(ends, True), extreme(ends, False))
+
+    def reciprocal(self):
+        """
+        Returns the interval of the 1 / x, for x in self, or the whole line if self contains 0.
+        """
+        if self.is_empty():
+            return self
+        elif self.is_negative():
+            return -(-self).reciprocal()
+        elif not self.is_positive():
+            return Interval()
+        upper = None if self.lower == 0 else 1 / self.lower
+        lower = 0 if self.upper is None else 1 / self.upper
+        return Interval(lower, upper, self.upper_strict, self.lower_strict)
+
+    def power(self, n):
+        """
+        Returns the interval of the x ** n, for x in self. Exponents that are not integers give
+        the whole line.
+        """
+        if n != int(n):
+            return Interval()
+        n = int(n)
+        if n == 0:
+            return Interval(1, 1)
+        elif n < 0:
+            return self.reciprocal().power(-n)
+        (lo, ls), (hi, hs) = self.ends()
+        if n % 2 == 1 or lo >= 0:
+            return Interval.from_ends((lo ** n, ls), (hi ** n, hs))
+        elif hi <= 0:
+            return Interval.from_ends((hi ** n, hs), (lo ** n, ls))
+        return Interval.from_ends((0, False), extreme([(lo ** n, ls), (hi ** n, hs)], False))
+
+    def abs(self):
+        """
+        Returns the interval of the abs(x), for x in self.
+        """
+        if self.is_nonnegative():
+            return self
+        elif self.is_nonpositive():
+            return -self
+        (lo, ls), (hi, hs) = self.ends()
+        return Interval.from_ends((0, False), extreme([(-lo, ls), (hi, hs)], False))
+
+    def signs(self):
+        """
+        Returns the interval of the sign information in self: whether its members are positive,
+        negative, nonnegative or nonpositive.
+        """
+        return Interval(0 if self.is_nonnegative() else None, 0 if self.is_nonpositive() else None,
+                        self.is_positive(), self.is_negative())
+
+    def rounded(self):
+        """
+        Returns an interval containing self, whose bounds have denominators of at most
+        mul_util.precision.
+        """
+        lower, upper = self.lower, self.upper
+        if lower is not None:
+            lower = mul_util.round_down(lower)
+        if upper is not None:
+            upper = mul_util.round_up(upper)
+        return Interval(lower, upper, self.lower_strict or lower != self.lower,
+                        self.upper_strict or upper != self.upper)
+
+
+def minimum(intervals):
+    """
+    Returns the interval of the minimums of the members of the nonempty list intervals.
+    """
+    lowers = [i.ends()[0] for i in intervals]
+    uppers = [i.ends()[1] for i in intervals]
+    v = min(u for (u, s) in uppers)
+    return Interval.from_ends(extreme(lowers, True), (v, any(s for (u, s) in uppers if u == v)))
+
+
+####################################################################################################
+#
+# Ranges of functions
+#
+# Each function takes the interval I of the argument, and returns an interval containing the
+# values of the function on I.
+#
+####################################################################################################
+
+
+def exp_range(I):
+    """
+    Uses exp(x) > 0, exp(x) >= 1 + x, and exp(x) <= 1 / (1 - x) for x < 1, with equality only
+    at x = 0.
+    """
+    J = Interval(0, None, True)
+    if I.lower is not None:
+        J = J & Interval(1 + I.lower, None, I.lower_strict or I.lower != 0)
+    if I.upper is not None and I.upper < 1:
+        J = J & Interval(None, 1 / (1 - I.upper), False, I.upper_strict or I.upper != 0)
+    return J
+
+
+def exp_inverse(J):
+    """
+    Returns an interval containing the x with exp(x) in J.
+    """
+    I = Interval()
+    if J.upper is not None:
+        I = I & Interval(None, J.upper - 1, False, J.upper_strict or J.upper != 1)
+    if J.is_positive() and J.lower > 0:
+        I = I & Interval(1 - 1 / J.lower, None, J.lower_strict or J.lower != 1)
+    return I
+
+
+def log_range(I):
+    """
+    Uses 1 - 1 / x <= log(x) <= x - 1 for x > 0, with equality only at x = 1. log is only
+    bounded on positive intervals.
+    """
+    if not I.is_positive():
+        return Interval()
+    J = Interval()
+    if I.lower > 0:
+        J = J & Interval(1 - 1 / I.lower, None, I.lower_strict or I.lower != 1)
+    if I.upper is not None:
+        J = J & Interval(None, I.upper - 1, False, I.upper_strict or I.upper != 1)
+    return J
+
+
+def log_inverse(J):
+    """
+    Returns an interval containing the x > 0 with log(x) in J.
+    """
+    I = Interval(0, None, True)
+    if J.lower is not None:
+        I = I & Interval(1 + J.lower, None, J.lower_strict or J.lower != 0)
+    if J.upper is not None and J.upper < 1:
+        I = I & Interval(None, 1 / (1 - J.upper), False, J.upper_strict or J.upper != 0)
+    return I
+
+
+def root_range(n, I):
+    """
+    Uses min(1, x) <= root_n(x) <= max(1, x) for x >= 0, and root_n(-x) = -root_n(x) for odd n.
+    Even roots are only bounded on nonnegative intervals.
+    """
+    if I.is_nonnegative():
+        (lo, ls), (hi, hs) = I.ends()
+        return Interval.from_ends((1, ls or lo > 1) if lo >= 1 else (lo, ls),
+                                  (1, hs or hi < 1) if hi <= 1 else (hi, hs))
+    elif I.is_nonpositive() and n % 2 == 1:
+        return -root_range(n, -I)
+    elif n % 2 == 1:
+        (lo, ls), (hi, hs) = I.ends()
+        return Interval.from_ends((min(lo, -1), False), (max(hi, 1), False))
+    return Interval()
+
+
+def floor_range(I):
+    """
+    Uses x - 1 < floor(x) <= x.
+    """
+    return Interval(None if I.lower is None else I.lower - 1, I.upper, True, I.upper_strict)
+
+
+# the ranges of functions that do not depend on the argument
+fixed_ranges = {'sin': Interval(-1, 1), 'cos': Interval(-1, 1)}
@@ -230,6 +230,26 @@ def make_term_comparison_unabs(i, j, ei, ej, comp1, coeff1, B):
         comp = terms.comp_reverse(comp1)
     return comp, coeff
 
+def get_pair_comparisons(B):
+    """
+    Returns the comparisons and equalities between pairs of distinct terms known to B, in the
+    order of get_inequalities and get_equalities, as a list of tuples (i, comp, coeff, j), each
+    representing ti comp coeff * tj.
+    """
+    pairs = []
+    for (i, j, a, b, strong) in B.get_numeric_inequalities():
+        if b != 0:
+            if a > 0:
+                comp = terms.GT if strong else terms.GE
+            else:
+                comp = terms.LT if strong else terms.LE
+            pairs.append((i, comp, -fractions.Fraction(b, a), j))
+    for (i, j, a, b) in B.get_numeric_equalities():
+        if b != 0:
+            pairs.append((i, terms.EQ, -fractions.Fraction(b, a), j))
+    return pairs
+
+
 def get_multiplicative_information(B):
     """
     Retrieves the relevant information from the blackboard.
@@ -239,12 +259,14 @@ def get_multiplicative_information(B):
     """
 
     comparisons = []
-    for c in (c for c in B.get_inequalities() + B.get_equalities()
-              if c.term2.coeff != 0):
-        ind1 = c.term1.index
-        ind2 = c.term2.term.index
-        if B.sign(ind1) != 0 and B.sign(ind2) != 0:
-            comparisons.append(make_term_comparison_abs(c, B))
+    for (i, comp, coeff, j) in get_pair_comparisons(B):
+        si, sj = B.sign(i), B.sign(j)
+        if si != 0 and sj != 0:
+            # as in make_term_comparison_abs
+            comp = comp if si == 1 else terms.comp_reverse(comp)
+            comparisons.append(
+                terms.comp_eval[comp](terms.IVar(i), coeff * si * sj * terms.IVar(j))
+            )
 
     for key in B.term_defs:
         if (isinstance(B.term_defs[key], terms.MulTerm) and B.sign(key) != 0 and
@@ -286,7 +308,13 @@ sign_to_comp = {(-1, False): terms.LE, (-1, True): terms.LT, (1, False): terms.G
                 (1, True): terms.GT}
 
 
-def derive_info_from_definitions(B):
+def derive_info_from_definitions(B, changed=None):
+    """
+    Learns sign information about multiplicative terms in B from the signs of their arguments,
+    and vice versa.
+    If changed is not None, only terms t_i such that i or the index of one of its arguments is in
+    changed are considered.
+    """
     def mulpair_sign(p):
         if p.exponent % 2 == 0:
             return GT if B.implies(p.term.index, terms.NE, 0, 0) else GE
@@ -303,6 +331,9 @@ def derive_info_from_definitions(B):
     #         return B.weak_sign(p.term.index)
 
     for key in (k for k in B.term_defs if isinstance(B.term_defs[k], terms.MulTerm)):
+        if changed is not None and key not in changed and \
+                not any(p.term.index in changed for p in B.term_defs[key].args):
+            continue
         #signs = [mulpair_sign(p) for p in B.term_defs[key].args]
         #s = reduce(lambda x, y: x*y, signs)
 
@@ -342,25 +373,39 @@ def derive_info_from_definitions(B):
             s = reduce(lambda x, y: x*y, signs)
             B.assert_comparison(terms.comp_eval[sign_to_comp[s.dir, s.strong]](terms.IVar(key), 0))
 
-def preprocess_cancellations(B):
+def preprocess_cancellations(B, changed=None):
     """
     This routine tries to overcome some of the limitations of the elimination routine by looking
     for comparisons where there is not full sign information.
 
     Given a comparison t_1^k_1 * ... * t_n^k^n <> s_1^l_1 * ... * s_n ^ l_n, we cancel out as many
     pieces as we can that have sign info and check what remains for a valid comparison.
+
+    If changed is not None, only comparisons between t_i and t_j such that i, j, or the index of
+    an argument of t_i or t_j is in changed are considered.
     """
 
-    mul_inds = {i:copy.deepcopy(B.term_defs[i])
-                for i in range(len(B.term_defs)) if isinstance(B.term_defs[i],terms.MulTerm)}
+    def is_changed(i):
+        return i in changed or (i in mul_inds and
+                                any(p.term.index in changed for p in B.term_defs[i].args))
+
+    # The definitions are copied on first use, as most comparisons are usually skipped.
+    mul_inds = set(i for i in range(len(B.term_defs)) if isinstance(B.term_defs[i], terms.MulTerm))
+    copies = {}
+
+    def mul_copy(i):
+        if i not in copies:
+            copies[i] = copy.deepcopy(B.term_defs[i])
+        return copies[i]
+
     comps = []
 
-    for c in (c for c in B.get_inequalities() + B.get_equalities() if
-            (c.term2.coeff != 0 and (c.term1.index in mul_inds or c.term2.term.index in mul_inds))):
-        lterm = mul_inds[c.term1.index] if c.term1.index in mul_inds else c.term1
-        rterm = mul_inds[c.term2.term.index] if c.term2.term.index in mul_inds else c.term2.term
-        coeff = c.term2.coeff
-        comp = c.comp
+    for (i, comp, coeff, j) in (c for c in get_pair_comparisons(B) if
+                                (c[0] in mul_inds or c[3] in mul_inds)):
+        if changed is not None and not (is_changed(i) or is_changed(j)):
+            continue
+        lterm = mul_copy(i) if i in mul_inds else terms.IVar(i)
+        rterm = mul_copy(j) if j in mul_inds else terms.IVar(j)
         if isinstance(lterm, terms.IVar):
             lterm = terms.MulTerm([terms.MulPair(lterm, 1)])
         if isinstance(rterm, terms.IVar):
@@ -396,17 +441,12 @@ def preprocess_cancellations(B):
         if B.has_name(lterm)[0] and B.has_name(rterm)[0]:
             B.assert_comparison(terms.comp_eval[comp](lterm, coeff * rterm))
 
-def get_split_weight(B):
+def get_split_weight(B, changed=None):
     """
     returns a list of tuples (i, j, c, <>. w). A tuple represents that this module would like
     interested to assume the comparison t_i <> c*t_j, with weight w.
+    If changed is a set of indices, only the tuples with i or j in changed are returned.
     """
-    def occurs_in_mul_term(i):
-        for k in [j for j in range(B.num_terms) if isinstance(B.term_defs[j], terms.MulTerm)]:
-            if i in [t.term.index for t in B.term_defs[k].args]:
-                return True
-        return False
-
     def no_sign_info(i):
         if not (B.implies_zero_comparison(i, terms.GT)) and \
                 not (B.implies_zero_comparison(i, terms.LT)) and \
@@ -415,6 +455,6 @@ def get_split_weight(B):
         else:
             return False
 
-    return [(i, 0, 0, comp, 1) for i in range(B.num_terms) if (occurs_in_mul_term(i)
-                                                               and no_sign_info(i))
+    inds = B.mul_args if changed is None else B.mul_args & changed
+    return [(i, 0, 0, comp, 1) for i in sorted(inds) if no_sign_info(i)
             for comp in [terms.GT, terms.LT]]
@@ -17,8 +17,15 @@ def primesbelow(N):
             sieve[(k*k + 4*k - 2*k*(i%2)) // 3::2*k] = [False] * ((N // 6 - (k*k + 4*k - 2*k*(i%2))//6 - 1) // k + 1)
     return [2, 3] + [(3 * i + 1) | 1 for i in range(1, N//3 - correction) if sieve[i]]
 
-smallprimeset = set(primesbelow(100000))
+# The tables of small primes are built on first use, by get_smallprimeset and get_smallprimes.
+smallprimeset = None
 _smallprimeset = 100000
+def get_smallprimeset():
+    global smallprimeset
+    if smallprimeset is None:
+        smallprimeset = set(primesbelow(_smallprimeset))
+    return smallprimeset
+
 def isprime(n, precision=7):
     # http://en.wikipedia.org/wiki/Miller-Rabin_primality_test#Algorithm_and_running_time
     if n == 1 or n % 2 == 0:
@@ -26,7 +33,7 @@ def isprime(n, precision=7):
     elif n < 1:
         raise ValueError("Out of bounds, first argument must be > 0")
     elif n < _smallprimeset:
-        return n in smallprimeset
+        return n in get_smallprimeset()
 
 
     d = n - 1
@@ -79,12 +86,18 @@ def pollard_brent(n):
 
     return g
 
-smallprimes = primesbelow(1000) # might seem low, but 1000*1000 = 1000000, so this will fully factor every composite < 1000000
+smallprimes = None
+def get_smallprimes():
+    global smallprimes
+    if smallprimes is None:
+        smallprimes = primesbelow(1000) # might seem low, but 1000*1000 = 1000000, so this will fully factor every composite < 1000000
+    return smallprimes
+
 def primefactors(n, sort=False):
     factors = []
 
     limit = int(n ** .5) + 1
-    for checker in smallprimes:
+    for checker in get_smallprimes():
         if checker > limit: break
         while n % checker == 0:
             factors.append(checker)
@@ -106,14 +119,24 @@ def primefactors(n, sort=False):
 
     return factors
 
+# factorization remembers its results, up to factorizations_size of them, since the same
+# constants are factored over and over by the multiplicative modules.
+factorizations = {}
+factorizations_size = 10000
 def factorization(n):
+    try: return dict(factorizations[n])
+    except KeyError: pass
+
     factors = {}
     for p1 in primefactors(n):
         try:
             factors[p1] += 1
         except KeyError:
             factors[p1] = 1
-    return factors
+    if len(factorizations) >= factorizations_size:
+        factorizations.clear()
+    factorizations[n] = factors
+    return dict(factors)
 
 totients = {}
 def totient(n):
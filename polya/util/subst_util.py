@@ -0,0 +1,185 @@
+####################################################################################################
+#
+# subst_util.py
+#
+# Substitution of equal terms in the linear problems solved by the additive modules.
+#
+# The equalities ti = c * tj and ti = 0 stored in a blackboard divide the terms into classes. Each
+# class is represented by its term of smallest index, tr, and every term of the class is written
+# as ti = k * tr. The additive modules replace each ti by k * tr in the facts they read from the
+# blackboard, so that only the representatives occur in their problems, and expand every learned
+# comparison between representatives back into comparisons between the terms of their classes.
+# Terms known to be 0 are dropped from the problems altogether.
+#
+####################################################################################################
+
+import polya.main.terms as terms
+import fractions
+
+
+class Substitution(object):
+    """
+    The equality classes of the terms of a blackboard B, as a union-find structure.
+    """
+
+    def __init__(self, B):
+        self.parent = {}  # maps i to (k, j), with ti = k * tj and j < i
+        self.zero = set()  # representatives of the classes known to be 0
+        for (i, j, a, b) in B.get_numeric_equalities():
+            if b == 0:
+                self.zero.add(self.find(i)[1])
+            else:
+                self.union(i, fractions.Fraction(-b, a), j)
+
+        self.members = {}  # maps each representative r to the list of pairs (k, i) with ti = k * tr
+        self.zero_members = []  # the indices of the terms known to be 0
+        for i in range(B.num_terms):
+            k, r = self.rep(i)
+            if k == 0:
+                self.zero_members.append(i)
+            else:
+                self.members.setdefault(r, []).append((k, i))
+
+    def find(self, i):
+        """
+        Returns a pair (k, r), where tr is the representative of the class of ti, and
+        ti = k * tr.
+        """
+        if i not in self.parent:
+            return 1, i
+        k, j = self.parent[i]
+        k1, r = self.find(j)
+        self.parent[i] = (k * k1, r)
+        return k * k1, r
+
+    def union(self, i, coeff, j):
+        """
+        Merges the classes of ti and tj, given that ti = coeff * tj.
+        """
+        coeff = fractions.Fraction(coeff)
+        ki, ri = self.find(i)
+        kj, rj = self.find(j)
+        # ki * tri = coeff * kj * trj
+        if ri == rj:
+            if ki != coeff * kj:
+                self.zero.add(ri)
+        elif ri < rj:
+            self.parent[rj] = (ki / (coeff * kj), ri)
+            if rj in self.zero:
+                self.zero.remove(rj)
+                self.zero.add(ri)
+        else:
+            self.parent[ri] = (coeff * kj / ki, rj)
+            if ri in self.zero:
+                self.zero.remove(ri)
+                self.zero.add(rj)
+
+    def rep(self, i):
+        """
+        Returns a pair (k, r) such that ti = k * tr, where tr is the representative of the class
+        of ti. If ti is known to be 0, returns (0, 0).
+        """
+        k, r = self.find(i)
+        if r in self.zero:
+            return 0, 0
+        return k, r
+
+    def is_trivial(self):
+        """
+        Returns True if every term is its own representative.
+        """
+        return not self.parent and not self.zero
+
+    def representatives(self, indices):
+        """
+        Returns the indices in the list indices that are representatives, in the same order.
+        """
+        return [i for i in indices if i in self.members and i not in self.parent]
+
+    def summands(self, summands):
+        """
+        summands is a list of pairs (c, i), representing the sum of the c * ti.
+        Returns the same sum over the representatives, with each index occurring at most once and
+        no zero coefficients.
+        """
+        coeffs = {}
+        for c, i in summands:
+            k, r = self.rep(i)
+            if k != 0:
+                coeffs[r] = coeffs.get(r, 0) + c * k
+        return [(coeffs[r], r) for r in sorted(coeffs) if coeffs[r] != 0]
+
+    def expand(self, summands):
+        """
+        summands is a list of pairs (c, r), representing the sum of the c * tr, where each tr is
+        a representative. Returns a list of such lists, one for each way of replacing each tr by a
+        term ti of its class, where tr = ti / k.
+        """
+        expansions = [[]]
+        for c, r in summands:
+            expansions = [s + [(fractions.Fraction(c) / k, i)] for s in expansions
+                          for (k, i) in self.members[r]]
+        return expansions
+
+    def expand_comparison(self, c):
+        """
+        Takes a TermComparison between representatives, or between a representative and 0.
+        Returns the list of the corresponding TermComparisons between the terms of their classes.
+        """
+        c = c.canonize()
+        index = lambda t: 0 if isinstance(t, terms.One) else t.index
+        summands = [(fractions.Fraction(1), index(c.term1))]
+        if c.term2.coeff != 0:
+            summands.append((-c.term2.coeff, index(c.term2.term)))
+        comparisons = []
+        for s in self.expand(summands):
+            t1 = terms.STerm(s[0][0], terms.IVar(s[0][1]))
+            t2 = terms.STerm(-s[1][0], terms.IVar(s[1][1])) if len(s) > 1 else 0
+            comparisons.append(terms.comp_eval[c.comp](t1, t2))
+        return comparisons
+
+    def equalities(self):
+        """
+        Returns the equalities between the terms of each class, and the equalities ti = 0 for the
+        terms known to be 0, as a list of TermComparisons.
+        """
+        comparisons = [terms.IVar(i) == 0 for i in self.zero_members]
+        for r in sorted(self.members):
+            members = self.members[r]
+            for a, (ki, i) in enumerate(members):
+                for (kj, j) in members[a + 1:]:
+                    comparisons.append(terms.IVar(i) * kj == terms.IVar(j) * ki)
+        return comparisons
+
+
+def additive_components(B, subst):
+    """
+    Retrieves the additive information in B, split by the components of B, with each term
+    replaced by the representative of its class in subst.
+    Returns a list of triples (indices, inequalities, equalities), one for each component, where
+    indices are the representatives in the component, inequalities is a list of pairs
+    (summands, strong) for sum > 0 or sum >= 0, and equalities is a list of summands for sum = 0.
+    Summands are lists of pairs (c, i), as returned by Substitution.summands. Trivial facts are
+    dropped. Components with only one term besides t0, and no other term equal to it or to t0,
+    are left out, since everything there is to learn about them is stored in B.
+    """
+    first = lambda f: [i for (c, i) in f[0]]
+    ineq_parts = B.split_by_component(
+        [(subst.summands([(a, i), (b, j)]), strong)
+         for (i, j, a, b, strong) in B.get_numeric_inequalities()], first)
+    eq_parts = B.split_by_component(
+        [(subst.summands([(a, i), (b, j)]),) for (i, j, a, b) in B.get_numeric_equalities()] +
+        [(subst.summands([(1, i)] + [(-c, j) for (c, j) in summands]),)
+         for i, summands in B.get_numeric_definitions()], first)
+    # the terms equal to t0 may be in other components, but are compared with the terms of every
+    # component through t0
+    constants = len(subst.members.get(0, [])) > 1
+    parts = []
+    for (indices, ineqs), (_, eqs) in zip(ineq_parts, eq_parts):
+        reps = subst.representatives(indices)
+        if len(indices) <= 2 and len(reps) == len(indices) and not constants:
+            continue
+        parts.append((reps, [(summands, strong) for (summands, strong) in ineqs
+                             if summands or strong],
+                      [summands for (summands,) in eqs if summands]))
+    return parts
@@ -0,0 +1,131 @@
+####################################################################################################
+#
+# test_geometry.py
+#
+# Checks the two-dimensional cone routines on random vector sets: that get_boundary_vertices,
+# which sorts the vectors by angle, agrees with the pairwise scan it replaced, and that the
+# inequalities returned by cone_inequalities describe the cone generated by their vectors.
+#
+# Run with: python -m unittest discover -s polya -p 'test_*.py'
+#
+####################################################################################################
+
+import polya.util.geometry as geo
+from polya.modules.polyhedron import poly_add_module
+import unittest
+import fractions
+import random
+
+# the number of random vector sets in each test
+trials = 2000
+
+
+def scan_boundary_vertices(vertices):
+    """
+    The pairwise scan that get_boundary_vertices used before it sorted the vectors by angle.
+    Returns the pair of boundary vertices, or None if the vertices are not in a semicircle.
+    """
+    if len(vertices) < 2:
+        return None
+
+    b1 = vertices[0]
+    l_b1 = geo.line_of_point(b1)
+    try:
+        b2 = next(v for v in vertices if not geo.are_collinear_rays(b1, v))
+    except StopIteration:
+        s = (b1[0], b1[1], 1 if any(v[2] != 0 for v in vertices) else 0)
+        return s, s
+
+    l_b2 = geo.line_of_point(b2)
+    for v in vertices:
+        l_v = geo.line_of_point(v)
+        if geo.fall_on_same_side(l_v, [b1, b2]):
+            if not geo.fall_on_same_side(l_b1, [v, b2]):
+                b1, l_b1 = v, l_v
+            elif not geo.fall_on_same_side(l_b2, [v, b1]):
+                b2, l_b2 = v, l_v
+            elif v[2] != 0:
+                if geo.are_collinear_rays(b1, v):
+                    b1, l_b1 = v, l_v
+                elif geo.are_collinear_rays(b2, v):
+                    b2, l_b2 = v, l_v
+
+    if not geo.fall_on_same_side(l_b1, vertices) or not geo.fall_on_same_side(l_b2, vertices):
+        return None
+    return b1, b2
+
+
+def random_vector(rand, size):
+    """
+    Returns a random nonzero vector with small rational coordinates, from few enough choices that
+    collinear vectors are common.
+    """
+    while True:
+        x, y = [fractions.Fraction(rand.randint(-size, size), rand.randint(1, 2)) for k in range(2)]
+        if x != 0 or y != 0:
+            return x, y
+
+
+def in_cone(points, q):
+    """
+    Returns True if q is a nonnegative combination of the vectors in points. By Caratheodory's
+    theorem, it suffices to try the combinations of at most two of them.
+    """
+    if q == (0, 0):
+        return True
+    for u in points:
+        if geo.cross(u, q) == 0 and u[0] * q[0] + u[1] * q[1] > 0:
+            return True
+    for u in points:
+        for v in points:
+            d = geo.cross(u, v)
+            # q = a * u + b * v, by Cramer's rule
+            if d != 0 and geo.cross(q, v) * d >= 0 and geo.cross(u, q) * d >= 0:
+                return True
+    return False
+
+
+class BoundaryVerticesTest(unittest.TestCase):
+
+    def test_random_vertices(self):
+        rand = random.Random(0)
+        for trial in range(trials):
+            n = rand.randint(2, 6)
+            vertices = [random_vector(rand, 3) + (rand.choice([0, 0, 1]),) for k in range(n)]
+            if rand.random() < 0.5:
+                # keep the vertices in the upper half-plane, so that most sets have a boundary
+                vertices = [(x, y, d) if y > 0 or (y == 0 and x > 0) else (-x, -y, d)
+                            for (x, y, d) in vertices]
+            expected = scan_boundary_vertices(vertices)
+            try:
+                found = poly_add_module.get_boundary_vertices(vertices)
+            except poly_add_module.VertexSetException:
+                self.assertIsNone(expected, str(vertices))
+                continue
+            self.assertIsNotNone(expected, str(vertices))
+            # the two pairs bound the same cone, with the same strength flags
+            found_rays = set((geo.integer_direction(b[0], b[1]), b[2] != 0) for b in found)
+            expected_rays = set((geo.integer_direction(b[0], b[1]), b[2] != 0) for b in expected)
+            self.assertEqual(found_rays, expected_rays, str(vertices))
+
+
+class ConeInequalitiesTest(unittest.TestCase):
+
+    def test_random_cones(self):
+        rand = random.Random(1)
+        box = [(x, y) for x in range(-4, 5) for y in range(-4, 5)]
+        for trial in range(trials):
+            n = rand.randint(0, 4)
+            points = [tuple(rand.randint(-2, 2) for k in range(2)) for j in range(n)]
+            ineqs, eqs = geo.cone_inequalities(points)
+            for (a, b) in ineqs + eqs:
+                self.assertEqual(abs(fractions.gcd(a, b)), 1, str(points))
+            generators = [p for p in points if p != (0, 0)]
+            for q in box:
+                member = (all(a * q[0] + b * q[1] >= 0 for (a, b) in ineqs) and
+                          all(a * q[0] + b * q[1] == 0 for (a, b) in eqs))
+                self.assertEqual(member, in_cone(generators, q), '{0} {1}'.format(points, q))
+
+
+if __name__ == '__main__':
+    unittest.main()
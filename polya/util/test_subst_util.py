@@ -0,0 +1,65 @@
+####################################################################################################
+#
+# test_subst_util.py
+#
+# Checks that a Substitution keeps the ratios between the terms of a class exact, when they are
+# given as integers, and that the additive modules compare the terms equal to constants with the
+# terms of every component.
+#
+# Run with: python -m unittest discover -s polya -p 'test_*.py'
+#
+####################################################################################################
+
+import polya.main.messages as messages
+import polya.main.terms as terms
+import polya.main.main as main
+import polya.util.subst_util as subst_util
+import unittest
+import fractions
+
+
+class EqualitiesBlackboard(object):
+    """
+    Provides the numeric equalities a Substitution is built from, as a Blackboard does.
+    """
+
+    def __init__(self, num_terms, equalities):
+        self.num_terms, self.equalities = num_terms, equalities
+
+    def get_numeric_equalities(self):
+        return self.equalities
+
+
+class SubstitutionTest(unittest.TestCase):
+
+    def test_integer_ratios(self):
+        # t2 = 2 * t1 and t3 = 3 * t2, given as 1 * ti + b * tj = 0 with integer b
+        subst = subst_util.Substitution(EqualitiesBlackboard(4, [(2, 1, 1, -2), (3, 2, 1, -3)]))
+        self.assertEqual(subst.rep(3), (6, 1))
+        self.assertEqual(sorted(subst.expand([(1, 1)])),
+                         [[(fractions.Fraction(1, 6), 3)], [(fractions.Fraction(1, 2), 2)],
+                          [(1, 1)]])
+
+    def test_integer_union(self):
+        subst = subst_util.Substitution(EqualitiesBlackboard(3, []))
+        subst.union(1, 2, 2)
+        self.assertEqual(subst.find(2), (fractions.Fraction(1, 2), 1))
+
+
+class ConstantsTest(unittest.TestCase):
+
+    def setUp(self):
+        messages.set_verbosity(messages.quiet)
+
+    def test_constant_class(self):
+        # x = -3 and y are in different components, and y > 0 refutes both y <= 2 * x and
+        # y <= 3 * x only when compared with x through t0
+        x, y = terms.Var('x'), terms.Var('y')
+        for solver_type in ('fm', 'simplex'):
+            S = main.Solver(assertions=[x == -3, y > 0], solver_type=solver_type)
+            S.add_clause([y <= 2 * x, y <= 3 * x, y == 0])
+            self.assertTrue(S.prove(y == 0), solver_type)
+
+
+if __name__ == '__main__':
+    unittest.main()
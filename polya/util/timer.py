@@ -1,41 +1,181 @@
+####################################################################################################
+#
+# timer.py
+#
+# Profiling and statistics for runs of the modules.
+#
+# A Statistics object records the time spent in each module call, the number of new facts each
+# module asserts, and named counters such as saturation rounds, Fourier-Motzkin rows and lrs
+# calls. Module calls are timed on a stack, so nested calls are recorded without stopping the
+# outer ones: each module is credited with its total time and with its own time, excluding the
+# calls nested inside it.
+#
+# The module-level functions act on the Statistics object stored in current. A Solver installs a
+# fresh one with activate for each call to check or prove, and reports it afterwards.
+#
+####################################################################################################
+
 import timeit
+import json
 import polya.main.messages as messages
-PMUL, PADD, FMMUL, FMADD, FUN, CCM, EXP, MINM, ABS, ROOT, BUILTIN = range(11)
+PMUL, PADD, FMMUL, FMADD, FUN, CCM, EXP, MINM, ABS, ROOT, BUILTIN, SMUL, SADD, INTERVAL = \
+    range(14)
 mod_names = {0: "Poly mult", 1: "Poly add", 2: "FM mult", 3: "FM add", 4: "Function", 5: "CCM",
-             6: 'Exponential', 7: 'Minimum', 8: 'Abs', 9: 'Roots', 10: 'Builtins'}
+             6: 'Exponential', 7: 'Minimum', 8: 'Abs', 9: 'Roots', 10: 'Builtins',
+             11: 'Simplex mult', 12: 'Simplex add', 13: 'Interval'}
 
-runs = {}
-time_total = {}
-time_cur = {}
 
+class Statistics(object):
+    """
+    Timings, yields and counters for a run of the modules. Modules are identified by the ids
+    above, and reported by their names in mod_names.
+    """
+
+    def __init__(self):
+        self.runs = {}          # maps a module to the number of calls
+        self.time_total = {}    # maps a module to the time spent in its calls
+        self.time_self = {}     # same, excluding calls to other modules nested inside
+        self.facts = {}         # maps a module to the number of new facts it asserted
+        self.counters = {}      # maps a name to a count
+        self.maxima = {}        # maps a name to the largest value recorded for it
+        self.stack = []         # the running module calls, as [module, start, nested time]
+
+    def start(self, module):
+        self.stack.append([module, timeit.default_timer(), 0])
+
+    def stop(self, module):
+        """
+        Ends the innermost running call to module, along with any calls nested inside it that
+        were not stopped. Returns the time spent in the call.
+        """
+        t = 0
+        while any(f[0] == module for f in self.stack):
+            t = self.pop()
+        return t
+
+    def pop(self):
+        m, start, nested = self.stack.pop()
+        t = timeit.default_timer() - start
+        self.runs[m] = self.runs.get(m, 0) + 1
+        self.time_total[m] = self.time_total.get(m, 0) + t
+        self.time_self[m] = self.time_self.get(m, 0) + t - nested
+        if len(self.stack) > 0:
+            self.stack[-1][2] += t
+        return t
+
+    def unwind(self, depth):
+        """
+        Stops all running calls above the first depth, eg after an exception was raised in a
+        module.
+        """
+        while len(self.stack) > depth:
+            self.pop()
+
+    def record_fact(self):
+        """
+        Credits a new fact to the innermost running module, or to None if no module is running.
+        """
+        m = self.stack[-1][0] if len(self.stack) > 0 else None
+        self.facts[m] = self.facts.get(m, 0) + 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_max(self, name, n):
+        self.maxima[name] = max(self.maxima.get(name, n), n)
+
+    def hit_rates(self):
+        """
+        Returns a dictionary mapping the name of each cache, counted by counters name_hits and
+        name_misses, to the fraction of its lookups that were hits.
+        """
+        rates = {}
+        for k in self.counters:
+            if k.endswith('_hits'):
+                name = k[:-len('_hits')]
+                total = self.counters[k] + self.counters.get(name + '_misses', 0)
+                rates[name] = round(self.counters[k] / float(total), 4)
+        return rates
+
+    def report(self):
+        """
+        Returns a dictionary with the statistics, keyed by module names.
+        """
+        self.unwind(0)
+        names = lambda d: dict((mod_names.get(m, 'none' if m is None else str(m)), v)
+                               for m, v in d.items())
+        return {'runs': names(self.runs),
+                'time_total': names(dict((m, round(t, 4)) for m, t in self.time_total.items())),
+                'time_self': names(dict((m, round(t, 4)) for m, t in self.time_self.items())),
+                'facts': names(self.facts),
+                'counters': dict(self.counters),
+                'hit_rates': self.hit_rates(),
+                'maxima': dict(self.maxima)}
+
+    def merge(self, other):
+        """
+        Adds the statistics recorded in other to these.
+        """
+        for d, od in [(self.runs, other.runs), (self.time_total, other.time_total),
+                      (self.time_self, other.time_self), (self.facts, other.facts),
+                      (self.counters, other.counters)]:
+            for k in od:
+                d[k] = d.get(k, 0) + od[k]
+        for k in other.maxima:
+            self.record_max(k, other.maxima[k])
+
+    def to_json(self):
+        return json.dumps(self.report(), sort_keys=True)
 
-def start(module):
-    for k in [k for k in time_cur if time_cur[k] != 0]:
-        e_stop(k)
-    time_cur[module] = timeit.default_timer()
 
+current = Statistics()
 
-def e_stop(module):
-    t = timeit.default_timer() - time_cur[module]
-    time_total[module] = time_total.get(module, 0) + t
-    time_cur[module] = 0
-    runs[module] = runs.get(module, 0) + 1
-    return t
+
+def activate(stats):
+    """
+    Makes stats the current Statistics object, and returns the previous one, so that it can be
+    restored.
+    """
+    global current
+    previous, current = current, stats
+    return previous
+
+
+def start(module):
+    current.start(module)
 
 
 def stop(module):
-    t = e_stop(module)
+    t = current.stop(module)
     messages.announce("Module run time: " + str(round(t, 3)), messages.DEBUG)
 
 
+def depth():
+    return len(current.stack)
+
+
+def unwind(d):
+    current.unwind(d)
+
+
+def record_fact():
+    current.record_fact()
+
+
+def count(name, n=1):
+    current.count(name, n)
+
+
+def record_max(name, n):
+    current.record_max(name, n)
+
+
 def announce_times():
-    for k in [k for k in time_cur if time_cur[k] != 0]:
-        e_stop(k)
+    current.unwind(0)
     messages.announce("Average run times:", messages.DEBUG)
-    for i in time_total:
+    for i in current.time_total:
         messages.announce(
-            "{0!s} module: {1!s} over {2!s} runs. {3!s} total.".format(mod_names[i],
-                                                         str(round(time_total[i]/runs[i], 3)),
-                                                         runs[i],
-                                                         round(time_total[i], 3)),
-            messages.DEBUG)
\ No newline at end of file
+            "{0!s} module: {1!s} over {2!s} runs. {3!s} total.".format(
+                mod_names[i], str(round(current.time_total[i]/current.runs[i], 3)),
+                current.runs[i], round(current.time_total[i], 3)),
+            messages.DEBUG)